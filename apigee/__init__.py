@@ -30,12 +30,17 @@ APIGEE_USERNAME = getenv('APIGEE_USERNAME')
 APIGEE_PASSWORD = getenv('APIGEE_PASSWORD')
 APIGEE_MFA_SECRET = getenv('APIGEE_MFA_SECRET')
 APIGEE_IS_TOKEN = getenv('APIGEE_IS_TOKEN')
-APIGEE_ADMIN_API_URL = 'https://api.enterprise.apigee.com'
-APIGEE_OAUTH_URL = 'https://login.apigee.com/oauth/token'
-APIGEE_ZONENAME_OAUTH_URL = 'https://{zonename}.login.apigee.com/oauth/token'
+# base URLs can point elsewhere, e.g. to a local `python -m apigee.standin`
+APIGEE_ADMIN_API_URL = getenv('APIGEE_ADMIN_API_URL', 'https://api.enterprise.apigee.com')
+APIGEE_OAUTH_URL = getenv('APIGEE_OAUTH_URL', 'https://login.apigee.com/oauth/token')
+APIGEE_ZONENAME_OAUTH_URL = getenv(
+    'APIGEE_ZONENAME_OAUTH_URL', 'https://{zonename}.login.apigee.com/oauth/token'
+)
 APIGEE_ZONENAME = getenv('APIGEE_ZONENAME')
 APIGEE_CLI_IS_MACHINE_USER = is_true(getenv('APIGEE_CLI_IS_MACHINE_USER'))
-APIGEE_SAML_LOGIN_URL = 'https://{zonename}.login.apigee.com/passcode'
+APIGEE_SAML_LOGIN_URL = getenv(
+    'APIGEE_SAML_LOGIN_URL', 'https://{zonename}.login.apigee.com/passcode'
+)
 APIGEE_ORG = getenv('APIGEE_ORG')
 
 # crypto
@@ -44,11 +49,23 @@ APIGEE_CLI_SYMMETRIC_KEY = getenv('APIGEE_CLI_SYMMETRIC_KEY')
 # custom
 APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE = 'team'
 APIGEE_CLI_PREFIX = getenv('APIGEE_CLI_PREFIX')
+# seconds the teams of a user are cached for in teams.json, per Management
+# API URL, organization and user. Off (0) by default: teams removed from a
+# user stay allowed until their cache entry expires.
+APIGEE_CLI_TEAMS_CACHE_TTL = int(getenv('APIGEE_CLI_TEAMS_CACHE_TTL', '0'))
 
 # flags
 APIGEE_CLI_TOGGLE_SILENT = False
 APIGEE_CLI_TOGGLE_VERBOSE = 0
 
+# concurrency
+APIGEE_CLI_MAX_WORKERS = int(getenv('APIGEE_CLI_MAX_WORKERS', '8'))
+# maximum Management API requests per second, 0 for no limit
+APIGEE_CLI_RATE_LIMIT = float(getenv('APIGEE_CLI_RATE_LIMIT', '0'))
+# times an idempotent Management API request is retried on connection errors,
+# 429 and 5xx responses, 0 to never retry
+APIGEE_CLI_MAX_RETRIES = int(getenv('APIGEE_CLI_MAX_RETRIES', '3'))
+
 # config directory
 APIGEE_CLI_DIRECTORY = str_path(Path.home(), '.apigee')
 
@@ -56,6 +73,10 @@ APIGEE_CLI_DIRECTORY = str_path(Path.home(), '.apigee')
 APIGEE_CLI_ACCESS_TOKEN_FILE = str_path(APIGEE_CLI_DIRECTORY, 'access_token')
 APIGEE_CLI_CREDENTIALS_FILE = str_path(APIGEE_CLI_DIRECTORY, 'credentials')
 APIGEE_CLI_EXCEPTION_LOG_FILE = str_path(APIGEE_CLI_DIRECTORY, 'exception.log')
+APIGEE_CLI_DEPLOYMENTS_CACHE_FILE = str_path(APIGEE_CLI_DIRECTORY, 'deployments.json')
+APIGEE_CLI_TEAMS_CACHE_FILE = str_path(APIGEE_CLI_DIRECTORY, 'teams.json')
+APIGEE_CLI_BUNDLES_DIRECTORY = str_path(APIGEE_CLI_DIRECTORY, 'bundles')
+APIGEE_CLI_PROFILES_DIRECTORY = str_path(APIGEE_CLI_DIRECTORY, 'profiles')
 
 # plugin files
 APIGEE_CLI_PLUGINS_DIRECTORY = str_path(APIGEE_CLI_DIRECTORY, 'plugins')
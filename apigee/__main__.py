@@ -22,6 +22,7 @@ from apigee.apps.commands import apps
 from apigee.auth import auth
 from apigee.backups.commands import backups
 from apigee.caches.commands import caches
+from apigee.cassette import common_cassette_options
 from apigee.cls import AliasedGroup
 from apigee.configure.commands import configure
 from apigee.deployments.commands import deployments
@@ -29,12 +30,16 @@ from apigee.developers.commands import developers
 from apigee.exceptions import exception_handler
 from apigee.keystores.commands import keystores
 from apigee.keyvaluemaps.commands import keyvaluemaps
+from apigee.manifests.commands import deploy_all
 from apigee.maskconfigs.commands import maskconfigs
+from apigee.metrics import common_metrics_options
 from apigee.permissions.commands import permissions
 from apigee.plugins.commands import plugins
+from apigee.profiling import common_profiler_options
 from apigee.references.commands import references
 from apigee.sharedflows.commands import sharedflows
 from apigee.targetservers.commands import targetservers
+from apigee.tracing import common_trace_options
 from apigee.userroles.commands import userroles
 from apigee.utils import is_dir, run_func_on_dir_files, show_message
 from apigee.virtualhosts.commands import virtualhosts
@@ -50,6 +55,10 @@ CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 )
 # @click.group(context_settings=CONTEXT_SETTINGS, cls=ClickAliasedGroup, invoke_without_command=False, chain=False)
 @click.version_option(version, '-V', '--version')
+@common_metrics_options
+@common_trace_options
+@common_profiler_options
+@common_cassette_options
 @click.pass_context
 def cli(ctx):
     """Welcome to the Apigee Management API command-line interface!
@@ -90,6 +99,7 @@ def main():
         references,
         virtualhosts,
         plugins,
+        deploy_all,
     }
 
     def _load_all_modules_in_directory(plugins_init_file):
@@ -1,10 +1,11 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
 from apigee.apiproducts.serializer import ApiproductsSerializer
+from apigee.pagination import filter_prefix, paginate
+from apigee.session import session
 from apigee.utils import read_file
 
 CREATE_API_PRODUCT_PATH = '{api_url}/v1/organizations/{org}/apiproducts'
@@ -55,7 +56,7 @@ class Apiproducts:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -64,7 +65,7 @@ class Apiproducts:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, name=self._apiproduct_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -73,11 +74,13 @@ class Apiproducts:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, name=self._apiproduct_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_api_products(self, prefix=None, expand=False, count=1000, startkey="", format='json'):
+    def list_api_products(
+        self, prefix=None, expand=False, count=1000, startkey="", format='json', fields=None
+    ):
         uri = LIST_API_PRODUCTS_PATH.format(
             api_url=APIGEE_ADMIN_API_URL,
             org=self._org_name,
@@ -86,9 +89,24 @@ class Apiproducts:
             startkey=startkey,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return ApiproductsSerializer().serialize_details(resp, format, prefix=prefix)
+        return ApiproductsSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
+
+    def paginate_api_products(self, prefix=None, expand=False, count=1000, startkey=''):
+        """Yield every API product name, or every API product when ``expand``
+        is set, requesting further pages as needed."""
+
+        def _fetch_page(startkey, count):
+            page = self.list_api_products(
+                expand=expand, count=count, startkey=startkey, format='dict'
+            )
+            return page['apiProduct'] if expand else page
+
+        key = (lambda apiproduct: apiproduct['name']) if expand else None
+        return filter_prefix(
+            paginate(_fetch_page, count=count, startkey=startkey, key=key), prefix=prefix, key=key
+        )
 
     def update_api_product(self, request_body):
         uri = UPDATE_API_PRODUCT_PATH.format(
@@ -98,7 +116,7 @@ class Apiproducts:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.put(uri, headers=hdrs, json=body)
+        resp = session.put(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -3,7 +3,10 @@ import click
 from apigee import console
 from apigee.apiproducts.apiproducts import Apiproducts
 from apigee.auth import common_auth_options, gen_auth
+from apigee.pagination import MIN_PAGINATION_COUNT
 from apigee.prefix import common_prefix_options
+from apigee.serializer import (NDJSON, common_format_options,
+                               serialize_json, serialize_ndjson)
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -85,11 +88,26 @@ def _list_api_products(
     expand=False,
     count=1000,
     startkey="",
+    all_pages=False,
+    format='json',
+    fields=None,
     **kwargs
 ):
-    return Apiproducts(
-        gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_api_products(prefix=prefix, expand=expand, count=count, startkey=startkey)
+    apiproducts = Apiproducts(gen_auth(username, password, mfa_secret, token, zonename), org, None)
+    if all_pages:
+        if count < MIN_PAGINATION_COUNT:
+            raise click.BadParameter(
+                f'must be at least {MIN_PAGINATION_COUNT} with --all', param_hint='--count'
+            )
+        records = apiproducts.paginate_api_products(
+            prefix=prefix, expand=expand, count=count, startkey=startkey
+        )
+        if format == NDJSON:
+            return serialize_ndjson(records, fields)
+        return serialize_json([*records], fields)
+    return apiproducts.list_api_products(
+        prefix=prefix, expand=expand, count=count, startkey=startkey, format=format, fields=fields
+    )
 
 
 @apiproducts.command(help='Get a list of all API product names for an organization.')
@@ -115,8 +133,15 @@ def _list_api_products(
     show_default=True,
     help='Returns a list of API products starting with the specified API product.',
 )
+@click.option(
+    '--all/--no-all',
+    'all_pages',
+    default=False,
+    help='Follow startkey across pages to list every API product, not just the first page.',
+)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_api_products(*args, **kwargs))
+    console.echo_output(_list_api_products(*args, **kwargs))
 
 
 def _update_api_product(
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class ApiproductsSerializer:
-    def serialize_details(self, apiproducts, format, prefix=None):
+    def serialize_details(self, apiproducts, format, prefix=None, fields=None):
         resp = apiproducts
         if format == 'text':
             return apiproducts.text
@@ -12,7 +12,9 @@ class ApiproductsSerializer:
                 apiproduct for apiproduct in apiproducts if apiproduct.startswith(prefix)
             ]
         if format == 'json':
-            return json.dumps(apiproducts)
+            return serialize_json(apiproducts, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(apiproducts, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
@@ -2,31 +2,38 @@ import json
 import os
 import sys
 import xml.etree.ElementTree as et
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import requests
-
-from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee import APIGEE_ADMIN_API_URL, APIGEE_CLI_MAX_WORKERS, auth, console
 from apigee.apis.interfaces.apis_interface import InformalApisInterface
 from apigee.apis.interfaces.pull_interface import InformalPullInterface
 from apigee.apis.serializer import ApisSerializer
 from apigee.caches.caches import Caches
 from apigee.deployments.deployments import Deployments
 from apigee.keyvaluemaps.keyvaluemaps import Keyvaluemaps
+from apigee.session import session
 from apigee.targetservers.targetservers import Targetservers
+from apigee.tracing import tracer
 from apigee.utils import (extract_zip, is_dir, make_dirs, path_exists,
                           paths_exist, remove_last_items_from_list,
                           run_func_on_dir_files, run_func_on_iterable,
-                          split_path, write_zip)
+                          run_func_on_iterable_concurrently, split_path,
+                          write_zip)
 
 DELETE_API_PROXY_REVISION_PATH = (
     '{api_url}/v1/organizations/{org}/apis/{api_name}/revisions/{revision_number}'
 )
 DEPLOY_API_PROXY_REVISION_PATH = '{api_url}/v1/organizations/{org}/environments/{environment}/apis/{api_name}/revisions/{revision_number}/deployments?delay={delay}'
+DEPLOY_API_PROXY_REVISION_TO_BASE_PATH_PATH = '{api_url}/v1/organizations/{org}/apis/{api_name}/deployments?action=deploy&env={environment}&revision={revision_number}&basepath={base_path}'
 EXPORT_API_PROXY_PATH = (
     '{api_url}/v1/organizations/{org}/apis/{api_name}/revisions/{revision_number}?format=bundle'
 )
 GET_API_PROXY_PATH = '{api_url}/v1/organizations/{org}/apis/{api_name}'
+GET_API_PROXY_REVISION_PATH = (
+    '{api_url}/v1/organizations/{org}/apis/{api_name}/revisions/{revision_number}'
+)
+IMPORT_API_PROXY_PATH = '{api_url}/v1/organizations/{org}/apis?action=import&name={api_name}'
 LIST_API_PROXIES_PATH = '{api_url}/v1/organizations/{org}/apis'
 LIST_API_PROXY_REVISIONS_PATH = '{api_url}/v1/organizations/{org}/apis/{api_name}/revisions'
 UNDEPLOY_API_PROXY_REVISION_PATH = '{api_url}/v1/organizations/{org}/environments/{environment}/apis/{api_name}/revisions/{revision_number}/deployments'
@@ -49,7 +56,7 @@ class Apis(InformalApisInterface, InformalPullInterface):
             revision_number=revision_number,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -71,7 +78,23 @@ class Apis(InformalApisInterface, InformalPullInterface):
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
         )
-        resp = requests.post(uri, headers=hdrs, data={'override': 'true' if override else 'false'})
+        resp = session.post(uri, headers=hdrs, data={'override': 'true' if override else 'false'})
+        resp.raise_for_status()
+        return resp
+
+    def deploy_api_proxy_revision_to_base_path(
+        self, api_name, environment, revision_number, base_path='/'
+    ):
+        uri = DEPLOY_API_PROXY_REVISION_TO_BASE_PATH_PATH.format(
+            api_url=APIGEE_ADMIN_API_URL,
+            org=self._org_name,
+            environment=environment,
+            api_name=api_name,
+            revision_number=revision_number,
+            base_path=base_path,
+        )
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.post(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -114,7 +137,7 @@ class Apis(InformalApisInterface, InformalPullInterface):
             console.echo(f'Deleting revison {revision}')
             self.delete_api_proxy_revision(api_name, revision)
 
-        return run_func_on_iterable(undeployed, _func)
+        return run_func_on_iterable_concurrently(undeployed, _func)
 
     def export_api_proxy(self, api_name, revision_number, fs_write=True, output_file=None):
         uri = EXPORT_API_PROXY_PATH.format(
@@ -124,7 +147,7 @@ class Apis(InformalApisInterface, InformalPullInterface):
             revision_number=revision_number,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         if fs_write:
             write_zip(output_file, resp.content)
@@ -135,23 +158,79 @@ class Apis(InformalApisInterface, InformalPullInterface):
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, api_name=api_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_api_proxies(self, prefix=None, format='json'):
+    def import_api_proxy(self, api_name, bundle):
+        uri = IMPORT_API_PROXY_PATH.format(
+            api_url=APIGEE_ADMIN_API_URL, org=self._org_name, api_name=api_name
+        )
+        hdrs = auth.set_header(
+            self._auth,
+            headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
+        )
+        resp = session.post(uri, headers=hdrs, data=bundle)
+        resp.raise_for_status()
+        return resp
+
+    def list_api_proxies(self, prefix=None, format='json', fields=None):
+        uri = LIST_API_PROXIES_PATH.format(api_url=APIGEE_ADMIN_API_URL, org=self._org_name)
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.get(uri, headers=hdrs)
+        resp.raise_for_status()
+        return ApisSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
+
+    def list_api_proxies_with_revisions(self):
+        """Return the revisions of every API proxy, in one request when the
+        Management API supports ``includeRevisions``."""
         uri = LIST_API_PROXIES_PATH.format(api_url=APIGEE_ADMIN_API_URL, org=self._org_name)
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs, params={'includeRevisions': 'true'})
+        resp.raise_for_status()
+        proxies = resp.json()
+        if all(isinstance(proxy, dict) for proxy in proxies):
+            return {proxy['name']: proxy.get('revision', []) for proxy in proxies}
+        names = proxies
+        with ThreadPoolExecutor(max_workers=APIGEE_CLI_MAX_WORKERS) as executor:
+            revisions = executor.map(lambda n: self.list_api_proxy_revisions(n).json(), names)
+            return dict(zip(names, revisions))
+
+    def list_api_proxies_with_details(self):
+        """Return the details of every API proxy, as :meth:`get_api_proxy`
+        does, in one request when the Management API supports
+        ``includeRevisions`` and ``includeMetaData``."""
+        uri = LIST_API_PROXIES_PATH.format(api_url=APIGEE_ADMIN_API_URL, org=self._org_name)
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.get(
+            uri, headers=hdrs, params={'includeRevisions': 'true', 'includeMetaData': 'true'}
+        )
+        resp.raise_for_status()
+        proxies = resp.json()
+        if all(isinstance(proxy, dict) and 'metaData' in proxy for proxy in proxies):
+            return proxies
+        names = [proxy['name'] if isinstance(proxy, dict) else proxy for proxy in proxies]
+        with ThreadPoolExecutor(max_workers=APIGEE_CLI_MAX_WORKERS) as executor:
+            return list(executor.map(lambda n: self.get_api_proxy(n).json(), names))
+
+    def get_api_proxy_revision(self, api_name, revision_number):
+        uri = GET_API_PROXY_REVISION_PATH.format(
+            api_url=APIGEE_ADMIN_API_URL,
+            org=self._org_name,
+            api_name=api_name,
+            revision_number=revision_number,
+        )
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return ApisSerializer().serialize_details(resp, format, prefix=prefix)
+        return resp
 
     def list_api_proxy_revisions(self, api_name):
         uri = LIST_API_PROXY_REVISIONS_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, api_name=api_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -164,7 +243,7 @@ class Apis(InformalApisInterface, InformalPullInterface):
             revision_number=revision_number,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -177,7 +256,7 @@ class Apis(InformalApisInterface, InformalPullInterface):
             environment=environment,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -328,23 +407,29 @@ class Apis(InformalApisInterface, InformalPullInterface):
         console.echo(f'M  {os.path.relpath(default_file)}')
 
     def _get_and_export(self, resource_type, files, environment, dependencies=[], force=True):
-        resource = getattr(self, f'get_{resource_type}_dependencies')(files)
+        with tracer.span(f'scan {resource_type} dependencies'):
+            resource = getattr(self, f'get_{resource_type}_dependencies')(files)
         dependencies.extend(resource)
-        getattr(self, f'export_{resource_type}_dependencies')(environment, resource, force=force)
+        with tracer.span(f'export {resource_type} dependencies'):
+            getattr(self, f'export_{resource_type}_dependencies')(
+                environment, resource, force=force
+            )
         return dependencies
 
+    @tracer.traced('pull')
     def pull(self, api_name, dependencies=[], force=False, prefix=None, basepath=None):
         dependencies.append(api_name)
         make_dirs(self._work_tree)
         self.apiproxy_dir = api_name
         if not force:
             paths_exist((os.path.relpath(self._zip_file), os.path.relpath(self._apiproxy_dir)))
-        export = self.export_api_proxy(
-            api_name, self._revision_number, fs_write=True, output_file=self._zip_file
-        )
-        make_dirs(self._apiproxy_dir)
-        extract_zip(self._zip_file, self._apiproxy_dir)
-        os.remove(self._zip_file)
+        with tracer.span('export api proxy'):
+            export = self.export_api_proxy(
+                api_name, self._revision_number, fs_write=True, output_file=self._zip_file
+            )
+            make_dirs(self._apiproxy_dir)
+            extract_zip(self._zip_file, self._apiproxy_dir)
+            os.remove(self._zip_file)
         files = self.get_apiproxy_files(self._apiproxy_dir)
         for resource_type in ['keyvaluemap', 'targetserver', 'cache']:
             self._get_and_export(
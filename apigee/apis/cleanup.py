@@ -0,0 +1,150 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import HTTPError
+
+from apigee import APIGEE_CLI_MAX_WORKERS, console
+from apigee.apis.apis import Apis
+from apigee.deployments.deployments import DeploymentsMatrix
+from apigee.serializer import serialize_table
+
+
+def format_revision_ranges(revisions):
+    """Format sorted revisions compactly, e.g. ``[1, 2, 3, 7]`` as ``1-3, 7``."""
+    ranges = []
+    for revision in revisions:
+        if ranges and revision == ranges[-1][1] + 1:
+            ranges[-1][1] = revision
+        else:
+            ranges.append([revision, revision])
+    return ', '.join(f'{a}-{b}' if a != b else f'{a}' for a, b in ranges)
+
+
+class RevisionCleaner:
+    """Deletes old API proxy revisions across an organization.
+
+    Deployed revisions are always kept. On top of that, the ``keep_last``
+    most recent revisions of each proxy are kept, as well as every revision
+    created after ``keep_newer_than`` (a timestamp in seconds).
+    """
+
+    def __init__(
+        self,
+        auth,
+        org_name,
+        keep_last=0,
+        keep_newer_than=None,
+        max_workers=APIGEE_CLI_MAX_WORKERS,
+    ):
+        self._auth = auth
+        self._org_name = org_name
+        self._keep_last = keep_last
+        self._keep_newer_than = keep_newer_than
+        self._max_workers = max_workers
+
+    @property
+    def auth(self):
+        return self._auth
+
+    @auth.setter
+    def auth(self, value):
+        self._auth = value
+
+    @property
+    def org_name(self):
+        return self._org_name
+
+    @org_name.setter
+    def org_name(self, value):
+        self._org_name = value
+
+    def _get_created_at(self, api_name, revision):
+        details = Apis(self._auth, self._org_name).get_api_proxy_revision(api_name, revision)
+        return int(details.json()['createdAt']) / 1000
+
+    def _find_first_newer_revision(self, api_name, revisions):
+        """Return the index of the first revision created after the cut-off.
+
+        Revision numbers grow with their creation time, so a binary search
+        needs only a handful of requests even for proxies with hundreds of
+        revisions."""
+        low, high = 0, len(revisions)
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_created_at(api_name, revisions[middle]) > self._keep_newer_than:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _gen_api_plan(self, api_name, revisions, deployed):
+        revisions = sorted(int(revision) for revision in revisions)
+        keep = set(deployed)
+        if self._keep_last > 0:
+            keep.update(revisions[-self._keep_last :])
+        candidates = [revision for revision in revisions if revision not in keep]
+        if candidates and self._keep_newer_than is not None:
+            index = self._find_first_newer_revision(api_name, revisions)
+            keep.update(revisions[index:])
+            candidates = [revision for revision in candidates if revision not in keep]
+        return {
+            'name': api_name,
+            'revisions': revisions,
+            'deployed': sorted(deployed),
+            'delete': candidates,
+        }
+
+    def gen_plan(self, prefix=None, pattern=None):
+        """Return, for every API proxy matching the filters, its revisions,
+        the deployed ones and the ones to delete."""
+        proxies = Apis(self._auth, self._org_name).list_api_proxies_with_revisions()
+        if prefix:
+            proxies = {k: v for k, v in proxies.items() if k.startswith(prefix)}
+        if pattern:
+            regex = re.compile(pattern)
+            proxies = {k: v for k, v in proxies.items() if regex.search(k)}
+        matrix = DeploymentsMatrix(self._auth, self._org_name, sharedflows=False)
+        deployed = {}
+        for row in matrix.get_matrix():
+            deployed.setdefault(row['name'], set()).add(row['revision'])
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda item: self._gen_api_plan(*item, deployed.get(item[0], set())),
+                    sorted(proxies.items()),
+                )
+            )
+
+    def _delete(self, api_name, revision):
+        try:
+            Apis(self._auth, self._org_name).delete_api_proxy_revision(api_name, revision)
+        except HTTPError as e:
+            console.echo(f'Error deleting {api_name} revision {revision}: {e}')
+            return (api_name, revision, e)
+        console.echo(f'Deleted {api_name} revision {revision}', expc_verbosity=1)
+        return None
+
+    def run(self, plan):
+        """Delete the planned revisions concurrently and return the
+        ``(api_name, revision, error)`` triples of the deletes that failed."""
+        deletes = [(api['name'], revision) for api in plan for revision in api['delete']]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return [error for error in executor.map(lambda d: self._delete(*d), deletes) if error]
+
+
+def gen_plan_table(plan, tablefmt='simple'):
+    table = (
+        [
+            api['name'],
+            len(api['revisions']),
+            format_revision_ranges(api['deployed']),
+            len(api['delete']),
+            format_revision_ranges(api['delete']),
+        ]
+        for api in plan
+    )
+    return serialize_table(
+        table,
+        ['name', 'revisions', 'deployed', 'to delete', 'revisions to delete'],
+        tablefmt=tablefmt,
+    )
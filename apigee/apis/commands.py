@@ -3,9 +3,12 @@ from click_option_group import MutuallyExclusiveOptionGroup, optgroup
 
 from apigee import console
 from apigee.apis.apis import Apis
+from apigee.apis.cleanup import RevisionCleaner, gen_plan_table
 from apigee.apis.deploy import deploy as deploy_tool
 from apigee.auth import common_auth_options, gen_auth
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
+from apigee.session import rate_limiter
 from apigee.silent import common_silent_options
 from apigee.types import Struct
 from apigee.verbose import common_verbose_options
@@ -126,6 +129,90 @@ def clean(*args, **kwargs):
     _delete_undeployed_revisions(*args, **kwargs)
 
 
+def _clean_all(
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    prefix=None,
+    pattern=None,
+    keep_last=0,
+    keep_newer_than=None,
+    rate_limit=None,
+    dry_run=False,
+    yes=False,
+    **kwargs,
+):
+    if rate_limit is not None:
+        rate_limiter.set_rate(rate_limit)
+    cleaner = RevisionCleaner(
+        gen_auth(username, password, mfa_secret, token, zonename),
+        org,
+        keep_last=keep_last,
+        keep_newer_than=keep_newer_than.timestamp() if keep_newer_than else None,
+    )
+    plan = [api for api in cleaner.gen_plan(prefix=prefix, pattern=pattern) if api['delete']]
+    if not plan:
+        console.echo('No revisions to delete')
+        return plan
+    console.echo_output(gen_plan_table(plan))
+    if dry_run:
+        return plan
+    # deleted revisions cannot be restored, so the plan is confirmed first
+    if not yes:
+        click.confirm(
+            f'Delete {sum(len(api["delete"]) for api in plan)} revisions'
+            f' of {len(plan)} API proxies?',
+            abort=True,
+        )
+    errors = cleaner.run(plan)
+    console.echo(
+        f'Deleted {sum(len(api["delete"]) for api in plan) - len(errors)} revisions'
+        f' of {len(plan)} API proxies'
+    )
+    if errors:
+        console.echo(f'{len(errors)} revisions could not be deleted', status=1)
+
+
+@apis.command(
+    help='Deletes old revisions of every API proxy in the organization. Deployed revisions are always kept.'
+)
+@common_auth_options
+@common_verbose_options
+@common_silent_options
+@common_prefix_options
+@click.option('--pattern', help='only clean API proxies whose name matches this regular expression')
+@click.option(
+    '--keep-last',
+    type=click.INT,
+    default=0,
+    help='keep the N most recent revisions of each API proxy',
+)
+@click.option(
+    '--keep-newer-than',
+    type=click.DateTime(),
+    default=None,
+    help='keep revisions created after this date',
+)
+@click.option(
+    '--rate-limit',
+    type=click.FLOAT,
+    default=None,
+    help='maximum Management API requests per second',
+)
+@click.option(
+    '--dry-run/--no-dry-run', default=False, help='show revisions to be deleted but do not delete'
+)
+@click.option(
+    '-y', '--yes', is_flag=True, default=False, help='delete without asking for confirmation'
+)
+def clean_all(*args, **kwargs):
+    _clean_all(*args, **kwargs)
+
+
 def _export_api_proxy(
     username,
     password,
@@ -192,10 +279,11 @@ def _list_api_proxies(
     profile,
     prefix=None,
     format='json',
+    fields=None,
     **kwargs,
 ):
     return Apis(gen_auth(username, password, mfa_secret, token, zonename), org).list_api_proxies(
-        prefix=prefix
+        prefix=prefix, format=format, fields=fields
     )
 
 
@@ -206,8 +294,9 @@ def _list_api_proxies(
 @common_verbose_options
 @common_silent_options
 @common_prefix_options
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_api_proxies(*args, **kwargs))
+    console.echo_output(_list_api_proxies(*args, **kwargs))
 
 
 def _list_api_proxy_revisions(
@@ -353,6 +442,7 @@ def _deploy(
     import_only,
     seamless_deploy,
     environment,
+    force=False,
     **kwargs,
 ):
     return deploy_tool(
@@ -365,6 +455,7 @@ def _deploy(
             environment=environment,
             import_only=import_only,
             seamless_deploy=seamless_deploy,
+            force=force,
             mfa_secret=mfa_secret,
             token=token,
             zonename=zonename,
@@ -411,5 +502,11 @@ These files are Copyright 2015 Apigee Corporation, released under the Apache2 Li
     default=False,
     help='seamless deploy the bundle',
 )
+@click.option(
+    '--force/--no-force',
+    '-f/-F',
+    default=False,
+    help='import and deploy even if the bundle is unchanged since its last deployment',
+)
 def deploy(*args, **kwargs):
     _deploy(*args, **kwargs)
@@ -15,344 +15,291 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
-import getopt
-import http.client
-import io
 import json
 import os
-import re
-import sys
-import urllib.parse
-import xml.dom.minidom
-import zipfile
+import tempfile
+import threading
 
 from requests.exceptions import HTTPError
 
-from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee import (APIGEE_ADMIN_API_URL, APIGEE_CLI_DEPLOYMENTS_CACHE_FILE,
+                    APIGEE_CLI_DIRECTORY, console)
 from apigee.apis.apis import Apis
-
-ApigeeHost = APIGEE_ADMIN_API_URL
-UserPW = None
-Directory = None
-Organization = None
-Environment = None
-Name = None
-BasePath = '/'
-ShouldDeploy = True
-ShouldOverride = False
-GracePeriod = 15
-Auth = None
-
-url = urllib.parse.urlparse(ApigeeHost)
-httpScheme = url[0]
-httpHost = url[1]
-
-body = None
-
-
-class Struct:
-    def __init__(self, **entries):
-        self.__dict__.update(entries)
-
-
-def httpCall(verb, uri, headers, body):
-    if httpScheme == 'https':
-        conn = http.client.HTTPSConnection(httpHost)
-    else:
-        conn = http.client.HTTPConnection(httpHost)
-
-    if headers == None:
-        hdrs = {}
-    else:
-        hdrs = headers
-
-    # if Auth:
-    #     # hdrs['Authorization'] = 'Bearer %s' % AccessToken
-    #     hdrs = auth.set_header(hdrs, Auth)
-    # else:
-    #     hdrs['Authorization'] = 'Basic %s' % base64.b64encode(UserPW.encode()).decode()
-    hdrs = auth.set_header(Auth, headers=hdrs)
-    conn.request(verb, uri, body, hdrs)
-
-    return conn.getresponse()
-
-
-def getElementText(n):
-    c = n.firstChild
-    str = io.StringIO()
-
-    while c != None:
-        if c.nodeType == xml.dom.Node.TEXT_NODE:
-            str.write(c.data)
-        c = c.nextSibling
-
-    return str.getvalue().strip()
-
-
-def getElementVal(n, name):
-    c = n.firstChild
-
-    while c != None:
-        if c.nodeName == name:
-            return getElementText(c)
-        c = c.nextSibling
-
-    return None
-
-
-# Return TRUE if any component of the file path contains a directory name that
-# starts with a "." like '.svn', but not '.' or '..'
-def pathContainsDot(p):
-    c = re.compile('\.\w+')
-
-    for pc in p.split('/'):
-        if c.match(pc) != None:
-            return True
-
-    return False
-
-
-def getDeployments():
-    # Print info on deployments
-    hdrs = {'Accept': 'application/xml'}
-    resp = httpCall(
-        'GET', '/v1/organizations/%s/apis/%s/deployments' % (Organization, Name), hdrs, None
-    )
-
-    if resp.status != 200:
-        return None
-
-    ret = []
-    deployments = xml.dom.minidom.parse(resp)
-    environments = deployments.getElementsByTagName('Environment')
-
-    for env in environments:
-        envName = env.getAttribute('name')
-        revisions = env.getElementsByTagName('Revision')
-        for rev in revisions:
-            revNum = int(rev.getAttribute('name'))
-            error = None
-            state = getElementVal(rev, 'State')
-            basePaths = rev.getElementsByTagName('BasePath')
-
-            if len(basePaths) > 0:
-                basePath = getElementText(basePaths[0])
-            else:
-                basePath = 'unknown'
-
-            # svrs = rev.getElementsByTagName('Server')
-            status = {
-                'environment': envName,
-                'revision': revNum,
-                'basePath': basePath,
-                'state': state,
-            }
-
-            if error != None:
-                status['error'] = error
-
-            ret.append(status)
-
-    return ret
-
-
-def printDeployments(dep, check_revision=None):
-    if check_revision:
-        revisions = [d['revision'] for d in dep]
-        if check_revision not in revisions:
-            sys.exit('Error: proxy version %i not found' % check_revision)
-        console.echo('Proxy version %i found' % check_revision)
-    for d in dep:
-        console.echo('Environment: %s' % d['environment'])
-        console.echo('  Revision: %i BasePath = %s' % (d['revision'], d['basePath']))
-        console.echo('  State: %s' % d['state'])
-        if d['state'] == 'missing':
-            console.echo('Missing deployment. Attempting deletion...')
-            try:
-                Apis(Auth, Organization).undeploy_api_proxy_revision(
-                    Name, d['environment'], d['revision']
-                )
-                console.echo(
-                    Apis(Auth, Organization).delete_api_proxy_revision(Name, d['revision']).text
-                )
-            except HTTPError as e:
-                if e.response.status_code != 400:
-                    raise e
-        elif d['state'] != 'deployed':
-            sys.exit(1)
-        if 'error' in d:
-            console.echo('  Error: %s' % d['error'])
-
-
-def deploy(args):
-    global UserPW
-    global Directory
-    global Organization
-    global Environment
-    global Name
-    global ShouldDeploy
-    global ShouldOverride
-    global Auth
-
-    # ApigeeHost = 'https://api.enterprise.apigee.com'
-    UserPW = args.username + ':' + args.password
-    Directory = args.directory
-    Organization = args.org
-    Environment = args.environment
-    Name = args.name
-    # BasePath = '/'
-    ShouldDeploy = not args.import_only
-    ShouldOverride = args.seamless_deploy
-    # GracePeriod = 15
-    # AccessToken = mfa_with_pyotp.get_access_token(args)
-    Auth = Struct(
-        username=args.username,
-        password=args.password,
-        mfa_secret=args.mfa_secret,
-        token=args.token,
-        zonename=args.zonename,
-    )
-
-    # if UserPW == None or \
-    #         (Directory == None and ZipFile == None) or \
-    #         Environment == None or \
-    #         Name == None or \
-    #         Organization == None:
-    #     print """Usage: deploy -n [name] (-d [directory name] | -z [zipfile])
-    #               -e [environment] -u [username:password] -o [organization]
-    #               [-p [base path] -h [apigee API url] -i]
-    #     base path defaults to "/"
-    #     Apigee URL defaults to "https://api.enterprise.apigee.com"
-    #     -i denotes to import only and not actually deploy
-    #     """
-    #     sys.exit(1)
-
-    # url = urlparse.urlparse(ApigeeHost)
-    # httpScheme = url[0]
-    # httpHost = url[1]
-    #
-    # body = None
-
-    if Directory != None:
-        # Construct a ZIPped copy of the bundle in memory
-        tf = io.BytesIO()
-        zipout = zipfile.ZipFile(tf, 'w')
-
-        dirList = os.walk(Directory)
-        for dirEntry in dirList:
-            if not pathContainsDot(dirEntry[0]):
-                for fileEntry in dirEntry[2]:
-                    if not fileEntry.endswith('~'):
-                        fn = os.path.join(dirEntry[0], fileEntry)
-                        en = os.path.join(os.path.relpath(dirEntry[0], Directory), fileEntry)
-                        console.echo('Writing %s to %s' % (fn, en))
-                        zipout.write(fn, en)
-
-        zipout.close()
-        body = tf.getvalue()
-    elif ZipFile != None:
-        f = open(ZipFile, 'r')
-        body = f.read()
-        f.close()
-
-    # Upload the bundle to the API
-    hdrs = {'Content-Type': 'application/octet-stream', 'Accept': 'application/json'}
-    uri = '/v1/organizations/%s/apis?action=import&name=%s' % (Organization, Name)
-    resp = httpCall('POST', uri, hdrs, body)
-
-    if resp.status != 200 and resp.status != 201:
-        console.echo(
-            'Import failed to %s with status %i:\n%s' % (uri, resp.status, resp.read().decode())
-        )
-        sys.exit(2)
-
-    deployment = json.loads(resp.read().decode())
-    revision = int(deployment['revision'])
-
-    console.echo('Imported new proxy version %i' % revision)
-
-    if ShouldDeploy and not ShouldOverride:
-        # Undeploy duplicates
-        deps = getDeployments()
-        for d in deps:
+from apigee.bundler import BundleBuilder
+from apigee.deployments.deployments import DeploymentWaiter
+from apigee.exceptions import DeploymentError
+from apigee.tracing import tracer
+from apigee.types import Struct
+from apigee.utils import make_dirs, run_func_on_iterable_concurrently
+
+_deployments_cache_lock = threading.Lock()
+
+
+def read_deployments_cache():
+    try:
+        with open(APIGEE_CLI_DEPLOYMENTS_CACHE_FILE, 'r') as f:
+            return json.loads(f.read())
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def update_deployments_cache(key, value):
+    with _deployments_cache_lock:
+        cache = read_deployments_cache()
+        cache[key] = value
+        make_dirs(APIGEE_CLI_DIRECTORY)
+        tmp_file = f'{APIGEE_CLI_DEPLOYMENTS_CACHE_FILE}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps(cache, indent=2))
+        os.replace(tmp_file, APIGEE_CLI_DEPLOYMENTS_CACHE_FILE)
+
+
+def gen_deployments_cache_key(org_name, environment, name, kind='apis'):
+    # the same org can exist behind several Management API URLs
+    return f'{APIGEE_ADMIN_API_URL}/{org_name}/{environment}/{kind}/{name}'
+
+
+class Deployer:
+    """Imports and deploys a single API proxy bundle.
+
+    All state lives on the instance and every call goes through the shared
+    pooled session, so several deployers can run side by side in one process
+    (see :func:`deploy_concurrently`).
+    """
+
+    def __init__(
+        self, auth, org_name, api_name, environment, base_path='/', grace_period=15, timeout=300
+    ):
+        self._auth = auth
+        self._org_name = org_name
+        self._api_name = api_name
+        self._environment = environment
+        self._base_path = base_path
+        self._grace_period = grace_period
+        self._timeout = timeout
+
+    def __call__(self, *args, **kwargs):
+        return self.deploy(*args, **kwargs)
+
+    @property
+    def auth(self):
+        return self._auth
+
+    @auth.setter
+    def auth(self, value):
+        self._auth = value
+
+    @property
+    def org_name(self):
+        return self._org_name
+
+    @org_name.setter
+    def org_name(self, value):
+        self._org_name = value
+
+    @property
+    def api_name(self):
+        return self._api_name
+
+    @api_name.setter
+    def api_name(self, value):
+        self._api_name = value
+
+    @property
+    def environment(self):
+        return self._environment
+
+    @environment.setter
+    def environment(self, value):
+        self._environment = value
+
+    @tracer.traced('import')
+    def import_bundle(self, bundle):
+        try:
+            resp = Apis(self._auth, self._org_name).import_api_proxy(self._api_name, bundle)
+        except HTTPError as e:
+            raise DeploymentError(
+                'Import failed to %s with status %i:\n%s'
+                % (e.request.url, e.response.status_code, e.response.text),
+                status=2,
+            )
+        revision = int(resp.json()['revision'])
+        console.echo('Imported new proxy version %i' % revision)
+        return revision
+
+    def get_deployments(self):
+        return DeploymentWaiter(self._auth, self._org_name).get_deployments(self._api_name)
+
+    @tracer.traced('wait')
+    def wait_for_revision(self, revision):
+        """Wait until the revision is deployed to the environment and return the
+        deployments of the API proxy."""
+        return DeploymentWaiter(self._auth, self._org_name, timeout=self._timeout).wait(
+            [(self._api_name, self._environment, revision)]
+        )[self._api_name]
+
+    @tracer.traced('undeploy duplicates')
+    def undeploy_duplicates(self, revision):
+        for d in self.get_deployments() or []:
             if (
-                d['environment'] == Environment
-                and d['basePath'] == BasePath
+                d['environment'] == self._environment
+                and d['basePath'] == self._base_path
                 and d['revision'] != revision
             ):
                 console.echo(
                     'Undeploying revision %i in same environment and path:' % d['revision']
                 )
-                conn = http.client.HTTPSConnection(httpHost)
-                resp = httpCall(
-                    'POST',
-                    (
-                        '/v1/organizations/%s/apis/%s/deployments'
-                        + '?action=undeploy'
-                        + '&env=%s'
-                        + '&revision=%i'
+                try:
+                    Apis(self._auth, self._org_name).undeploy_api_proxy_revision(
+                        self._api_name, self._environment, d['revision']
                     )
-                    % (Organization, Name, Environment, d['revision']),
-                    None,
-                    None,
-                )
-                if resp.status != 200 and resp.status != 204:
+                except HTTPError as e:
                     console.echo(
-                        'Error %i on undeployment:\n%s' % (resp.status, resp.read().decode())
+                        'Error %i on undeployment:\n%s'
+                        % (e.response.status_code, e.response.text)
                     )
 
-        # Deploy the bundle
-        hdrs = {'Accept': 'application/json'}
-        resp = httpCall(
-            'POST',
-            (
-                '/v1/organizations/%s/apis/%s/deployments'
-                + '?action=deploy'
-                + '&env=%s'
-                + '&revision=%i'
-                + '&basepath=%s'
-            )
-            % (Organization, Name, Environment, revision, BasePath),
-            hdrs,
-            None,
-        )
-
-        if resp.status != 200 and resp.status != 201:
-            console.echo('Deploy failed with status %i:\n%s' % (resp.status, resp.read().decode()))
-            sys.exit(2)
-
-    if ShouldOverride:
-        # Seamless Deploy the bundle
-        console.echo('Seamless deploy %s' % Name)
-        hdrs = {'Content-Type': 'application/x-www-form-urlencoded'}
-        resp = httpCall(
-            'POST',
-            (
-                '/v1/organizations/%s/environments/%s/apis/%s/revisions/%s/deployments'
-                + '?override=true'
-                + '&delay=%s'
+    @tracer.traced('deploy')
+    def deploy_revision(self, revision, seamless_deploy=False):
+        try:
+            if seamless_deploy:
+                console.echo('Seamless deploy %s' % self._api_name)
+                Apis(self._auth, self._org_name).deploy_api_proxy_revision(
+                    self._api_name,
+                    self._environment,
+                    revision,
+                    delay=self._grace_period,
+                    override=True,
+                )
+            else:
+                Apis(self._auth, self._org_name).deploy_api_proxy_revision_to_base_path(
+                    self._api_name, self._environment, revision, base_path=self._base_path
+                )
+        except HTTPError as e:
+            raise DeploymentError(
+                'Deploy failed with status %i:\n%s' % (e.response.status_code, e.response.text),
+                status=2,
             )
-            % (Organization, Environment, Name, revision, GracePeriod),
-            hdrs,
-            None,
-        )
-
-        if resp.status != 200 and resp.status != 201:
-            console.echo('Deploy failed with status %i:\n%s' % (resp.status, resp.read().decode()))
-            sys.exit(2)
-
-    deps = getDeployments()
-    # printDeployments(deps, check_revision=revision)
-    if ShouldDeploy and not ShouldOverride:
-        printDeployments(deps)
-    if ShouldOverride:
-        printDeployments(deps, check_revision=revision)
 
+    def print_deployments(self, deployments, check_revision=None):
+        if check_revision:
+            revisions = [d['revision'] for d in deployments]
+            if check_revision not in revisions:
+                raise DeploymentError('Error: proxy version %i not found' % check_revision)
+            console.echo('Proxy version %i found' % check_revision)
+        for d in deployments:
+            console.echo('Environment: %s' % d['environment'])
+            console.echo('  Revision: %i BasePath = %s' % (d['revision'], d['basePath']))
+            console.echo('  State: %s' % d['state'])
+            if d['state'] == 'missing':
+                console.echo('Missing deployment. Attempting deletion...')
+                try:
+                    Apis(self._auth, self._org_name).undeploy_api_proxy_revision(
+                        self._api_name, d['environment'], d['revision']
+                    )
+                    console.echo(
+                        Apis(self._auth, self._org_name)
+                        .delete_api_proxy_revision(self._api_name, d['revision'])
+                        .text
+                    )
+                except HTTPError as e:
+                    if e.response.status_code != 400:
+                        raise e
+            if 'error' in d:
+                console.echo('  Error: %s' % d['error'])
+
+    @property
+    def _deployments_cache_key(self):
+        return gen_deployments_cache_key(self._org_name, self._environment, self._api_name)
+
+    def get_unchanged_revision(self, bundle_hash):
+        """Return the revision deployed from an identical bundle, if it is
+        still deployed to the environment."""
+        cached = read_deployments_cache().get(self._deployments_cache_key)
+        if not cached or cached.get('hash') != bundle_hash:
+            return None
+        for d in self.get_deployments() or []:
+            if (
+                d['environment'] == self._environment
+                and d['revision'] == cached['revision']
+                and d['state'] == 'deployed'
+            ):
+                return cached['revision']
+        return None
 
-def main():
-    pass
+    @tracer.traced('release')
+    def release(self, revision, bundle_hash=None, seamless_deploy=False):
+        """Deploy an already imported revision to the environment."""
+        if not seamless_deploy:
+            self.undeploy_duplicates(revision)
+        self.deploy_revision(revision, seamless_deploy=seamless_deploy)
+        # other revisions may still be undeploying, only this one has to be ready
+        deployments = self.wait_for_revision(revision)
+        if seamless_deploy:
+            self.print_deployments(deployments, check_revision=revision)
+        else:
+            self.print_deployments(deployments)
+        if bundle_hash:
+            update_deployments_cache(
+                self._deployments_cache_key, {'hash': bundle_hash, 'revision': revision}
+            )
+        return revision
+
+    @tracer.traced('deploy bundle')
+    def deploy(self, directory, import_only=False, seamless_deploy=False, force=False):
+        builder = BundleBuilder(directory)
+        if import_only:
+            # nothing is released, so neither the tree hash nor the cache is needed
+            with tempfile.SpooledTemporaryFile() as bundle:
+                with tracer.span('build'):
+                    builder.write(bundle)
+                bundle.seek(0)
+                return self.import_bundle(bundle)
+        bundle_hash = builder.tree_hash
+        if not force:
+            revision = self.get_unchanged_revision(bundle_hash)
+            if revision:
+                console.echo(
+                    'Bundle unchanged, proxy version %i is already deployed to %s'
+                    % (revision, self._environment)
+                )
+                return revision
+        with tracer.span('build'):
+            bundle_file = builder.build()
+        with open(bundle_file, 'rb') as bundle:
+            revision = self.import_bundle(bundle)
+        return self.release(revision, bundle_hash=bundle_hash, seamless_deploy=seamless_deploy)
+
+
+def deploy_concurrently(deployments, max_workers=None):
+    """Run several deployments in one process.
+
+    :param deployments: iterable of ``(Deployer, dict)`` pairs, the dict holding
+        the keyword arguments for :meth:`Deployer.deploy`
+    """
+    return run_func_on_iterable_concurrently(
+        deployments, lambda d: d[0].deploy(**d[1]), max_workers=max_workers
+    )
 
 
-if __name__ == '__main__':
-    main()
+def deploy(args):
+    try:
+        return Deployer(
+            Struct(
+                username=args.username,
+                password=args.password,
+                mfa_secret=args.mfa_secret,
+                token=args.token,
+                zonename=args.zonename,
+            ),
+            args.org,
+            args.name,
+            args.environment,
+        ).deploy(
+            args.directory,
+            import_only=args.import_only,
+            seamless_deploy=args.seamless_deploy,
+            force=getattr(args, 'force', False),
+        )
+    except DeploymentError as e:
+        console.echo(e, status=e.status)
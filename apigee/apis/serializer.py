@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class ApisSerializer:
-    def serialize_details(self, apis, format, prefix=None):
+    def serialize_details(self, apis, format, prefix=None, fields=None):
         resp = apis
         if format == 'text':
             return apis.text
@@ -10,7 +10,9 @@ class ApisSerializer:
         if prefix:
             apis = [api for api in apis if api.startswith(prefix)]
         if format == 'json':
-            return json.dumps(apis)
+            return serialize_json(apis, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(apis, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
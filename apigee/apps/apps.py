@@ -1,13 +1,17 @@
 import json
 import random
 import string
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-import requests
 from requests.exceptions import HTTPError
 from tqdm import tqdm
 
-from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee import APIGEE_ADMIN_API_URL, APIGEE_CLI_MAX_WORKERS, auth, console
 from apigee.apps.serializer import AppsSerializer
+from apigee.developers.developers import Developers
+from apigee.pagination import filter_prefix, paginate, paginate_partitioned
+from apigee.session import session
 
 CREATE_DEVELOPER_APP_PATH = '{api_url}/v1/organizations/{org}/developers/{developer}/apps'
 DELETE_DEVELOPER_APP_PATH = '{api_url}/v1/organizations/{org}/developers/{developer}/apps/{name}'
@@ -16,6 +20,7 @@ GET_DEVELOPER_APP_DETAILS_PATH = (
     '{api_url}/v1/organizations/{org}/developers/{developer}/apps/{name}'
 )
 LIST_DEVELOPER_APPS_PATH = '{api_url}/v1/organizations/{org}/developers/{developer}/apps'
+LIST_APPS_PATH = '{api_url}/v1/organizations/{org}/apps?expand={expand}&includeCred={include_cred}&rows={rows}&startKey={startkey}'
 DELETE_KEY_FOR_A_DEVELOPER_APP_PATH = (
     '{api_url}/v1/organizations/{org}/developers/{developer}/apps/{name}/keys/{consumer_key}'
 )
@@ -68,7 +73,7 @@ class Apps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -80,7 +85,7 @@ class Apps:
             name=self._app_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -103,7 +108,7 @@ class Apps:
         if not callback_url:
             del body['callbackUrl']
         # body = {k: v for k, v in body.items() if v}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         self.delete_key_for_a_developer_app(developer, resp.json()['credentials'][0]['consumerKey'])
         return self.get_developer_app_details(developer)
@@ -116,12 +121,19 @@ class Apps:
             name=self._app_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
     def list_developer_apps(
-        self, developer, prefix=None, expand=False, count=1000, startkey="", format='json'
+        self,
+        developer,
+        prefix=None,
+        expand=False,
+        count=1000,
+        startkey="",
+        format='json',
+        fields=None,
     ):
         uri = LIST_DEVELOPER_APPS_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, developer=developer
@@ -131,9 +143,105 @@ class Apps:
         else:
             uri += f'?count={count}&startKey={startkey}'
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
+        resp.raise_for_status()
+        return AppsSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
+
+    def paginate_developer_apps(
+        self, developer, prefix=None, expand=False, count=100, startkey='', partitioned=False
+    ):
+        """Yield every app name of a developer, requesting further pages as
+        needed. With ``partitioned``, ranges of names are listed concurrently.
+        With ``expand``, the apps come from a single request, since the
+        Management API does not paginate expanded app listings."""
+        if expand:
+            apps = self.list_developer_apps(developer, expand=True, format='dict')['app']
+            return filter_prefix(apps, prefix=prefix, key=lambda app: app['name'])
+
+        def _fetch_page(startkey, count):
+            return self.list_developer_apps(
+                developer, count=count, startkey=startkey, format='dict'
+            )
+
+        paginator = paginate_partitioned if partitioned else paginate
+        return filter_prefix(paginator(_fetch_page, count=count, startkey=startkey), prefix=prefix)
+
+    def list_apps(
+        self,
+        expand=False,
+        include_credentials=False,
+        rows=1000,
+        startkey='',
+        format='json',
+        fields=None,
+    ):
+        uri = LIST_APPS_PATH.format(
+            api_url=APIGEE_ADMIN_API_URL,
+            org=self._org_name,
+            expand=str(expand).lower(),
+            include_cred=str(include_credentials).lower(),
+            rows=rows,
+            startkey=startkey,
+        )
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return AppsSerializer().serialize_details(resp, format, prefix=prefix)
+        return AppsSerializer().serialize_details(resp, format, fields=fields)
+
+    def paginate_apps(
+        self, expand=False, include_credentials=False, rows=1000, startkey='', partitioned=False
+    ):
+        """Yield every app ID of the organization, or every app when ``expand``
+        is set, requesting further pages as needed. App IDs are UUIDs, so with
+        ``partitioned`` one range per leading hex digit is listed concurrently."""
+
+        def _fetch_page(startkey, rows):
+            page = self.list_apps(
+                expand=expand,
+                include_credentials=include_credentials,
+                rows=rows,
+                startkey=startkey,
+                format='dict',
+            )
+            return page['app'] if expand else page
+
+        key = (lambda app: app['appId']) if expand else None
+        paginator = (
+            partial(paginate_partitioned, boundaries=string.hexdigits.lower())
+            if partitioned
+            else paginate
+        )
+        return paginator(_fetch_page, count=rows, startkey=startkey, key=key)
+
+    def _list_apps_for_all_developers_by_org(
+        self, list_of_developers, prefix=None, expand=False, developers=None, partitioned=False
+    ):
+        """Group the organization-wide app listing by developer email, which
+        takes one request per 1,000 apps instead of one per developer.
+
+        ``developers`` are the expanded developers of the organization, listed
+        here (one more request per 1,000 developers) when not given.
+        ``partitioned`` lists ranges of app IDs concurrently, which relies on
+        the server sorting apps by ID.
+        """
+        org_apps = self.paginate_apps(
+            expand=True, include_credentials=expand, partitioned=partitioned
+        )
+        if developers is None:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                developers = executor.submit(
+                    list,
+                    Developers(self._auth, self._org_name, None).paginate_developers(expand=True),
+                )
+                org_apps = executor.submit(list, org_apps)
+                developers, org_apps = developers.result(), org_apps.result()
+        emails = {d['developerId']: d['email'] for d in developers}
+        apps = {developer: [] for developer in list_of_developers}
+        for app in sorted(org_apps, key=lambda app: app['name']):
+            developer = emails.get(app.get('developerId'))
+            if developer in apps and (not prefix or app['name'].startswith(prefix)):
+                apps[developer].append(app if expand else app['name'])
+        return apps
 
     def list_apps_for_all_developers(
         self,
@@ -144,7 +252,39 @@ class Apps:
         startkey="",
         format='dict',
         progress_bar=False,
+        max_workers=APIGEE_CLI_MAX_WORKERS,
+        developers=None,
+        partitioned=False,
     ):
+        list_of_developers = list(list_of_developers)
+        if format == 'dict':
+            try:
+                return self._list_apps_for_all_developers_by_org(
+                    list_of_developers,
+                    prefix=prefix,
+                    expand=expand,
+                    developers=developers,
+                    partitioned=partitioned,
+                )
+            except HTTPError as e:
+                console.echo(
+                    f'Listing apps per developer, the organization apps listing failed: {e}',
+                    expc_verbosity=1,
+                )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return dict(
+                    zip(
+                        list_of_developers,
+                        executor.map(
+                            lambda developer: list(
+                                self.paginate_developer_apps(
+                                    developer, prefix=prefix, expand=expand
+                                )
+                            ),
+                            list_of_developers,
+                        ),
+                    )
+                )
         apps = {}
         for developer in list_of_developers:
             apps[developer] = self.list_developer_apps(
@@ -166,7 +306,7 @@ class Apps:
             consumer_key=consumer_key,
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -205,7 +345,7 @@ class Apps:
             consumer_key += key_delimiter
             consumer_key += key_suffix
         body = {'consumerKey': consumer_key, 'consumerSecret': consumer_secret}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         if products:
             console.echo(resp.text)
@@ -229,7 +369,7 @@ class Apps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
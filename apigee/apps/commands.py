@@ -5,7 +5,10 @@ from apigee import console
 from apigee.apps.apps import Apps
 from apigee.auth import common_auth_options, gen_auth
 from apigee.cls import OptionEatAll
+from apigee.pagination import MIN_PAGINATION_COUNT
 from apigee.prefix import common_prefix_options
+from apigee.serializer import (NDJSON, common_format_options,
+                               serialize_json, serialize_ndjson)
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -134,11 +137,38 @@ def _list_developer_apps(
     expand=False,
     count=1000,
     startkey="",
+    all_pages=False,
+    partitioned=False,
+    format='json',
+    fields=None,
     **kwargs
 ):
-    return Apps(
-        gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_developer_apps(developer, prefix=prefix, expand=expand, count=count, startkey=startkey)
+    apps = Apps(gen_auth(username, password, mfa_secret, token, zonename), org, None)
+    if all_pages:
+        if count < MIN_PAGINATION_COUNT:
+            raise click.BadParameter(
+                f'must be at least {MIN_PAGINATION_COUNT} with --all', param_hint='--count'
+            )
+        records = apps.paginate_developer_apps(
+            developer,
+            prefix=prefix,
+            expand=expand,
+            count=min(count, 100),
+            startkey=startkey,
+            partitioned=partitioned,
+        )
+        if format == NDJSON:
+            return serialize_ndjson(records, fields)
+        return serialize_json([*records], fields)
+    return apps.list_developer_apps(
+        developer,
+        prefix=prefix,
+        expand=expand,
+        count=count,
+        startkey=startkey,
+        format=format,
+        fields=fields,
+    )
 
 
 @apps.command(
@@ -167,8 +197,20 @@ def _list_developer_apps(
     show_default=True,
     help='To filter the keys that are returned, enter the name of a developer app that the list will start with.',
 )
+@click.option(
+    '--all/--no-all',
+    'all_pages',
+    default=False,
+    help='Follow startkey across pages to list every app of the developer, not just the first page.',
+)
+@click.option(
+    '--partitioned/--no-partitioned',
+    default=False,
+    help='With --all, list ranges of app names (by leading character) concurrently.',
+)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_developer_apps(*args, **kwargs))
+    console.echo_output(_list_developer_apps(*args, **kwargs))
 
 
 # def _list_apps_for_all_developers(
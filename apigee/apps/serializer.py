@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class AppsSerializer:
-    def serialize_details(self, apps, format, prefix=None):
+    def serialize_details(self, apps, format, prefix=None, fields=None):
         resp = apps
         if format == 'text':
             return apps.text
@@ -10,7 +10,9 @@ class AppsSerializer:
         if prefix:
             apps = [app for app in apps if app.startswith(prefix)]
         if format == 'json':
-            return json.dumps(apps)
+            return serialize_json(apps, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(apps, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
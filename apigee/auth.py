@@ -5,6 +5,7 @@ import inspect
 import json
 import os
 import sys
+import threading
 import time
 import urllib.error
 import urllib.parse
@@ -14,10 +15,7 @@ import webbrowser
 import click
 import jwt
 import pyotp
-import requests
-from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
-from requests.packages.urllib3.util.retry import Retry
 
 from apigee import (APIGEE_CLI_ACCESS_TOKEN_FILE, APIGEE_CLI_CREDENTIALS_FILE,
                     APIGEE_CLI_DIRECTORY, APIGEE_CLI_IS_MACHINE_USER,
@@ -26,11 +24,16 @@ from apigee import (APIGEE_CLI_ACCESS_TOKEN_FILE, APIGEE_CLI_CREDENTIALS_FILE,
 from apigee.cls import AliasedGroup
 # from apigee.prefix import common_prefix_options
 from apigee.prefix import auth_with_prefix as with_prefix
+from apigee.prefix import auth_with_prefixes as with_prefixes
+from apigee.session import session
 from apigee.silent import common_silent_options
 from apigee.types import Struct
 from apigee.utils import make_dirs
 from apigee.verbose import common_verbose_options
 
+_access_token_lock = threading.Lock()
+_access_token_cache = {}
+
 
 def _attach_username_option(func, profile):
     username = get_credential(profile, 'username')
@@ -229,22 +232,12 @@ def _gen_auth_error_message(error):
     return error_message
 
 
-def get_access_token(
-    auth, retries=4, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None
-):
+def get_access_token(auth, session=session):
+    # the token request goes through the shared session, so it is retried
+    # like Management API calls and recorded or replayed with them
     oauth_url = APIGEE_OAUTH_URL
     username = auth.username
     password = auth.password
-    retry = Retry(
-        total=retries,
-        read=retries,
-        connect=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session = requests.Session()
-    session.mount('https://', adapter)
     post_headers = {
         'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8',
         'Accept': 'application/json;charset=utf-8',
@@ -280,27 +273,38 @@ def get_credential(section, key):
         return
 
 
+def _is_access_token_valid(access_token, username):
+    if not access_token:
+        return False
+    try:
+        decoded = jwt.decode(access_token, options={"verify_signature": False})
+    except jwt.DecodeError:
+        # e.g. the placeholder of a token replayed from a cassette
+        return False
+    return decoded['exp'] >= int(time.time()) and decoded['email'].lower() == username.lower()
+
+
 def set_header(auth_obj, headers={}):
     if auth_obj.mfa_secret or auth_obj.token or auth_obj.zonename:
-        access_token = ""
-        make_dirs(APIGEE_CLI_DIRECTORY)
-        try:
-            with open(APIGEE_CLI_ACCESS_TOKEN_FILE, 'r') as f:
-                access_token = f.read().strip()
-        except (IOError, OSError) as e:
-            pass
-        finally:
-            if access_token:
-                decoded = jwt.decode(access_token, options={"verify_signature": False})
-                if (
-                    decoded['exp'] < int(time.time())
-                    or decoded['email'].lower() != auth_obj.username.lower()
-                ):
-                    access_token = ""
-        if not access_token:
-            access_token = get_access_token(auth_obj)
-            with open(APIGEE_CLI_ACCESS_TOKEN_FILE, 'w') as f:
-                f.write(access_token)
+        # worker threads share one token; only the first one may refresh it
+        with _access_token_lock:
+            access_token = _access_token_cache.get('access_token', '')
+            if not _is_access_token_valid(access_token, auth_obj.username):
+                access_token = ""
+                make_dirs(APIGEE_CLI_DIRECTORY)
+                try:
+                    with open(APIGEE_CLI_ACCESS_TOKEN_FILE, 'r') as f:
+                        access_token = f.read().strip()
+                except (IOError, OSError) as e:
+                    pass
+                finally:
+                    if not _is_access_token_valid(access_token, auth_obj.username):
+                        access_token = ""
+            if not access_token:
+                access_token = get_access_token(auth_obj)
+                with open(APIGEE_CLI_ACCESS_TOKEN_FILE, 'w') as f:
+                    f.write(access_token)
+            _access_token_cache['access_token'] = access_token
         headers['Authorization'] = f'Bearer {access_token}'
     else:
         headers['Authorization'] = (
@@ -318,6 +322,30 @@ def auth_with_prefix(auth_obj, org, name, file=None, key='name'):
     return with_prefix(auth_obj, org, name)
 
 
+def auth_with_prefixes(auth_obj, org, names=(), files=(), key='name'):
+    names = list(names)
+    for file in files:
+        with open(file) as f:
+            names.append(json.loads(f.read())[key])
+    return with_prefixes(auth_obj, org, names)
+
+
+def _echo_prefix_check(auth_obj, org, names=(), files=(), key='name'):
+    if len(names) + len(files) == 1:
+        return console.echo(
+            auth_with_prefix(
+                auth_obj, org, next(iter(names), None), file=next(iter(files), None), key=key
+            )
+        )
+    authorized, errors = auth_with_prefixes(auth_obj, org, names=names, files=files, key=key)
+    for name in authorized:
+        console.echo(name)
+    for error in errors:
+        console.echo(error)
+    if errors:
+        sys.exit(1)
+
+
 @click.command(
     help='Custom authorization commands. More information on the use cases for these commands are yet to be documented.',
     cls=AliasedGroup,
@@ -336,7 +364,9 @@ def get_access_token_command(
     console.echo(get_access_token(gen_auth(username, password, mfa_secret, token, zonename)))
 
 
-@auth.command(help='check if user (developer) is authorized to access resource with prefix in file')
+@auth.command(
+    help='check if user (developer) is authorized to access resource with prefix in file. Repeat -f to check several files; the authorized names are printed and the command fails if any file is not authorized.'
+)
 @common_auth_options
 @common_verbose_options
 @common_silent_options
@@ -345,28 +375,21 @@ def get_access_token_command(
     '--file',
     type=click.Path(exists=True, dir_okay=False, file_okay=True, resolve_path=False),
     required=True,
+    multiple=True,
 )
 @click.option('-k', '--key', help='name of the attribute/key to check', default='name')
 def file(username, password, mfa_secret, token, zonename, org, profile, file, key, **kwargs):
-    console.echo(
-        auth_with_prefix(
-            gen_auth(username, password, mfa_secret, token, zonename), org, None, file=file, key=key
-        )
+    _echo_prefix_check(
+        gen_auth(username, password, mfa_secret, token, zonename), org, files=file, key=key
     )
 
 
-@auth.command(help='check if user (developer) is authorized to access resource with prefix in name')
+@auth.command(
+    help='check if user (developer) is authorized to access resource with prefix in name. Repeat -n to check several names; the authorized names are printed and the command fails if any name is not authorized.'
+)
 @common_auth_options
 @common_verbose_options
 @common_silent_options
-@click.option('-n', '--name', help='name of the resource to check', required=True)
+@click.option('-n', '--name', help='name of the resource to check', required=True, multiple=True)
 def name(username, password, mfa_secret, token, zonename, org, profile, name, **kwargs):
-    console.echo(
-        auth_with_prefix(
-            gen_auth(username, password, mfa_secret, token, zonename),
-            org,
-            name,
-            file=None,
-            key='name',
-        )
-    )
+    _echo_prefix_check(gen_auth(username, password, mfa_secret, token, zonename), org, names=name)
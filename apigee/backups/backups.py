@@ -13,8 +13,10 @@ from apigee.caches.caches import Caches
 from apigee.developers.developers import Developers
 from apigee.exceptions import InvalidApisError, NotYetImplementedError
 from apigee.keyvaluemaps.keyvaluemaps import Keyvaluemaps
+from apigee.pagination import filter_prefix
 from apigee.permissions.permissions import Permissions
 from apigee.targetservers.targetservers import Targetservers
+from apigee.tracing import tracer
 from apigee.types import APIS, Struct, empty_snapshot
 from apigee.userroles.userroles import Userroles
 from apigee.utils import (extract_zip, resolve_target_directory, touch,
@@ -34,6 +36,7 @@ class Backups:
         fs_write=False,
         apis=APIS,
         environments=['test', 'prod'],
+        from_listings=False,
     ):
         self.auth = auth
         self.org_name = org_name
@@ -47,6 +50,12 @@ class Backups:
         self.snapshot_data = empty_snapshot()
         self.snapshot_size = 0
         self.progress_bar = None
+        # with from_listings, the full objects returned by expanded listings are
+        # written by the download methods instead of the body of one GET per
+        # resource: far fewer requests, but re-serialized listing objects
+        self.from_listings = from_listings
+        self.listing_details = {'developers': {}, 'apiproducts': {}, 'apps': {}}
+        self._developers = None
         self.org_path = Path(self.target_directory) / self.org_name
 
     # def __del__(self):
@@ -90,13 +99,20 @@ class Backups:
             path /= subpath
         return str(path)
 
+    def _list_api_proxies_with_details(self):
+        apis = Apis(self.auth, self.org_name, None)
+        if self.from_listings:
+            for details in apis.list_api_proxies_with_details():
+                if not self.prefix or details['name'].startswith(self.prefix):
+                    yield details
+            return
+        for api in apis.list_api_proxies(prefix=self.prefix, format='dict'):
+            yield apis.get_api_proxy(api).json()
+
     def download_apis_snapshot(self):
-        for api in Apis(self.auth, self.org_name, None).list_api_proxies(
-            prefix=self.prefix, format='dict'
-        ):
-            self.snapshot_data.apis[api] = (
-                Apis(self.auth, self.org_name, None).get_api_proxy(api).json()
-            )
+        for details in self._list_api_proxies_with_details():
+            api = details['name']
+            self.snapshot_data.apis[api] = details
             data = {
                 'snapshot': self.snapshot_data.apis[api],
                 'target_path': self._gen_snapshot_path(subpaths=['apis', f'{api}.json']),
@@ -270,10 +286,27 @@ class Backups:
                 self._progress_callback(desc='Caches')
         return self.snapshot_data.caches
 
+    def _list_developers(self, count=1000):
+        """Return every developer of the organization, expanded. The listing is
+        shared by the developers and apps snapshots."""
+        if self._developers is None:
+            self._developers = list(
+                Developers(self.auth, self.org_name, None).paginate_developers(
+                    expand=True, count=count
+                )
+            )
+        return self._developers
+
     def download_developers_snapshot(self):
-        self.snapshot_data.developers = Developers(self.auth, self.org_name, None).list_developers(
-            prefix=self.prefix, format='dict'
-        )
+        developers = {
+            developer['email']: developer
+            for developer in filter_prefix(
+                self._list_developers(), prefix=self.prefix, key=lambda d: d['email']
+            )
+        }
+        if self.from_listings:
+            self.listing_details['developers'] = developers
+        self.snapshot_data.developers = list(developers)
         data = {
             'snapshot': self.snapshot_data.developers,
             'target_path': self._gen_snapshot_path(subpaths=['developers', 'developers.json']),
@@ -289,15 +322,20 @@ class Backups:
         for developer in self.snapshot_data.developers:
             try:
                 data = {
-                    'snapshot': Developers(self.auth, self.org_name, developer)
-                    .get_developer()
-                    .text,
+                    'snapshot': self.listing_details['developers'].get(developer)
+                    or Developers(self.auth, self.org_name, developer).get_developer().text,
                     'target_path': self._gen_download_path(
                         subpaths=['developers', f'{developer}.json']
                     ),
                     'fs_write': self.fs_write,
+                    'indent': 2,
                 }
-                write_file(data['snapshot'], data['target_path'], fs_write=data['fs_write'])
+                write_file(
+                    data['snapshot'],
+                    data['target_path'],
+                    fs_write=data['fs_write'],
+                    indent=data['indent'],
+                )
             except HTTPError as e:
                 console.echo(
                     f'Ignoring {type(e).__name__} {e.response.status_code} error for Developer ({developer})'
@@ -306,9 +344,15 @@ class Backups:
         return self.snapshot_data.developers
 
     def download_apiproducts_snapshot(self):
-        self.snapshot_data.apiproducts = Apiproducts(
-            self.auth, self.org_name, None
-        ).list_api_products(prefix=self.prefix, format='dict')
+        apiproducts = Apiproducts(self.auth, self.org_name, None).paginate_api_products(
+            prefix=self.prefix, expand=self.from_listings
+        )
+        if self.from_listings:
+            self.listing_details['apiproducts'] = {
+                apiproduct['name']: apiproduct for apiproduct in apiproducts
+            }
+            apiproducts = self.listing_details['apiproducts']
+        self.snapshot_data.apiproducts = list(apiproducts)
         data = {
             'snapshot': self.snapshot_data.apiproducts,
             'target_path': self._gen_snapshot_path(subpaths=['apiproducts', 'apiproducts.json']),
@@ -324,15 +368,20 @@ class Backups:
         for apiproduct in self.snapshot_data.apiproducts:
             try:
                 data = {
-                    'snapshot': Apiproducts(self.auth, self.org_name, apiproduct)
-                    .get_api_product()
-                    .text,
+                    'snapshot': self.listing_details['apiproducts'].get(apiproduct)
+                    or Apiproducts(self.auth, self.org_name, apiproduct).get_api_product().text,
                     'target_path': self._gen_download_path(
                         subpaths=['apiproducts', f'{apiproduct}.json']
                     ),
                     'fs_write': self.fs_write,
+                    'indent': 2,
                 }
-                write_file(data['snapshot'], data['target_path'], fs_write=data['fs_write'])
+                write_file(
+                    data['snapshot'],
+                    data['target_path'],
+                    fs_write=data['fs_write'],
+                    indent=data['indent'],
+                )
             except HTTPError as e:
                 console.echo(
                     f'Ignoring {type(e).__name__} {e.response.status_code} error for API Product ({apiproduct})'
@@ -341,14 +390,25 @@ class Backups:
         return self.snapshot_data.apiproducts
 
     def download_apps_snapshot(self, expand=False, count=1000, startkey=""):
-        self.snapshot_data.apps = Apps(self.auth, self.org_name, None).list_apps_for_all_developers(
-            Developers(self.auth, self.org_name, None).list_developers(
-                prefix=None, expand=expand, count=count, startkey=startkey, format='dict'
-            ),
+        developers = [d for d in self._list_developers(count=count) if d['email'] >= startkey]
+        apps = Apps(self.auth, self.org_name, None).list_apps_for_all_developers(
+            [d['email'] for d in developers],
+            developers=developers,
             prefix=self.prefix,
+            expand=expand or self.from_listings,
             format='dict',
         )
-        self.snapshot_data.apps = {k: v for k, v in self.snapshot_data.apps.items() if v}
+        if expand or self.from_listings:
+            if self.from_listings:
+                self.listing_details['apps'] = {
+                    (developer, app['name']): app
+                    for developer, details in apps.items()
+                    for app in details
+                }
+            apps = {
+                developer: [app['name'] for app in details] for developer, details in apps.items()
+            }
+        self.snapshot_data.apps = {developer: names for developer, names in apps.items() if names}
         for app, details in self.snapshot_data.apps.items():
             data = {
                 'snapshot': details,
@@ -369,15 +429,22 @@ class Backups:
             for app in apps:
                 try:
                     data = {
-                        'snapshot': Apps(self.auth, self.org_name, app)
+                        'snapshot': self.listing_details['apps'].get((developer, app))
+                        or Apps(self.auth, self.org_name, app)
                         .get_developer_app_details(developer)
                         .text,
                         'target_path': self._gen_download_path(
                             subpaths=['apps', developer, f'{app}.json']
                         ),
                         'fs_write': self.fs_write,
+                        'indent': 2,
                     }
-                    write_file(data['snapshot'], data['target_path'], fs_write=data['fs_write'])
+                    write_file(
+                        data['snapshot'],
+                        data['target_path'],
+                        fs_write=data['fs_write'],
+                        indent=data['indent'],
+                    )
                 except HTTPError as e:
                     console.echo(
                         f'Ignoring {type(e).__name__} {e.response.status_code} error for Developer App ({app})'
@@ -481,6 +548,7 @@ class Backups:
                 count += len(self.snapshot_data.__dict__[x])
         return count
 
+    @tracer.traced('get_snapshots')
     def get_snapshots(self):
         for api in self.apis:
             if api in {'apis', 'apps'}:
@@ -489,16 +557,19 @@ class Backups:
                 )
             else:
                 console.echo(f'Retrieving {api} listing... ', end='', flush=True)
-            getattr(self, f'download_{api}_snapshot')()
+            with tracer.span(f'download_{api}_snapshot'):
+                getattr(self, f'download_{api}_snapshot')()
             console.echo('Done')
         self.snapshot_size = self._calculate_snapshot_size()
         return self.snapshot_data
 
+    @tracer.traced('take_snapshot')
     def take_snapshot(self):
         self.get_snapshots()
         console.echo('Generating snapshot files...')
         for api in self.apis:
-            getattr(self, f'download_{api}')()
+            with tracer.span(f'download_{api}'):
+                getattr(self, f'download_{api}')()
         self.progress_bar.close()
         console.echo('Done.')
         return self.snapshot_data
@@ -37,6 +37,7 @@ def _take_snapshot(
     prefix,
     environments,
     apis,
+    from_listings=False,
     **kwargs
 ):
     if not isinstance(apis, set):
@@ -49,6 +50,7 @@ def _take_snapshot(
         fs_write=True,
         apis=apis,
         environments=environments,
+        from_listings=from_listings,
     ).take_snapshot()
 
 
@@ -75,5 +77,10 @@ def _take_snapshot(
 @click.option(
     '-e', '--environments', metavar='LIST', cls=OptionEatAll, default=['test', 'prod'], help=''
 )
+@click.option(
+    '--from-listings/--no-from-listings',
+    default=False,
+    help='write API proxies, developers, API products and apps from expanded listings instead of one GET per resource; much faster, but the files hold the re-serialized listing objects rather than the response body of each GET',
+)
 def take_snapshot(*args, **kwargs):
     _take_snapshot(*args, **kwargs)
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import re
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from apigee import APIGEE_CLI_BUNDLES_DIRECTORY, APIGEE_CLI_MAX_WORKERS, console
+from apigee.utils import make_dirs
+
+# any path component that starts with a "." like '.svn', but not '.' or '..'
+DOT_PATH_COMPONENT = re.compile(r'\.\w+')
+
+# every member gets the same timestamp and permissions so that the same tree
+# always produces a byte-identical archive
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_EXTERNAL_ATTR = 0o100644 << 16
+ZIP_CREATE_SYSTEM = 3
+ZIP_COMPRESSLEVEL = 6
+
+# records of the ZIP format (APPNOTE.TXT 4.3), laid out as zipfile writes them
+ZIP_VERSION = 20
+ZIP_DEFLATED = 8
+ZIP_UTF8_FLAG = 0x800
+ZIP_MAX_SIZE = 0xFFFFFFFF
+ZIP_MAX_MEMBERS = 0xFFFF
+ZIP_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+ZIP_CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+
+BUNDLES_CACHE_SIZE = 64
+
+
+def path_contains_dot(path):
+    return any(DOT_PATH_COMPONENT.match(component) for component in re.split(r'[/\\]', path))
+
+
+def list_bundle_files(directory):
+    """Return ``(file path, archive name)`` pairs for a bundle directory,
+    sorted by archive name."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        if path_contains_dot(dirpath):
+            continue
+        relpath = os.path.relpath(dirpath, directory)
+        for filename in filenames:
+            if not filename.endswith('~'):
+                arcname = Path(relpath, filename).as_posix()
+                files.append((os.path.join(dirpath, filename), arcname))
+    return sorted(files, key=lambda f: f[1])
+
+
+def hash_bundle_directory(directory):
+    """Hash the bundle contents independently of file system order, mtimes and
+    path separators, so identical trees always hash the same."""
+    digest = hashlib.sha256()
+    for path, arcname in list_bundle_files(directory):
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(arcname.encode())
+        digest.update(b'\0%d\0' % len(content))
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def _compress_member(path, arcname, compresslevel):
+    with open(path, 'rb') as f:
+        content = f.read()
+    # zlib releases the GIL while compressing, so members compress in parallel
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    data = compressor.compress(content) + compressor.flush()
+    return arcname, zlib.crc32(content), len(content), data
+
+
+class DeflatedZipWriter:
+    """Writes a ZIP archive of members deflated beforehand, e.g. in worker
+    threads, byte for byte as ``zipfile`` would write the same members to a
+    seekable file. All members share ``date_time`` and ``external_attr``.
+
+    Only what bundles need is supported: archives over 4 GiB or 65,535
+    members, which need ZIP64, raise ValueError.
+    """
+
+    def __init__(self, fileobj, date_time=ZIP_DATE_TIME, external_attr=ZIP_EXTERNAL_ATTR):
+        self._fileobj = fileobj
+        year, month, day, hour, minute, second = date_time
+        self._dosdate = (year - 1980) << 9 | month << 5 | day
+        self._dostime = hour << 11 | minute << 5 | second // 2
+        self._external_attr = external_attr
+        self._central_directory = []
+        self._offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def _write(self, data):
+        self._fileobj.write(data)
+        self._offset += len(data)
+
+    def write_deflated(self, arcname, crc, file_size, data):
+        """Write a member from its raw deflate ``data`` and the CRC-32 and
+        size of its uncompressed content."""
+        if max(file_size, len(data), self._offset) > ZIP_MAX_SIZE:
+            raise ValueError('bundles larger than 4 GiB are not supported')
+        if len(self._central_directory) == ZIP_MAX_MEMBERS:
+            raise ValueError(f'bundles of more than {ZIP_MAX_MEMBERS} files are not supported')
+        try:
+            filename, flags = arcname.encode('ascii'), 0
+        except UnicodeEncodeError:
+            filename, flags = arcname.encode('utf-8'), ZIP_UTF8_FLAG
+        fields = (flags, ZIP_DEFLATED, self._dostime, self._dosdate, crc, len(data), file_size)
+        self._central_directory.append(
+            ZIP_CENTRAL_HEADER.pack(
+                b'PK\001\002',
+                ZIP_VERSION,
+                ZIP_CREATE_SYSTEM,
+                ZIP_VERSION,
+                0,
+                *fields,
+                len(filename),
+                0,
+                0,
+                0,
+                0,
+                self._external_attr,
+                self._offset,
+            )
+            + filename
+        )
+        self._write(ZIP_LOCAL_HEADER.pack(b'PK\003\004', ZIP_VERSION, 0, *fields, len(filename), 0))
+        self._write(filename)
+        self._write(data)
+
+    def close(self):
+        start = self._offset
+        for header in self._central_directory:
+            self._write(header)
+        count = len(self._central_directory)
+        self._write(
+            ZIP_END_RECORD.pack(b'PK\005\006', 0, 0, count, count, self._offset - start, start, 0)
+        )
+
+
+class BundleBuilder:
+    """Builds reproducible ZIP bundles (API proxies, shared flows) from a
+    directory and caches them by the hash of the directory tree."""
+
+    def __init__(
+        self,
+        directory,
+        cache_directory=APIGEE_CLI_BUNDLES_DIRECTORY,
+        max_workers=APIGEE_CLI_MAX_WORKERS,
+        compresslevel=ZIP_COMPRESSLEVEL,
+    ):
+        self.directory = directory
+        self.cache_directory = cache_directory
+        self.max_workers = max_workers
+        self.compresslevel = compresslevel
+        self._tree_hash = None
+
+    @property
+    def tree_hash(self):
+        if not self._tree_hash:
+            self._tree_hash = hash_bundle_directory(self.directory)
+        return self._tree_hash
+
+    @property
+    def bundle_file(self):
+        return str(Path(self.cache_directory) / f'{self.tree_hash}-{self.compresslevel}.zip')
+
+    def write(self, fileobj):
+        files = list_bundle_files(self.directory)
+        with DeflatedZipWriter(fileobj) as zip_file:
+            # members are read and deflated in parallel, then written in order
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                members = executor.map(
+                    lambda f: _compress_member(f[0], f[1], self.compresslevel), files
+                )
+                for arcname, crc, file_size, data in members:
+                    console.echo(f'Writing {arcname}', expc_verbosity=1)
+                    zip_file.write_deflated(arcname, crc, file_size, data)
+        return fileobj
+
+    def build(self):
+        """Return the path of the bundle, building it only if no bundle for
+        the same tree has been cached yet."""
+        bundle_file = self.bundle_file
+        if os.path.exists(bundle_file):
+            console.echo(f'Using cached bundle {bundle_file}', expc_verbosity=1)
+            # prune_cache keeps the most recently used bundles
+            try:
+                os.utime(bundle_file, None)
+            except OSError:
+                pass
+            return bundle_file
+        make_dirs(self.cache_directory)
+        fd, tmp_file = tempfile.mkstemp(dir=self.cache_directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.write(f)
+            os.replace(tmp_file, bundle_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        self.prune_cache()
+        return bundle_file
+
+    def prune_cache(self, keep=BUNDLES_CACHE_SIZE):
+        bundles = sorted(
+            Path(self.cache_directory).glob('*.zip'), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+        for bundle in bundles[keep:]:
+            try:
+                bundle.unlink()
+            except OSError:
+                pass
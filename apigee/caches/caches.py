@@ -1,10 +1,10 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
 from apigee.caches.serializer import CachesSerializer
+from apigee.session import session
 from apigee.utils import read_file
 
 CLEAR_ALL_CACHE_ENTRIES_PATH = (
@@ -70,7 +70,7 @@ class Caches:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.post(uri, headers=hdrs)
+        resp = session.post(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -86,7 +86,7 @@ class Caches:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.post(uri, headers=hdrs)
+        resp = session.post(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -101,7 +101,7 @@ class Caches:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -113,18 +113,18 @@ class Caches:
             name=self._cache_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_caches_in_an_environment(self, environment, prefix=None, format='json'):
+    def list_caches_in_an_environment(self, environment, prefix=None, format='json', fields=None):
         uri = LIST_CACHES_IN_AN_ENVIRONMENT_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return CachesSerializer().serialize_details(resp, format, prefix=prefix)
+        return CachesSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def update_a_cache_in_an_environment(self, environment, request_body):
         uri = UPDATE_A_CACHE_IN_AN_ENVIRONMENT_PATH.format(
@@ -137,7 +137,7 @@ class Caches:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.put(uri, headers=hdrs, json=body)
+        resp = session.put(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -149,7 +149,7 @@ class Caches:
             name=self._cache_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
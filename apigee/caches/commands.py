@@ -4,6 +4,7 @@ from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.caches.caches import Caches
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -123,11 +124,13 @@ def _list_caches_in_an_environment(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Caches(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_caches_in_an_environment(environment, prefix=prefix)
+    ).list_caches_in_an_environment(environment, prefix=prefix, format=format, fields=fields)
 
 
 @caches.command(help='List caches in an environment.')
@@ -136,8 +139,9 @@ def _list_caches_in_an_environment(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_caches_in_an_environment(*args, **kwargs))
+    console.echo_output(_list_caches_in_an_environment(*args, **kwargs))
 
 
 def _update_a_cache_in_an_environment(
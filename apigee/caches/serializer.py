@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class CachesSerializer:
-    def serialize_details(self, caches, format, prefix=None):
+    def serialize_details(self, caches, format, prefix=None, fields=None):
         resp = caches
         if format == 'text':
             return caches.text
@@ -10,7 +10,9 @@ class CachesSerializer:
         if prefix:
             caches = [cache for cache in caches if cache.startswith(prefix)]
         if format == 'json':
-            return json.dumps(caches)
+            return serialize_json(caches, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(caches, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
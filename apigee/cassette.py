@@ -0,0 +1,314 @@
+import base64
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import urllib.parse
+from xml.etree import ElementTree
+
+import click
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from apigee.session import rate_limiter, session
+
+CASSETTE_VERSION = 1
+# values of these JSON keys and XML elements or attributes are replaced in
+# recorded responses, and wherever they appear afterwards, e.g. in the URL of
+# a request for an app key
+SECRET_KEYS = {
+    'access_token',
+    'refresh_token',
+    'id_token',
+    'password',
+    'consumerKey',
+    'consumerSecret',
+    'secret',
+}
+SECRET_XML_NAMES = {key.lower() for key in SECRET_KEYS} | {'value'}
+# lists of name/value pairs, such as KeyValueMap entries and custom
+# attributes, whose values can hold anything and are all replaced
+NAME_VALUE_LISTS = {'entry', 'attributes', 'attribute'}
+# shorter secrets, e.g. attribute values such as 'true', are only replaced
+# where they were found, not wherever else the same text appears
+MIN_REPLACED_SECRET_LENGTH = 8
+# response headers kept in recordings
+RECORDED_HEADERS = {'content-type', 'content-disposition'}
+# query parameters that change every run, such as the one-time MFA code sent
+# with token requests, left out of recorded URLs
+VOLATILE_QUERY_PARAMS = {'mfa_token'}
+
+
+def _strip_volatile_params(url):
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if not any(name in VOLATILE_QUERY_PARAMS for name, _ in query):
+        return url
+    query = [(name, value) for name, value in query if name not in VOLATILE_QUERY_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def _request_key(method, url):
+    # the scheme and host are left out, so a cassette replays against any
+    # Management API URL
+    parts = urllib.parse.urlsplit(_strip_volatile_params(url))
+    return method, urllib.parse.urlunsplit(('', '', parts.path, parts.query, ''))
+
+
+def _is_text(content_type):
+    return any(t in content_type for t in ('json', 'xml', 'text', 'javascript'))
+
+
+class Cassette:
+    """Management API interactions, recorded from the shared session or
+    loaded from a file to be replayed.
+
+    Request headers and bodies are never recorded, only the method, the URL
+    and the size of the body. Secret values in JSON and XML responses are
+    replaced with placeholders derived from their hash, so that replayed
+    requests using them still match. Other text responses, such as resource
+    files, only have the secrets found so far replaced. Cassettes are only
+    readable by their owner.
+    """
+
+    def __init__(self, interactions=None):
+        self._lock = threading.Lock()
+        self._interactions = interactions or []
+        self._secrets = {}
+        self._replay_index = None
+        self._replay_positions = {}
+
+    @property
+    def interactions(self):
+        return self._interactions
+
+    @classmethod
+    def load(cls, file):
+        with open(file, 'r') as f:
+            cassette = json.loads(f.read())
+        return cls(cassette['interactions'])
+
+    def save(self, file):
+        with self._lock:
+            interactions = list(self._interactions)
+        # the file is created private, and made private if it already existed
+        with os.fdopen(os.open(file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            os.chmod(file, 0o600)
+            f.write(
+                json.dumps({'version': CASSETTE_VERSION, 'interactions': interactions}, indent=2)
+            )
+
+    def _gen_placeholder(self, secret):
+        placeholder = f'scrubbed-{hashlib.sha256(secret.encode()).hexdigest()[:16]}'
+        if len(secret) >= MIN_REPLACED_SECRET_LENGTH:
+            self._secrets.setdefault(secret, placeholder)
+        return placeholder
+
+    def _scrub_json(self, data, secret_keys=SECRET_KEYS):
+        if isinstance(data, dict):
+            return {
+                key: (
+                    self._gen_placeholder(value)
+                    if key in secret_keys and isinstance(value, str) and value
+                    else self._scrub_json(
+                        value, SECRET_KEYS | {'value'} if key in NAME_VALUE_LISTS else SECRET_KEYS
+                    )
+                )
+                for key, value in data.items()
+            }
+        elif isinstance(data, list):
+            return [self._scrub_json(item, secret_keys) for item in data]
+        return data
+
+    def _scrub_xml(self, text):
+        root = ElementTree.fromstring(text)
+        for element in root.iter():
+            if element.tag.lower() in SECRET_XML_NAMES and element.text and element.text.strip():
+                element.text = self._gen_placeholder(element.text)
+            for name, value in element.attrib.items():
+                if name.lower() in SECRET_XML_NAMES and value:
+                    element.set(name, self._gen_placeholder(value))
+        return ElementTree.tostring(root, encoding='unicode')
+
+    def _scrub_text(self, text, content_type):
+        # bodies that do not parse only have the secrets found so far replaced
+        try:
+            if 'json' in content_type:
+                text = json.dumps(self._scrub_json(json.loads(text)), indent=2)
+            elif 'xml' in content_type:
+                text = self._scrub_xml(text)
+        except (ValueError, ElementTree.ParseError):
+            pass
+        return self.scrub(text)
+
+    def scrub(self, text):
+        for secret, placeholder in self._secrets.items():
+            text = text.replace(secret, placeholder)
+        return text
+
+    def _scrub_url(self, url):
+        url = self.scrub(_strip_volatile_params(url))
+        for secret, placeholder in self._secrets.items():
+            url = url.replace(urllib.parse.quote(secret, safe=''), placeholder)
+        return url
+
+    def record(self, resp, *args, **kwargs):
+        """Response hook recording an interaction."""
+        content_type = resp.headers.get('Content-Type', '')
+        request_body = resp.request.body or b''
+        with self._lock:
+            response = {
+                'status': resp.status_code,
+                'reason': resp.reason,
+                'headers': {k: v for k, v in resp.headers.items() if k.lower() in RECORDED_HEADERS},
+                'elapsed': resp.elapsed.total_seconds(),
+            }
+            if _is_text(content_type):
+                response['text'] = self._scrub_text(resp.text, content_type)
+            else:
+                response['base64'] = base64.b64encode(resp.content).decode()
+            self._interactions.append(
+                {
+                    'request': {
+                        'method': resp.request.method,
+                        'url': self._scrub_url(resp.request.url),
+                        'body_size': len(request_body),
+                    },
+                    'response': response,
+                }
+            )
+        return resp
+
+    def next_response(self, method, url):
+        """Return the next recorded response to a request. Requests repeated
+        more often than recorded, e.g. when polling, get the last one."""
+        with self._lock:
+            if self._replay_index is None:
+                self._replay_index = {}
+                for interaction in self._interactions:
+                    request = interaction['request']
+                    self._replay_index.setdefault(
+                        _request_key(request['method'], request['url']), []
+                    ).append(interaction['response'])
+            key = _request_key(method, url)
+            matches = self._replay_index.get(key)
+            if not matches:
+                return None
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+            return matches[min(position, len(matches) - 1)]
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Serves the responses of a cassette instead of sending requests.
+
+    ``latency`` is ``'recorded'`` to wait as long as the recorded request
+    took, a number of seconds to wait for every request, or None.
+    """
+
+    def __init__(self, cassette, latency='recorded', rate_limiter=rate_limiter, *args, **kwargs):
+        self.cassette = cassette
+        self.latency = latency
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        wait = self.rate_limiter.acquire()
+        recorded = self.cassette.next_response(request.method, request.url)
+        if recorded is None:
+            raise ConnectionError(
+                f'No recorded response for {request.method} {request.url}', request=request
+            )
+        if self.latency == 'recorded':
+            time.sleep(recorded['elapsed'])
+        elif self.latency:
+            time.sleep(float(self.latency))
+        if 'text' in recorded:
+            content = recorded['text'].encode('utf-8')
+        else:
+            content = base64.b64decode(recorded['base64'])
+        resp = Response()
+        resp.status_code = recorded['status']
+        resp.reason = recorded.get('reason')
+        resp.headers = CaseInsensitiveDict(recorded['headers'])
+        resp.encoding = 'utf-8'
+        resp.raw = io.BytesIO(content)
+        resp._content = content
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.elapsed = datetime.timedelta(seconds=recorded['elapsed'])
+        resp.rate_limit_wait = wait
+        return resp
+
+
+def record(file, session=session):
+    """Record the interactions of the shared session, to be saved to
+    ``file`` with the returned function."""
+    cassette = Cassette()
+    session.hooks['response'].append(cassette.record)
+    return lambda: cassette.save(file)
+
+
+def replay(file, latency='recorded', session=session):
+    adapter = ReplayAdapter(Cassette.load(file), latency=latency)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+
+def replay_latency_callback(ctx, param, value):
+    if value == 'none':
+        value = None
+    elif value != 'recorded':
+        try:
+            value = float(value)
+        except ValueError:
+            raise click.BadParameter('expected recorded, none or a number of seconds')
+    ctx.meta['replay_latency'] = value
+    return value
+
+
+def record_callback(ctx, param, value):
+    if value:
+        ctx.call_on_close(record(value))
+    return value
+
+
+def replay_callback(ctx, param, value):
+    if value:
+        replay(value, latency=ctx.meta.get('replay_latency', 'recorded'))
+    return value
+
+
+def common_cassette_options(func):
+    func = click.option(
+        '--replay',
+        type=click.Path(exists=True, dir_okay=False),
+        default=None,
+        expose_value=False,
+        callback=replay_callback,
+        help='serve Management API responses from a cassette recorded with --record, without network access',
+    )(func)
+    func = click.option(
+        '--replay-latency',
+        default='recorded',
+        show_default=True,
+        is_eager=True,
+        expose_value=False,
+        callback=replay_latency_callback,
+        help='wait of each replayed request: recorded, none or a number of seconds',
+    )(func)
+    return click.option(
+        '--record',
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        expose_value=False,
+        callback=record_callback,
+        help='record the Management API requests and responses of the command, with secrets scrubbed, to a cassette file',
+    )(func)
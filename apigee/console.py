@@ -20,3 +20,12 @@ def echo(
         print(*message, end=end, flush=flush)
     if status:
         sys.exit(status)
+
+
+def echo_output(output, **kwargs):
+    """Echo the output of a command. Iterators, such as NDJSON records, are
+    echoed one line at a time as they are produced."""
+    if not hasattr(output, '__next__'):
+        return echo(output, **kwargs)
+    for line in output:
+        echo(line, flush=True, **kwargs)
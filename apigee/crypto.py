@@ -1,32 +1,104 @@
 import base64
-import sys
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-import gnupg
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+from apigee import APIGEE_CLI_MAX_WORKERS
 
 ENCRYPTED_HEADER_BEGIN = '-----BEGIN ENCRYPTED APIGEE CLI MESSAGE-----'
 ENCRYPTED_HEADER_END = '-----END ENCRYPTED APIGEE CLI MESSAGE-----'
 
+# payload of a message: AEAD_MAGIC, salt, nonce, then the ciphertext and tag
+AEAD_MAGIC = b'ACA1'
+SALT_SIZE = 16
+NONCE_SIZE = 12
+KEY_SIZE = 32
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+PGP_HEADER = '-----BEGIN PGP MESSAGE-----'
+
+
+@lru_cache(maxsize=None)
+def derive_key(secret, salt):
+    """Derive the key for a passphrase and salt with scrypt, once per run."""
+    return hashlib.scrypt(
+        secret.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=KEY_SIZE
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_run_salt():
+    # messages encrypted in the same run share a salt, so the passphrase is
+    # derived once no matter how many values are encrypted
+    return os.urandom(SALT_SIZE)
+
+
+@lru_cache(maxsize=None)
+def _get_gpg():
+    import gnupg
+
+    return gnupg.GPG()
+
 
-def encrypt_message(secret, message, encoded=True):
-    gpg = gnupg.GPG()
-    if encoded:
-        return base64.b64encode(
-            str(
-                gpg.encrypt(message, symmetric='AES256', passphrase=secret, recipients=None)
-            ).encode()
-        ).decode()
-    return str(gpg.encrypt(message, symmetric='AES256', passphrase=secret, recipients=None))
+def encrypt_message(secret, message):
+    """Encrypt a message with ChaCha20-Poly1305 and return it base64 encoded."""
+    salt = _get_run_salt()
+    nonce = os.urandom(NONCE_SIZE)
+    cipher = ChaCha20Poly1305(derive_key(secret, salt))
+    ciphertext = cipher.encrypt(nonce, message.encode(), AEAD_MAGIC)
+    return base64.b64encode(AEAD_MAGIC + salt + nonce + ciphertext).decode()
 
 
 def is_encrypted(message):
     return message.startswith(ENCRYPTED_HEADER_BEGIN) and message.endswith(ENCRYPTED_HEADER_END)
 
 
+def _decrypt_aead_payload(secret, payload):
+    payload = payload[len(AEAD_MAGIC) :]
+    salt, payload = payload[:SALT_SIZE], payload[SALT_SIZE:]
+    nonce, ciphertext = payload[:NONCE_SIZE], payload[NONCE_SIZE:]
+    cipher = ChaCha20Poly1305(derive_key(secret, salt))
+    try:
+        return cipher.decrypt(nonce, ciphertext, AEAD_MAGIC).decode()
+    except InvalidTag:
+        return ''
+
+
 def decrypt_message(secret, message, encoded=True):
-    gpg = gnupg.GPG()
+    """Decrypt a message wrapped in the ENCRYPTED APIGEE CLI MESSAGE header.
+
+    Messages encrypted with GPG by earlier versions are still decrypted with
+    GPG, as are messages that are not base64 ``encoded``. Returns an empty
+    string if the message is not encrypted, is malformed or the secret is
+    wrong."""
     if not is_encrypted(message):
         return ''
     message = message[len(ENCRYPTED_HEADER_BEGIN) : -len(ENCRYPTED_HEADER_END)]
-    if encoded:
-        return str(gpg.decrypt(base64.b64decode(message).decode(), passphrase=secret))
-    return str(gpg.decrypt(message, passphrase=secret))
+    if not encoded or message.lstrip().startswith(PGP_HEADER):
+        return str(_get_gpg().decrypt(message, passphrase=secret))
+    try:
+        payload = base64.b64decode(message)
+        if payload.startswith(AEAD_MAGIC):
+            return _decrypt_aead_payload(secret, payload)
+        message = payload.decode()
+    except ValueError:
+        # invalid base64, a truncated payload or a legacy payload that is not text
+        return ''
+    return str(_get_gpg().decrypt(message, passphrase=secret))
+
+
+def encrypt_messages(secret, messages):
+    return [encrypt_message(secret, message) for message in messages]
+
+
+def decrypt_messages(secret, messages, max_workers=APIGEE_CLI_MAX_WORKERS):
+    """Decrypt a batch of messages. Legacy GPG messages each spawn a ``gpg``
+    process, so they are decrypted concurrently."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda message: decrypt_message(secret, message), messages))
@@ -3,7 +3,12 @@ from click_aliases import ClickAliasedGroup
 
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
-from apigee.deployments.deployments import Deployments
+from apigee.deployments.deployments import (DeploymentsMatrix,
+                                            DeploymentWaiter, Deployments)
+from apigee.deployments.serializer import DeploymentsSerializer
+from apigee.exceptions import DeploymentError
+from apigee.prefix import common_prefix_options
+from apigee.serializer import NDJSON
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -77,7 +82,7 @@ def _get_api_proxy_deployment_details(
     '--format',
     help='defines how to format output when using the -r flag',
     default='table',
-    type=click.Choice(['json', 'table'], case_sensitive=False),
+    type=click.Choice(['json', NDJSON, 'table'], case_sensitive=False),
 )
 @click.option('--showindex/--no-showindex', default=False)
 @click.option(
@@ -89,4 +94,120 @@ def _get_api_proxy_deployment_details(
 )
 @click.option('--revision-name-only/--no-revision-name-only', '-r/-R', default=False)
 def get(*args, **kwargs):
-    console.echo(_get_api_proxy_deployment_details(*args, **kwargs))
+    console.echo_output(_get_api_proxy_deployment_details(*args, **kwargs))
+
+
+def _wait_for_deployments(
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    name,
+    environment,
+    revision_number=None,
+    timeout=300,
+    **kwargs
+):
+    waiter = DeploymentWaiter(
+        gen_auth(username, password, mfa_secret, token, zonename), org, timeout=timeout
+    )
+    try:
+        waiter.wait([(n, e, revision_number) for n in name for e in environment])
+    except DeploymentError as e:
+        console.echo(e, status=e.status)
+    for (n, e, r), transitions in sorted(waiter.transitions.items(), key=str):
+        console.echo(f'{n} revision {r or "*"} in {e}: deployed after {transitions[-1][0]}s')
+
+
+@deployments.command(
+    help='Waits until API proxies are deployed to environments, polling their deployments with exponential backoff.'
+)
+@common_auth_options
+@common_silent_options
+@common_verbose_options
+@click.option('-n', '--name', help='name', required=True, multiple=True)
+@click.option('-e', '--environment', help='environment', required=True, multiple=True)
+@click.option(
+    '-r',
+    '--revision-number',
+    type=click.INT,
+    default=None,
+    help='revision number (defaults to every revision deployed to the environment)',
+)
+@click.option(
+    '--timeout',
+    type=click.INT,
+    default=300,
+    show_default=True,
+    help='seconds to wait before giving up',
+)
+def wait(*args, **kwargs):
+    _wait_for_deployments(*args, **kwargs)
+
+
+def _get_deployments_matrix(
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    environment=(),
+    sharedflows=True,
+    prefix=None,
+    format='table',
+    showindex=False,
+    tablefmt='plain',
+    **kwargs
+):
+    matrix = DeploymentsMatrix(
+        gen_auth(username, password, mfa_secret, token, zonename),
+        org,
+        environments=list(environment) or None,
+        sharedflows=sharedflows,
+    ).get_matrix()
+    if prefix:
+        matrix = [row for row in matrix if row['name'].startswith(prefix)]
+    return DeploymentsSerializer().serialize_matrix(
+        matrix, format, showindex=showindex, tablefmt=tablefmt
+    )
+
+
+@deployments.command(
+    help='Shows which revision of every API proxy and shared flow is deployed to each environment, with one request per environment.'
+)
+@common_auth_options
+@common_silent_options
+@common_verbose_options
+@common_prefix_options
+@click.option(
+    '-e',
+    '--environment',
+    help='environment (defaults to all environments)',
+    multiple=True,
+)
+@click.option(
+    '--sharedflows/--no-sharedflows',
+    default=True,
+    show_default=True,
+    help='include shared flow deployments',
+)
+@click.option(
+    '--format',
+    default='table',
+    type=click.Choice(['json', NDJSON, 'table'], case_sensitive=False),
+)
+@click.option('--showindex/--no-showindex', default=False)
+@click.option(
+    '--tablefmt',
+    help='defines how the table is formatted',
+    type=click.Choice(TABLEFMT_CHOICES, case_sensitive=False),
+    default='plain',
+    show_default=True,
+)
+def matrix(*args, **kwargs):
+    console.echo_output(_get_deployments_matrix(*args, **kwargs))
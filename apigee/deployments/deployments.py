@@ -1,14 +1,44 @@
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
+from requests.exceptions import HTTPError
 from tabulate import tabulate
 
-from apigee import APIGEE_ADMIN_API_URL, auth
+from apigee import APIGEE_ADMIN_API_URL, APIGEE_CLI_MAX_WORKERS, auth, console
 from apigee.deployments.serializer import DeploymentsSerializer
+from apigee.exceptions import DeploymentError
+from apigee.session import session
+from apigee.sharedflows.sharedflows import Sharedflows
 
 GET_API_PROXY_DEPLOYMENT_DETAILS_PATH = (
     '{api_url}/v1/organizations/{org}/apis/{api_name}/deployments'
 )
+GET_ENVIRONMENTS_PATH = '{api_url}/v1/organizations/{org}/environments'
+GET_ENVIRONMENT_DEPLOYMENTS_PATH = (
+    '{api_url}/v1/organizations/{org}/environments/{environment}/deployments'
+)
+
+DEPLOYED_STATE = 'deployed'
+FAILED_STATES = {'error'}
+
+
+def flatten_api_proxy_deployment_details(details):
+    """Turn the JSON deployment details of an API proxy into one dict per
+    deployed revision and environment."""
+    deployments = []
+    for environment in details.get('environment', []):
+        for revision in environment.get('revision', []):
+            deployments.append(
+                {
+                    'environment': environment['name'],
+                    'revision': int(revision['name']),
+                    'basePath': revision.get('configuration', {}).get('basePath', 'unknown'),
+                    'state': revision.get('state'),
+                }
+            )
+    return deployments
 
 
 class Deployments:
@@ -56,7 +86,7 @@ class Deployments:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, api_name=self._api_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         if formatted:
             if revision_name_only:
@@ -65,3 +95,258 @@ class Deployments:
                 )
             return DeploymentsSerializer().serialize_details(resp, 'text')
         return resp
+
+
+class DeploymentsMatrix:
+    """What is deployed where, for every API proxy and shared flow in an
+    organization.
+
+    The matrix costs one request per environment (two with shared flows)
+    instead of one per proxy, and is cached per organization and environments
+    for the rest of the run; use :meth:`refresh` after deploying.
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        auth,
+        org_name,
+        environments=None,
+        sharedflows=True,
+        max_workers=APIGEE_CLI_MAX_WORKERS,
+    ):
+        self._auth = auth
+        self._org_name = org_name
+        self._environments = environments
+        self._sharedflows = sharedflows
+        self._max_workers = max_workers
+
+    @property
+    def auth(self):
+        return self._auth
+
+    @auth.setter
+    def auth(self, value):
+        self._auth = value
+
+    @property
+    def org_name(self):
+        return self._org_name
+
+    @org_name.setter
+    def org_name(self, value):
+        self._org_name = value
+
+    @property
+    def environments(self):
+        if self._environments is None:
+            self._environments = self.list_environments().json()
+        return self._environments
+
+    def list_environments(self):
+        uri = GET_ENVIRONMENTS_PATH.format(api_url=APIGEE_ADMIN_API_URL, org=self._org_name)
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        resp = session.get(uri, headers=hdrs)
+        resp.raise_for_status()
+        return resp
+
+    def get_environment_deployments(self, environment, sharedflows=False):
+        uri = GET_ENVIRONMENT_DEPLOYMENTS_PATH.format(
+            api_url=APIGEE_ADMIN_API_URL, org=self._org_name, environment=environment
+        )
+        hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
+        params = {'sharedFlows': 'true'} if sharedflows else {}
+        resp = session.get(uri, headers=hdrs, params=params)
+        resp.raise_for_status()
+        return resp
+
+    def _get_rows(self, environment, sharedflows):
+        rows = []
+        details = self.get_environment_deployments(environment, sharedflows=sharedflows).json()
+        # shared flows are listed under the same key as API proxies
+        for deployment in details.get('aPIProxy', []):
+            for revision in deployment.get('revision', []):
+                rows.append(
+                    {
+                        'type': 'sharedflow' if sharedflows else 'api',
+                        'name': deployment['name'],
+                        'environment': environment,
+                        'revision': int(revision['name']),
+                        'basePath': revision.get('configuration', {}).get('basePath', ''),
+                        'state': revision.get('state'),
+                    }
+                )
+        return rows
+
+    @property
+    def _cache_key(self):
+        return (self._org_name, tuple(self.environments), self._sharedflows)
+
+    def get_matrix(self):
+        """Return one dict per deployed revision, with its type, name,
+        environment, revision, base path and state."""
+        key = self._cache_key
+        with DeploymentsMatrix._cache_lock:
+            if key in DeploymentsMatrix._cache:
+                return DeploymentsMatrix._cache[key]
+        calls = [(environment, False) for environment in self.environments]
+        if self._sharedflows:
+            calls += [(environment, True) for environment in self.environments]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            results = executor.map(lambda call: self._get_rows(*call), calls)
+            matrix = [row for rows in results for row in rows]
+        matrix.sort(key=lambda r: (r['type'], r['name'], r['environment'], r['revision']))
+        with DeploymentsMatrix._cache_lock:
+            DeploymentsMatrix._cache[key] = matrix
+        return matrix
+
+    def refresh(self):
+        with DeploymentsMatrix._cache_lock:
+            DeploymentsMatrix._cache.pop(self._cache_key, None)
+        return self.get_matrix()
+
+    def get_deployed_revisions(self, name, type='api'):
+        """Return the revisions of an API proxy or shared flow deployed to each
+        environment."""
+        deployed = {}
+        for row in self.get_matrix():
+            if row['type'] == type and row['name'] == name:
+                deployed.setdefault(row['environment'], []).append(row['revision'])
+        return deployed
+
+
+class DeploymentWaiter:
+    """Polls the deployment details of API proxies, or shared flows with
+    ``sharedflows``, until revisions are deployed.
+
+    Polls back off exponentially from ``initial_delay`` up to ``max_delay``
+    seconds and give up after ``timeout`` seconds. Every state change of a
+    revision in an environment is recorded in :attr:`transitions`.
+    """
+
+    def __init__(
+        self,
+        auth,
+        org_name,
+        timeout=300,
+        initial_delay=1,
+        max_delay=10,
+        backoff_factor=2,
+        sharedflows=False,
+        max_workers=APIGEE_CLI_MAX_WORKERS,
+    ):
+        self._auth = auth
+        self._org_name = org_name
+        self._timeout = timeout
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._backoff_factor = backoff_factor
+        self._sharedflows = sharedflows
+        self._max_workers = max_workers
+        self._transitions = {}
+
+    @property
+    def auth(self):
+        return self._auth
+
+    @auth.setter
+    def auth(self, value):
+        self._auth = value
+
+    @property
+    def org_name(self):
+        return self._org_name
+
+    @org_name.setter
+    def org_name(self, value):
+        self._org_name = value
+
+    @property
+    def transitions(self):
+        return self._transitions
+
+    def get_deployments(self, api_name):
+        try:
+            if self._sharedflows:
+                resp = Sharedflows(self._auth, self._org_name).get_shared_flow_deployments(api_name)
+            else:
+                resp = Deployments(
+                    self._auth, self._org_name, api_name
+                ).get_api_proxy_deployment_details()
+        except HTTPError as e:
+            if e.response.status_code != 404:
+                raise e
+            return []
+        return flatten_api_proxy_deployment_details(resp.json())
+
+    def _get_state(self, deployments, environment, revision):
+        states = [
+            d['state']
+            for d in deployments
+            if d['environment'] == environment and (not revision or d['revision'] == revision)
+        ]
+        if not states:
+            return None
+        for state in states:
+            if state in FAILED_STATES:
+                return state
+        if all(state == DEPLOYED_STATE for state in states):
+            return DEPLOYED_STATE
+        return next(state for state in states if state != DEPLOYED_STATE)
+
+    def _record(self, target, state, elapsed):
+        transitions = self._transitions.setdefault(target, [])
+        if transitions and transitions[-1][1] == state:
+            return
+        api_name, environment, revision = target
+        previous = transitions[-1][1] if transitions else None
+        transitions.append((round(elapsed, 3), state))
+        console.echo(
+            f'{api_name} revision {revision or "*"} in {environment}: {previous} -> {state} ({elapsed:.1f}s)',
+            expc_verbosity=1,
+        )
+
+    def wait(self, targets):
+        """Wait until every ``(api_name, environment, revision)`` target is
+        deployed; a revision of ``None`` matches every revision in the
+        environment. Returns the deployments of each API proxy.
+        """
+        pending = set(targets)
+        deployments = {}
+        start = time.monotonic()
+        delay = self._initial_delay
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while True:
+                api_names = sorted({target[0] for target in pending})
+                for api_name, details in zip(
+                    api_names, executor.map(self.get_deployments, api_names)
+                ):
+                    deployments[api_name] = details
+                elapsed = time.monotonic() - start
+                for target in sorted(pending, key=str):
+                    api_name, environment, revision = target
+                    state = self._get_state(deployments[api_name], environment, revision)
+                    self._record(target, state, elapsed)
+                    if state == DEPLOYED_STATE:
+                        pending.discard(target)
+                    elif state in FAILED_STATES:
+                        raise DeploymentError(
+                            f'{api_name} revision {revision} failed to deploy to {environment}: {state}',
+                            status=2,
+                        )
+                if not pending:
+                    return deployments
+                remaining = self._timeout - elapsed
+                if remaining <= 0:
+                    waiting_for = [
+                        f'{a} revision {r or "*"} in {e} ({self._transitions[(a, e, r)][-1][1]})'
+                        for a, e, r in sorted(pending, key=str)
+                    ]
+                    raise DeploymentError(
+                        f'Timed out after {self._timeout}s waiting for: {", ".join(waiting_for)}',
+                        status=2,
+                    )
+                time.sleep(min(delay, remaining))
+                delay = min(delay * self._backoff_factor, self._max_delay)
@@ -1,6 +1,4 @@
-import json
-
-from tabulate import tabulate
+from apigee.serializer import NDJSON, dumps, serialize_ndjson, serialize_table
 
 
 class DeploymentsSerializer:
@@ -17,7 +15,9 @@ class DeploymentsSerializer:
                 }
             )
         if format == 'json':
-            return json.dumps(revisions)
+            return dumps(revisions)
+        elif format == NDJSON:
+            return serialize_ndjson(revisions)
         elif format == 'table':
             table = [[rev['name'], rev['revision'], rev['state']] for rev in revisions]
             headers = []
@@ -25,7 +25,32 @@ class DeploymentsSerializer:
                 headers = ['id', 'name', 'revision', 'state']
             elif showindex == 'never' or showindex is False:
                 headers = ['name', 'revision', 'state']
-            return tabulate(table, headers, showindex=showindex, tablefmt=tablefmt)
+            return serialize_table(table, headers, showindex=showindex, tablefmt=tablefmt)
         else:
             raise ValueError(format)
         return deployment_details
+
+    def serialize_matrix(self, matrix, format, showindex=False, tablefmt='plain'):
+        if format == 'json':
+            return dumps(matrix)
+        elif format == NDJSON:
+            return serialize_ndjson(matrix)
+        elif format == 'table':
+            environments = sorted({row['environment'] for row in matrix})
+            cells = {}
+            for row in matrix:
+                cell = cells.setdefault((row['type'], row['name']), {})
+                revision = str(row['revision'])
+                if row['state'] != 'deployed':
+                    revision += f' ({row["state"]})'
+                cell.setdefault(row['environment'], []).append(revision)
+            table = [
+                [type, name] + [', '.join(cell.get(e, [])) for e in environments]
+                for (type, name), cell in sorted(cells.items())
+            ]
+            headers = ['type', 'name'] + environments
+            if showindex == 'always' or showindex is True:
+                headers = ['id'] + headers
+            return serialize_table(table, headers, showindex=showindex, tablefmt=tablefmt)
+        else:
+            raise ValueError(format)
@@ -3,7 +3,10 @@ import click
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.developers.developers import Developers
+from apigee.pagination import MIN_PAGINATION_COUNT
 from apigee.prefix import common_prefix_options
+from apigee.serializer import (NDJSON, common_format_options,
+                               serialize_json, serialize_ndjson)
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -149,11 +152,27 @@ def _list_developers(
     expand=False,
     count=1000,
     startkey="",
+    all_pages=False,
+    partitioned=False,
+    format='json',
+    fields=None,
     **kwargs
 ):
-    return Developers(
-        gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_developers(prefix=prefix, expand=expand, count=count, startkey=startkey)
+    developers = Developers(gen_auth(username, password, mfa_secret, token, zonename), org, None)
+    if all_pages:
+        if count < MIN_PAGINATION_COUNT:
+            raise click.BadParameter(
+                f'must be at least {MIN_PAGINATION_COUNT} with --all', param_hint='--count'
+            )
+        records = developers.paginate_developers(
+            prefix=prefix, expand=expand, count=count, startkey=startkey, partitioned=partitioned
+        )
+        if format == NDJSON:
+            return serialize_ndjson(records, fields)
+        return serialize_json([*records], fields)
+    return developers.list_developers(
+        prefix=prefix, expand=expand, count=count, startkey=startkey, format=format, fields=fields
+    )
 
 
 @developers.command(
@@ -181,8 +200,20 @@ def _list_developers(
     show_default=True,
     help='To filter the keys that are returned, enter the email of a developer that the list will start with.',
 )
+@click.option(
+    '--all/--no-all',
+    'all_pages',
+    default=False,
+    help='Follow startkey across pages to list every developer, not just the first page.',
+)
+@click.option(
+    '--partitioned/--no-partitioned',
+    default=False,
+    help='With --all, list ranges of emails (by leading character) concurrently.',
+)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_developers(*args, **kwargs))
+    console.echo_output(_list_developers(*args, **kwargs))
 
 
 def _set_developer_status(
@@ -2,13 +2,14 @@ import json
 import random
 import string
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import (APIGEE_ADMIN_API_URL,
                     APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE, auth,
                     console)
 from apigee.developers.serializer import DevelopersSerializer
+from apigee.pagination import filter_prefix, paginate, paginate_partitioned
+from apigee.session import session
 
 CREATE_DEVELOPER_PATH = '{api_url}/v1/organizations/{org}/developers'
 DELETE_DEVELOPER_PATH = '{api_url}/v1/organizations/{org}/developers/{developer_email}'
@@ -83,7 +84,7 @@ class Developers:
             'userName': user_name,
             'attributes': json.loads(attributes)['attributes'],
         }
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -92,7 +93,7 @@ class Developers:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, developer_email=self._developer_email
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -101,7 +102,7 @@ class Developers:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, developer_email=self._developer_email
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -110,11 +111,13 @@ class Developers:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, app_name=app_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_developers(self, prefix=None, expand=False, count=1000, startkey="", format='json'):
+    def list_developers(
+        self, prefix=None, expand=False, count=1000, startkey="", format='json', fields=None
+    ):
         uri = LIST_DEVELOPERS_PATH.format(
             api_url=APIGEE_ADMIN_API_URL,
             org=self._org_name,
@@ -123,9 +126,28 @@ class Developers:
             startkey=startkey,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return DevelopersSerializer().serialize_details(resp, format, prefix=prefix)
+        return DevelopersSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
+
+    def paginate_developers(
+        self, prefix=None, expand=False, count=1000, startkey='', partitioned=False
+    ):
+        """Yield every developer email, or every developer when ``expand`` is
+        set, requesting further pages as needed. With ``partitioned``, ranges
+        of emails are listed concurrently."""
+
+        def _fetch_page(startkey, count):
+            page = self.list_developers(
+                expand=expand, count=count, startkey=startkey, format='dict'
+            )
+            return page['developer'] if expand else page
+
+        key = (lambda developer: developer['email']) if expand else None
+        paginator = paginate_partitioned if partitioned else paginate
+        return filter_prefix(
+            paginator(_fetch_page, count=count, startkey=startkey, key=key), prefix=prefix, key=key
+        )
 
     def set_developer_status(self, action):
         uri = SET_DEVELOPER_STATUS_PATH.format(
@@ -138,7 +160,7 @@ class Developers:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.post(uri, headers=hdrs)
+        resp = session.post(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -150,7 +172,7 @@ class Developers:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.put(uri, headers=hdrs, json=body)
+        resp = session.put(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -162,7 +184,7 @@ class Developers:
             attribute_name=attribute_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -175,7 +197,7 @@ class Developers:
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
         body = {'value': updated_value}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -187,7 +209,7 @@ class Developers:
             attribute_name=attribute_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -196,7 +218,7 @@ class Developers:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, developer_email=self._developer_email
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -208,6 +230,6 @@ class Developers:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
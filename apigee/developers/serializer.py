@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class DevelopersSerializer:
-    def serialize_details(self, developers, format, prefix=None):
+    def serialize_details(self, developers, format, prefix=None, fields=None):
         resp = developers
         if format == 'text':
             return developers.text
@@ -10,7 +10,9 @@ class DevelopersSerializer:
         if prefix:
             developers = [developer for developer in developers if developer.startswith(prefix)]
         if format == 'json':
-            return json.dumps(developers)
+            return serialize_json(developers, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(developers, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
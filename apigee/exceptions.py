@@ -16,6 +16,21 @@ class NotYetImplementedError(Exception):
     pass
 
 
+class DeploymentError(Exception):
+    def __init__(self, message, status=1):
+        super().__init__(message)
+        self.status = status
+
+
+class ManifestError(Exception):
+    pass
+
+
+class IncorrectSymmetricKeyError(Exception):
+    def __init__(self, message='Incorrect symmetric key.'):
+        super().__init__(message)
+
+
 def exception_handler(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
@@ -4,6 +4,7 @@ from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.keystores.keystores import Keystores
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -47,11 +48,13 @@ def _list_all_keystores_and_truststores(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Keystores(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_all_keystores_and_truststores(environment, prefix=prefix)
+    ).list_all_keystores_and_truststores(environment, prefix=prefix, format=format, fields=fields)
 
 
 @keystores.command(help='Returns a list of all keystores and truststores in the environment.')
@@ -60,8 +63,9 @@ def _list_all_keystores_and_truststores(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_all_keystores_and_truststores(*args, **kwargs))
+    console.echo_output(_list_all_keystores_and_truststores(*args, **kwargs))
 
 
 def _get_a_keystore_or_truststore(
@@ -246,11 +250,13 @@ def _list_aliases(
     name,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Keystores(
         gen_auth(username, password, mfa_secret, token, zonename), org, name
-    ).list_aliases(environment, prefix=prefix)
+    ).list_aliases(environment, prefix=prefix, format=format, fields=fields)
 
 
 @keystores.command(help='Returns a list of all the aliases in the keystore.')
@@ -260,8 +266,9 @@ def _list_aliases(
 @common_verbose_options
 @click.option('-n', '--name', help='keystore name', required=True)
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list_aliases(*args, **kwargs):
-    console.echo(_list_aliases(*args, **kwargs))
+    console.echo_output(_list_aliases(*args, **kwargs))
 
 
 def _get_alias(
@@ -1,10 +1,10 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
 from apigee.keystores.serializer import KeystoresSerializer
+from apigee.session import session
 
 CREATE_A_KEYSTORE_OR_TRUSTSTORE_PATH = (
     '{api_url}/v1/o/{org_name}/environments/{environment}/keystores'
@@ -83,14 +83,16 @@ class Keystores:
     def delete_a_keystore_or_truststore(self):
         pass
 
-    def list_all_keystores_and_truststores(self, environment, prefix=None, format='json'):
+    def list_all_keystores_and_truststores(
+        self, environment, prefix=None, format='json', fields=None
+    ):
         uri = LIST_ALL_KEYSTORES_AND_TRUSTSTORES_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org_name=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix)
+        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def get_a_keystore_or_truststore(self, environment):
         uri = GET_A_KEYSTORE_OR_TRUSTSTORE_PATH.format(
@@ -100,7 +102,7 @@ class Keystores:
             keystore_name=self._keystore_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -116,11 +118,13 @@ class Keystores:
             cert_name=cert_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def get_all_certs_from_a_keystore_or_truststore(self, environment, prefix=None, format='json'):
+    def get_all_certs_from_a_keystore_or_truststore(
+        self, environment, prefix=None, format='json', fields=None
+    ):
         uri = GET_ALL_CERTS_FROM_A_KEYSTORE_OR_TRUSTSTORE_PATH.format(
             api_url=APIGEE_ADMIN_API_URL,
             org_name=self._org_name,
@@ -128,9 +132,9 @@ class Keystores:
             keystore_name=self._keystore_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix)
+        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def delete_cert_from_a_keystore_or_truststore(self):
         pass
@@ -144,7 +148,7 @@ class Keystores:
             cert_name=cert_name,
         )
         hdrs = auth.set_header(self._auth, headers={})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -157,7 +161,7 @@ class Keystores:
     def create_an_alias_by_generating_a_self_signed_certificate(self):
         pass
 
-    def list_aliases(self, environment, prefix=None, format='json'):
+    def list_aliases(self, environment, prefix=None, format='json', fields=None):
         uri = LIST_ALIASES_PATH.format(
             api_url=APIGEE_ADMIN_API_URL,
             org_name=self._org_name,
@@ -165,9 +169,9 @@ class Keystores:
             keystore_name=self._keystore_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix)
+        return KeystoresSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def get_alias(self, environment, alias_name):
         uri = GET_ALIAS_PATH.format(
@@ -178,7 +182,7 @@ class Keystores:
             alias_name=alias_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -197,7 +201,7 @@ class Keystores:
             alias_name=alias_name,
         )
         hdrs = auth.set_header(self._auth, headers={})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class KeystoresSerializer:
-    def serialize_details(self, keystores, format, prefix=None):
+    def serialize_details(self, keystores, format, prefix=None, fields=None):
         resp = keystores
         if format == 'text':
             return keystores.text
@@ -10,7 +10,9 @@ class KeystoresSerializer:
         if prefix:
             keystores = [keystore for keystore in keystores if keystore.startswith(prefix)]
         if format == 'json':
-            return json.dumps(keystores)
+            return serialize_json(keystores, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(keystores, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
@@ -1,13 +1,20 @@
+import os
 import sys
 
 import click
 
-from apigee import APIGEE_CLI_SYMMETRIC_KEY, console
+from apigee import (APIGEE_CLI_MAX_WORKERS, APIGEE_CLI_SYMMETRIC_KEY,
+                    console)
 from apigee.auth import common_auth_options, gen_auth
 from apigee.crypto import (ENCRYPTED_HEADER_BEGIN, ENCRYPTED_HEADER_END,
                            decrypt_message, encrypt_message, is_encrypted)
+from apigee.exceptions import IncorrectSymmetricKeyError
 from apigee.keyvaluemaps.keyvaluemaps import Keyvaluemaps
+from apigee.keyvaluemaps.serializer import KeyvaluemapsSerializer
+from apigee.pagination import MIN_PAGINATION_COUNT
 from apigee.prefix import common_prefix_options
+from apigee.serializer import (NDJSON, common_format_options,
+                               serialize_json, serialize_ndjson)
 from apigee.silent import common_silent_options
 from apigee.utils import read_file, write_file
 from apigee.verbose import common_verbose_options
@@ -159,11 +166,13 @@ def _list_keyvaluemaps_in_an_environment(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Keyvaluemaps(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_keyvaluemaps_in_an_environment(environment, prefix=prefix)
+    ).list_keyvaluemaps_in_an_environment(environment, prefix=prefix, format=format, fields=fields)
 
 
 @keyvaluemaps.command(
@@ -174,8 +183,9 @@ def _list_keyvaluemaps_in_an_environment(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_keyvaluemaps_in_an_environment(*args, **kwargs))
+    console.echo_output(_list_keyvaluemaps_in_an_environment(*args, **kwargs))
 
 
 def _update_keyvaluemap_in_an_environment(
@@ -283,13 +293,31 @@ def _list_keys_in_an_environment_scoped_keyvaluemap(
     environment,
     startkey,
     count,
+    all_pages=False,
+    format='json',
+    fields=None,
     **kwargs
 ):
-    return (
-        Keyvaluemaps(gen_auth(username, password, mfa_secret, token, zonename), org, name)
-        .list_keys_in_an_environment_scoped_keyvaluemap(environment, startkey, count)
-        .text
+    keyvaluemap = Keyvaluemaps(
+        gen_auth(username, password, mfa_secret, token, zonename), org, name
     )
+    if all_pages:
+        if count < MIN_PAGINATION_COUNT:
+            raise click.BadParameter(
+                f'must be at least {MIN_PAGINATION_COUNT} with --all', param_hint='--count'
+            )
+        records = keyvaluemap.paginate_keys_in_an_environment_scoped_keyvaluemap(
+            environment, startkey=startkey, count=count
+        )
+        if format == NDJSON:
+            return serialize_ndjson(records, fields)
+        return serialize_json([*records], fields)
+    resp = keyvaluemap.list_keys_in_an_environment_scoped_keyvaluemap(environment, startkey, count)
+    if format == NDJSON:
+        return serialize_ndjson(resp.json(), fields)
+    if fields:
+        return serialize_json(resp.json(), fields)
+    return resp.text
 
 
 @keyvaluemaps.command(
@@ -314,9 +342,16 @@ def _list_keys_in_an_environment_scoped_keyvaluemap(
     show_default=True,
     help='Limits the list of keys to the number you specify, up to a maximum of 100. Use with the startkey parameter to provide more targeted filtering.',
 )
+@click.option(
+    '--all/--no-all',
+    'all_pages',
+    default=False,
+    help='Follow startkey across pages to list every key, not just the first page.',
+)
+@common_format_options
 # @click.option("--prefix", help="team/resource prefix filter")
 def list_keys(*args, **kwargs):
-    console.echo(_list_keys_in_an_environment_scoped_keyvaluemap(*args, **kwargs))
+    console.echo_output(_list_keys_in_an_environment_scoped_keyvaluemap(*args, **kwargs))
 
 
 def _push_keyvaluemap(
@@ -330,35 +365,116 @@ def _push_keyvaluemap(
     environment,
     file,
     symmetric_key,
+    dry_run=False,
+    concurrency=None,
+    format='table',
     **kwargs
 ):
-    return Keyvaluemaps(
+    keyvaluemaps = Keyvaluemaps(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).push_keyvaluemap(environment, file, secret=symmetric_key)
+    )
+    if len(environment) == 1 and os.path.isfile(file):
+        try:
+            return keyvaluemaps.push_keyvaluemap(
+                environment[0], file, secret=symmetric_key, dry_run=dry_run
+            )
+        except IncorrectSymmetricKeyError as e:
+            sys.exit(str(e))
+    rows = keyvaluemaps.push_keyvaluemaps(
+        environment,
+        file,
+        secret=symmetric_key,
+        dry_run=dry_run,
+        max_workers=concurrency or APIGEE_CLI_MAX_WORKERS,
+    )
+    if not rows:
+        console.echo(f'No KeyValueMap files found in {file}', status=1)
+    console.echo_output(KeyvaluemapsSerializer().serialize_push_summary(rows, format))
+    if any(row['status'] == 'failed' for row in rows):
+        console.echo(status=1)
+    return rows
 
 
 @keyvaluemaps.command(
-    help='Push KeyValueMap to Apigee. This will create KeyValueMap/entries if they do not exist, update existing KeyValueMap/entries, and delete entries on Apigee that are not present in the request body.'
+    help='Push KeyValueMap to Apigee. This will create KeyValueMap/entries if they do not exist, update existing KeyValueMap/entries, and delete entries on Apigee that are not present in the request body. Given a directory, every map in it is pushed, several at a time, using its per-environment subdirectories (e.g. keyvaluemaps/<environment>/ from backups or pull) when present.'
 )
 @common_auth_options
 @common_silent_options
 @common_verbose_options
-@click.option('-e', '--environment', help='environment', required=True)
+@click.option('-e', '--environment', help='environment', required=True, multiple=True)
 @click.option(
     '-f',
     '--file',
-    type=click.Path(exists=True, dir_okay=False, file_okay=True, resolve_path=False),
+    type=click.Path(exists=True, dir_okay=True, file_okay=True, resolve_path=False),
     required=True,
+    help='KeyValueMap file, or directory of KeyValueMap files',
 )
 @click.option(
     '--symmetric-key', default=APIGEE_CLI_SYMMETRIC_KEY, help='symmetric secret key for decrypting'
 )
+@click.option(
+    '--dry-run/--no-dry-run',
+    default=False,
+    help='show the entries to be created, updated and deleted but do not push',
+)
+@click.option(
+    '-j',
+    '--concurrency',
+    type=click.INT,
+    default=None,
+    help='maximum number of maps pushed at a time when pushing a directory',
+)
+@click.option(
+    '--format',
+    type=click.Choice(['table', 'json']),
+    default='table',
+    help='format of the summary when pushing a directory',
+)
 def push(*args, **kwargs):
     _push_keyvaluemap(*args, **kwargs)
 
 
+def _diff_keyvaluemap_in_environments(
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    name,
+    from_environment,
+    environment,
+    format='text',
+    **kwargs
+):
+    plan = Keyvaluemaps(
+        gen_auth(username, password, mfa_secret, token, zonename), org, name
+    ).diff_keyvaluemap_in_environments(from_environment, environment)
+    return KeyvaluemapsSerializer().serialize_diff(plan, format)
+
+
+@keyvaluemaps.command(
+    help='Compares a KeyValueMap between two environments and shows the entries to be created, updated and deleted to make the second environment match the first. Values are not shown in text output.'
+)
+@common_auth_options
+@common_silent_options
+@common_verbose_options
+@click.option('-n', '--name', help='name', required=True)
+@click.option('--from-environment', help='environment to compare from', required=True)
+@click.option('-e', '--environment', help='environment to compare to', required=True)
+@click.option(
+    '--format',
+    default='text',
+    type=click.Choice(['text', 'json'], case_sensitive=False),
+)
+def diff(*args, **kwargs):
+    console.echo(_diff_keyvaluemap_in_environments(*args, **kwargs))
+
+
 @keyvaluemaps.command(
-    name='encrypt', help='Use symmetric GPG (AES256) to encrypt KVM file in a custom format.'
+    name='encrypt',
+    help='Use ChaCha20-Poly1305 with a key derived from the symmetric key (scrypt) to encrypt KVM file in a custom format.',
 )
 @common_silent_options
 @common_verbose_options
@@ -385,7 +501,8 @@ def encrypt_file(symmetric_key, file, verbose, silent):
 
 
 @keyvaluemaps.command(
-    name='decrypt', help='Use symmetric GPG (AES256) to decrypt KVM file in a custom format.'
+    name='decrypt',
+    help='Decrypt KVM file in a custom format. Values encrypted with GPG by earlier versions are still supported.',
 )
 @common_silent_options
 @common_verbose_options
@@ -400,9 +517,12 @@ def decrypt_file(symmetric_key, file, verbose, silent):
     contents = read_file(file, type='json')
     decrypted_count = 0
     console.echo('Decrypting... ', end='', flush=True)
-    contents, decrypted_count = Keyvaluemaps.encrypt_decrypt_keyvaluemap(
-        contents, symmetric_key, encrypt=False
-    )
+    try:
+        contents, decrypted_count = Keyvaluemaps.encrypt_decrypt_keyvaluemap(
+            contents, symmetric_key, encrypt=False
+        )
+    except IncorrectSymmetricKeyError as e:
+        sys.exit(str(e))
     if decrypted_count:
         write_file(contents, file, indent=2)
         console.echo('Done')
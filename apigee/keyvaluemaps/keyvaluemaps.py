@@ -1,14 +1,18 @@
 import json
-import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
-import requests
 from requests.exceptions import HTTPError
 from tqdm import tqdm
 
-from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee import APIGEE_ADMIN_API_URL, APIGEE_CLI_MAX_WORKERS, auth, console
 from apigee.crypto import (ENCRYPTED_HEADER_BEGIN, ENCRYPTED_HEADER_END,
-                           decrypt_message, encrypt_message, is_encrypted)
+                           decrypt_message, decrypt_messages,
+                           encrypt_message, encrypt_messages, is_encrypted)
+from apigee.exceptions import IncorrectSymmetricKeyError
 from apigee.keyvaluemaps.serializer import KeyvaluemapsSerializer
+from apigee.pagination import paginate
+from apigee.session import session
 from apigee.utils import read_file
 
 CREATE_KEYVALUEMAP_IN_AN_ENVIRONMENT_PATH = (
@@ -44,6 +48,47 @@ def TQDM_KWARGS(desc):
     }
 
 
+def diff_keyvaluemaps(source, target):
+    """Return the entries to create, update and delete to turn the ``target``
+    KeyValueMap into ``source``. Entries are matched by name in a single pass
+    over each map."""
+    source_entries = {entry['name']: entry for entry in source.get('entry', [])}
+    target_values = {entry['name']: entry.get('value') for entry in target.get('entry', [])}
+    plan = {'create': [], 'update': [], 'delete': [], 'unchanged': 0}
+    for name, entry in source_entries.items():
+        if name not in target_values:
+            plan['create'].append(entry)
+        elif target_values[name] != entry.get('value'):
+            plan['update'].append(entry)
+        else:
+            plan['unchanged'] += 1
+    plan['delete'] = [
+        {'name': name, 'value': value}
+        for name, value in target_values.items()
+        if name not in source_entries
+    ]
+    return plan
+
+
+def list_keyvaluemap_files(path, environments):
+    """Return the ``(environment, file)`` pairs to push from a map file or a
+    directory. A directory may hold one subdirectory per environment, like
+    the ones written by backups and ``pull``, otherwise its files are pushed
+    to every environment."""
+    path = Path(path)
+    if path.is_file():
+        return [(environment, str(path)) for environment in environments]
+    files = []
+    for environment in environments:
+        directory = path / environment if (path / environment).is_dir() else path
+        files += [
+            (environment, str(f))
+            for f in sorted(directory.iterdir())
+            if f.is_file() and not f.name.startswith('.')
+        ]
+    return files
+
+
 class Keyvaluemaps:
     def __init__(self, auth, org_name, map_name):
         self._auth = auth
@@ -85,7 +130,7 @@ class Keyvaluemaps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -97,7 +142,7 @@ class Keyvaluemaps:
             name=self._map_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -110,7 +155,7 @@ class Keyvaluemaps:
             entry_name=entry_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -122,7 +167,7 @@ class Keyvaluemaps:
             name=self._map_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -135,18 +180,22 @@ class Keyvaluemaps:
             entry_name=entry_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_keyvaluemaps_in_an_environment(self, environment, prefix=None, format='json'):
+    def list_keyvaluemaps_in_an_environment(
+        self, environment, prefix=None, format='json', fields=None
+    ):
         uri = LIST_KEYVALUEMAPS_IN_AN_ENVIRONMENT_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return KeyvaluemapsSerializer().serialize_details(resp, format, prefix=prefix)
+        return KeyvaluemapsSerializer().serialize_details(
+            resp, format, prefix=prefix, fields=fields
+        )
 
     def update_keyvaluemap_in_an_environment(self, environment, request_body):
         uri = UPDATE_KEYVALUEMAP_IN_AN_ENVIRONMENT_PATH.format(
@@ -159,7 +208,7 @@ class Keyvaluemaps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -174,7 +223,7 @@ class Keyvaluemaps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = {'name': entry_name, 'value': entry_value}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -190,7 +239,7 @@ class Keyvaluemaps:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = {'name': entry_name, 'value': updated_value}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -204,32 +253,89 @@ class Keyvaluemaps:
             count=count,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         # return KeyvaluemapsSerializer().serialize_details(resp, 'json', prefix=prefix)
         return resp
 
-    def _diff_kvms(self, kvm1, kvm2):
-        current_keys = [entry['name'] for entry in kvm1['entry']]
-        deleted_keys = [entry for entry in kvm2['entry'] if entry['name'] not in current_keys]
-        return current_keys, deleted_keys
+    def paginate_keys_in_an_environment_scoped_keyvaluemap(
+        self, environment, startkey='', count=100
+    ):
+        """Yield every key of the map, requesting further pages as needed."""
+        return paginate(
+            lambda startkey, count: self.list_keys_in_an_environment_scoped_keyvaluemap(
+                environment, startkey, count
+            ).json(),
+            count=count,
+            startkey=startkey,
+        )
+
+    def _create_entry(self, environment, entry):
+        try:
+            self.create_an_entry_in_an_environment_scoped_kvm(
+                environment, entry['name'], entry['value']
+            )
+        except HTTPError as e:
+            # created since the map was fetched
+            if e.response.status_code != 409:
+                raise e
+            self.update_an_entry_in_an_environment_scoped_kvm(
+                environment, entry['name'], entry['value']
+            )
 
-    def _create_or_update_entry(self, environment, entry):
+    def _update_entry(self, environment, entry):
         try:
-            self.get_a_keys_value_in_an_environment_scoped_keyvaluemap(environment, entry['name'])
             self.update_an_entry_in_an_environment_scoped_kvm(
                 environment, entry['name'], entry['value']
             )
         except HTTPError as e:
+            # deleted since the map was fetched
             if e.response.status_code != 404:
                 raise e
             self.create_an_entry_in_an_environment_scoped_kvm(
                 environment, entry['name'], entry['value']
             )
 
-    def _delete_entries(self, environment, deleted_keys):
-        for idx, entry in enumerate(tqdm(deleted_keys, **TQDM_KWARGS('Deleting'))):
+    def _delete_entry(self, environment, entry):
+        try:
             self.delete_keyvaluemap_entry_in_an_environment(environment, entry['name'])
+        except HTTPError as e:
+            if e.response.status_code != 404:
+                raise e
+
+    @staticmethod
+    def _run_writes(writes, desc, max_workers=APIGEE_CLI_MAX_WORKERS, progress=True):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, *args) for func, args in writes]
+            with tqdm(
+                total=len(futures), disable=not progress, **TQDM_KWARGS(desc)
+            ) as progress_bar:
+                for future in as_completed(futures):
+                    future.result()
+                    progress_bar.update()
+
+    def apply_keyvaluemap_plan(
+        self, environment, plan, max_workers=APIGEE_CLI_MAX_WORKERS, progress=True
+    ):
+        """Apply a plan from :func:`diff_keyvaluemaps` to the map, running the
+        writes concurrently. Whether an entry is created or updated comes from
+        the plan, so no entry is fetched first."""
+        expc_verbosity = 0 if progress else 1
+        if plan['delete']:
+            self._run_writes(
+                [(self._delete_entry, (environment, entry)) for entry in plan['delete']],
+                'Deleting',
+                max_workers=max_workers,
+                progress=progress,
+            )
+            console.echo('Removed entries.', expc_verbosity=expc_verbosity)
+        writes = [(self._create_entry, (environment, entry)) for entry in plan['create']]
+        writes += [(self._update_entry, (environment, entry)) for entry in plan['update']]
+        if writes:
+            self._run_writes(writes, 'Updating', max_workers=max_workers, progress=progress)
+            console.echo('Updated entries.', expc_verbosity=expc_verbosity)
+        if not plan['delete'] and not writes:
+            console.echo('All entries up-to-date.', expc_verbosity=expc_verbosity)
 
     @staticmethod
     def encrypt_value(kvm_dict, index, secret):
@@ -243,31 +349,33 @@ class Keyvaluemaps:
         ciphertext = kvm_dict['entry'][index]['value']
         decrypted = decrypt_message(secret, ciphertext)
         if decrypted == '':
-            sys.exit('Incorrect symmetric key.')
+            raise IncorrectSymmetricKeyError
         kvm_dict['entry'][index]['value'] = decrypted
 
     @staticmethod
     def encrypt_decrypt_keyvaluemap(kvm_dict, secret, encrypt=True):
-        crypto_count = 0
-
-        def _func(value, kvm, index, secret):
-            operation = ''
-            if encrypt:
-                operation = 'encrypt_value' if not is_encrypted(value) else ''
-            else:
-                operation = 'decrypt_value' if is_encrypted(value) else ''
-            if operation:
-                getattr(Keyvaluemaps, operation)(kvm, index, secret)
-                return 1
-            return 0
-
-        if kvm_dict['encrypted'] and kvm_dict['entry']:
-            for idx, entry in enumerate(kvm_dict['entry']):
-                if entry.get('name') and entry.get('value'):
-                    crypto_count += _func(kvm_dict['entry'][idx]['value'], kvm_dict, idx, secret)
-        return kvm_dict, crypto_count
-
-    def push_keyvaluemap(self, environment, file, secret=None):
+        if not kvm_dict['encrypted'] or not kvm_dict['entry']:
+            return kvm_dict, 0
+        entries = [
+            entry
+            for entry in kvm_dict['entry']
+            if entry.get('name') and entry.get('value') and is_encrypted(entry['value']) != encrypt
+        ]
+        values = [entry['value'] for entry in entries]
+        if encrypt:
+            values = [
+                f'{ENCRYPTED_HEADER_BEGIN}{ciphertext}{ENCRYPTED_HEADER_END}'
+                for ciphertext in encrypt_messages(secret, values)
+            ]
+        else:
+            values = decrypt_messages(secret, values)
+            if '' in values:
+                raise IncorrectSymmetricKeyError
+        for entry, value in zip(entries, values):
+            entry['value'] = value
+        return kvm_dict, len(entries)
+
+    def push_keyvaluemap(self, environment, file, secret=None, dry_run=False):
         local_map = read_file(file, type='json')
         if secret:
             console.echo('Decrypting... ', end='', flush=True)
@@ -281,23 +389,120 @@ class Keyvaluemaps:
         self._map_name = local_map['name']
         try:
             remote_map = self.get_keyvaluemap_in_an_environment(environment).json()
-            _, deleted_keys = self._diff_kvms(local_map, remote_map)
-            local_map_updated = {
-                'entry': [entry for entry in local_map['entry'] if entry not in remote_map['entry']]
-            }
-            if deleted_keys:
-                self._delete_entries(environment, deleted_keys)
-                console.echo('Removed entries.')
-            if local_map_updated['entry']:
-                for entry in tqdm(local_map_updated['entry'], **TQDM_KWARGS('Updating')):
-                    self._create_or_update_entry(environment, entry)
-                console.echo('Updated entries.')
-            if not deleted_keys and not local_map_updated['entry']:
-                console.echo('All entries up-to-date.')
         except HTTPError as e:
             if e.response.status_code != 404:
                 raise e
+            if dry_run:
+                plan = diff_keyvaluemaps(local_map, {})
+                console.echo(KeyvaluemapsSerializer().serialize_diff(plan, 'text'))
+                return plan
             console.echo(f'Creating {self._map_name}')
             console.echo(
                 self.create_keyvaluemap_in_an_environment(environment, json.dumps(local_map)).text
             )
+            return
+        plan = diff_keyvaluemaps(local_map, remote_map)
+        if dry_run:
+            console.echo(KeyvaluemapsSerializer().serialize_diff(plan, 'text'))
+            return plan
+        self.apply_keyvaluemap_plan(environment, plan)
+        return plan
+
+    def _push_keyvaluemap_quietly(self, environment, local_map, dry_run, max_workers):
+        try:
+            remote_map = self.get_keyvaluemap_in_an_environment(environment).json()
+        except HTTPError as e:
+            if e.response.status_code != 404:
+                raise e
+            remote_map = None
+        plan = diff_keyvaluemaps(local_map, remote_map or {})
+        if remote_map is None:
+            status = 'to create' if dry_run else 'created'
+            if not dry_run:
+                self.create_keyvaluemap_in_an_environment(environment, json.dumps(local_map))
+        elif not (plan['create'] or plan['update'] or plan['delete']):
+            status = 'unchanged'
+        else:
+            status = 'to update' if dry_run else 'updated'
+            if not dry_run:
+                self.apply_keyvaluemap_plan(
+                    environment, plan, max_workers=max_workers, progress=False
+                )
+        console.echo(f'{environment}/{self._map_name}: {status}', expc_verbosity=1)
+        return status, plan
+
+    def push_keyvaluemaps(
+        self, environments, path, secret=None, dry_run=False, max_workers=APIGEE_CLI_MAX_WORKERS
+    ):
+        """Push every map file found by :func:`list_keyvaluemap_files`,
+        several maps at a time, and return one summary row per map. A map
+        that fails to push is reported in its row instead of stopping the
+        others."""
+        maps = []
+        files = list_keyvaluemap_files(path, environments)
+        for environment in environments:
+            if not any(e == environment for e, _ in files):
+                console.echo(f'No KeyValueMap files to push to {environment} in {path}')
+        for environment, file in files:
+            try:
+                local_map = read_file(file, type='json')
+            except ValueError as e:
+                maps.append((environment, file, None, f'invalid JSON: {e}'))
+                continue
+            if not isinstance(local_map, dict) or 'name' not in local_map:
+                maps.append((environment, file, None, 'not a KeyValueMap'))
+                continue
+            if secret:
+                try:
+                    local_map, _ = self.encrypt_decrypt_keyvaluemap(
+                        local_map, secret, encrypt=False
+                    )
+                except IncorrectSymmetricKeyError as e:
+                    maps.append((environment, file, None, str(e)))
+                    continue
+            maps.append((environment, file, local_map, None))
+        # maps and their entries are both written concurrently; share the
+        # workers between them
+        entry_workers = max(1, max_workers // max(1, min(len(maps), max_workers)))
+
+        def _push(item):
+            environment, file, local_map, error = item
+            row = {
+                'environment': environment,
+                'name': local_map['name'] if local_map else Path(file).name,
+                'status': 'failed',
+                'create': 0,
+                'update': 0,
+                'delete': 0,
+                'unchanged': 0,
+                'error': error or '',
+            }
+            if error:
+                return row
+            try:
+                status, plan = Keyvaluemaps(
+                    self._auth, self._org_name, local_map['name']
+                )._push_keyvaluemap_quietly(environment, local_map, dry_run, entry_workers)
+            except HTTPError as e:
+                row['error'] = str(e)
+                return row
+            row['status'] = status
+            for action in ('create', 'update', 'delete'):
+                row[action] = len(plan[action])
+            row['unchanged'] = plan['unchanged']
+            return row
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_push, maps))
+
+    def diff_keyvaluemap_in_environments(self, source_environment, target_environment):
+        """Return the plan to make the map in ``target_environment`` match the
+        one in ``source_environment``."""
+        source_map = self.get_keyvaluemap_in_an_environment(source_environment).json()
+        try:
+            target_map = self.get_keyvaluemap_in_an_environment(target_environment).json()
+        except HTTPError as e:
+            if e.response.status_code != 404:
+                raise e
+            target_map = {}
+        return diff_keyvaluemaps(source_map, target_map)
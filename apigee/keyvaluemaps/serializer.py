@@ -1,8 +1,10 @@
-import json
+from itertools import chain
+
+from apigee.serializer import NDJSON, dumps, serialize_json, serialize_ndjson, serialize_table
 
 
 class KeyvaluemapsSerializer:
-    def serialize_details(self, maps, format, prefix=None):
+    def serialize_details(self, maps, format, prefix=None, fields=None):
         resp = maps
         if format == 'text':
             return maps.text
@@ -10,9 +12,45 @@ class KeyvaluemapsSerializer:
         if prefix:
             maps = [map for map in maps if map.startswith(prefix)]
         if format == 'json':
-            return json.dumps(maps)
+            return serialize_json(maps, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(maps, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
             return maps
         return resp
+
+    def serialize_diff(self, plan, format):
+        if format == 'json':
+            return dumps(plan)
+        elif format == 'text':
+            # values are left out, they may hold secrets
+            lines = [f'+ {entry["name"]}' for entry in plan['create']]
+            lines += [f'~ {entry["name"]}' for entry in plan['update']]
+            lines += [f'- {entry["name"]}' for entry in plan['delete']]
+            lines.append(
+                f'{len(plan["create"])} to create, {len(plan["update"])} to update, '
+                f'{len(plan["delete"])} to delete, {plan["unchanged"]} unchanged'
+            )
+            return '\n'.join(lines)
+        else:
+            raise ValueError(format)
+
+    def serialize_push_summary(self, rows, format, tablefmt='simple'):
+        if format == 'json':
+            return dumps(rows)
+        elif format == 'table':
+            headers = ['environment', 'name', 'status', 'create', 'update', 'delete', 'unchanged']
+            if any(row['error'] for row in rows):
+                headers.append('error')
+            table = [[row[header] for header in headers] for row in rows]
+            counts = {}
+            for row in rows:
+                counts[row['status']] = counts.get(row['status'], 0) + 1
+            total = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+            return chain(
+                serialize_table(table, headers, tablefmt=tablefmt), [f'{len(rows)} maps: {total}']
+            )
+        else:
+            raise ValueError(format)
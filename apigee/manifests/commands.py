@@ -0,0 +1,83 @@
+import click
+
+from apigee import console
+from apigee.auth import common_auth_options, gen_auth
+from apigee.exceptions import ManifestError
+from apigee.manifests.manifests import (Manifest, ManifestDeployer,
+                                        gen_plan_table, gen_report_table)
+from apigee.silent import common_silent_options
+from apigee.verbose import common_verbose_options
+
+
+def _deploy_all(
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    file,
+    concurrency=None,
+    force=False,
+    dry_run=False,
+    **kwargs,
+):
+    try:
+        manifest = Manifest.from_file(file)
+    except ManifestError as e:
+        console.echo(e, status=1)
+    if concurrency:
+        manifest.concurrency = concurrency
+    deployer = ManifestDeployer(
+        gen_auth(username, password, mfa_secret, token, zonename), org, manifest, force=force
+    )
+    try:
+        plan = deployer.plan()
+    except ManifestError as e:
+        console.echo(e, status=1)
+    if dry_run:
+        return console.echo_output(gen_plan_table(plan))
+    results, errors, skipped = deployer.deploy()
+    for (kind, name, environment), error in sorted(errors.items()):
+        # tasks that exited have already reported their error
+        if isinstance(error, SystemExit):
+            continue
+        console.echo(f'Error deploying {kind} {name} to {environment}: {error}')
+    console.echo_output(gen_report_table(manifest, results, errors, skipped))
+    if errors or skipped:
+        console.echo(status=1)
+
+
+@click.command(
+    help='Deploy the shared flows and API proxies listed in a manifest file (YAML or JSON). Shared flows are deployed before the proxies that call them and each bundle is imported once, then promoted through the environments in the order they are listed, with independent deployments running concurrently.'
+)
+@common_auth_options
+@common_verbose_options
+@common_silent_options
+@click.option(
+    '-f',
+    '--file',
+    type=click.Path(exists=True, dir_okay=False, file_okay=True, resolve_path=False),
+    required=True,
+    help='manifest file',
+)
+@click.option(
+    '-j',
+    '--concurrency',
+    type=click.INT,
+    default=None,
+    help='maximum number of concurrent deployments (overrides the manifest)',
+)
+@click.option(
+    '--force/--no-force',
+    default=False,
+    help='import and deploy even if a bundle is unchanged since its last deployment',
+)
+@click.option(
+    '--dry-run/--no-dry-run',
+    default=False,
+    help='show the deployment waves but do not deploy',
+)
+def deploy_all(*args, **kwargs):
+    _deploy_all(*args, **kwargs)
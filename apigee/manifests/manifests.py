@@ -0,0 +1,395 @@
+import json
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from requests.exceptions import HTTPError
+
+from apigee import APIGEE_CLI_MAX_WORKERS, console
+from apigee.apis.deploy import (
+    Deployer,
+    gen_deployments_cache_key,
+    read_deployments_cache,
+    update_deployments_cache,
+)
+from apigee.bundler import BundleBuilder
+from apigee.deployments.deployments import DeploymentWaiter
+from apigee.exceptions import ManifestError
+from apigee.serializer import serialize_table
+from apigee.sharedflows.sharedflows import Sharedflows
+
+is_yaml_installed = False
+
+try:
+    import yaml
+
+    is_yaml_installed = True
+except ImportError:
+    pass
+
+SHAREDFLOW = 'sharedflow'
+API = 'api'
+
+
+def load_manifest_file(manifest_file):
+    with open(manifest_file, 'r') as f:
+        content = f.read()
+    if Path(manifest_file).suffix.lower() in ('.yaml', '.yml'):
+        if not is_yaml_installed:
+            raise ManifestError('PyYAML is required to read YAML manifests')
+        return yaml.safe_load(content)
+    return json.loads(content)
+
+
+def find_shared_flow_dependencies(directory):
+    """Return the names of the shared flows called by FlowCallout policies in a
+    proxy or shared flow bundle directory."""
+    dependencies = set()
+    for policy_file in Path(directory).glob('*/policies/*.xml'):
+        try:
+            root = ET.parse(str(policy_file)).getroot()
+        except ET.ParseError:
+            continue
+        if root.tag == 'FlowCallout':
+            bundle = root.findtext('SharedFlowBundle')
+            if bundle and bundle.strip():
+                dependencies.add(bundle.strip())
+    return dependencies
+
+
+def sort_topologically(graph):
+    """Group the nodes of ``graph`` (node -> set of dependencies) into waves
+    that can run in parallel, in dependency order."""
+    remaining = {node: set(dependencies) for node, dependencies in graph.items()}
+    waves = []
+    while remaining:
+        wave = sorted(node for node, dependencies in remaining.items() if not dependencies)
+        if not wave:
+            raise ManifestError(
+                'Dependency cycle between: '
+                + ', '.join('/'.join(node) for node in sorted(remaining))
+            )
+        for node in wave:
+            del remaining[node]
+        for dependencies in remaining.values():
+            dependencies.difference_update(wave)
+        waves.append(wave)
+    return waves
+
+
+def schedule(graph, func, max_workers=APIGEE_CLI_MAX_WORKERS):
+    """Run ``func(node, results)`` for every node of ``graph`` as soon as all of
+    its dependencies succeeded, at most ``max_workers`` at a time.
+
+    Nodes depending on a failed node are skipped; a node fails if ``func``
+    raises, or exits as :func:`apigee.console.echo` does with a status. Returns
+    the results, the errors and the skipped nodes.
+    """
+    sort_topologically(graph)
+    dependents = {node: [] for node in graph}
+    remaining = {}
+    for node, dependencies in graph.items():
+        remaining[node] = len(dependencies)
+        for dependency in dependencies:
+            dependents[dependency].append(node)
+    results, errors, skipped = {}, {}, set()
+
+    def skip_dependents(node):
+        for dependent in dependents[node]:
+            if dependent not in skipped:
+                skipped.add(dependent)
+                skip_dependents(dependent)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(nodes):
+            for node in sorted(nodes):
+                pending[executor.submit(func, node, results)] = node
+
+        submit(node for node, count in remaining.items() if not count)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                try:
+                    results[node] = future.result()
+                except (Exception, SystemExit) as e:
+                    errors[node] = e
+                    skip_dependents(node)
+                    continue
+                ready = []
+                for dependent in dependents[node]:
+                    remaining[dependent] -= 1
+                    if not remaining[dependent] and dependent not in skipped:
+                        ready.append(dependent)
+                submit(ready)
+    return results, errors, skipped
+
+
+class Manifest:
+    """Shared flows and API proxies to deploy to a list of environments, given
+    in promotion order.
+
+    Example manifest::
+
+        environments: [dev, test, prod]
+        concurrency: 8
+        sharedflows:
+          - name: common-auth
+            directory: sharedflows/common-auth
+        apis:
+          - name: orders
+            directory: proxies/orders
+            environments: [dev, test]
+            seamless_deploy: true
+            depends_on: [common-auth]
+
+    Relative directories are resolved against the manifest file. Items deploy
+    to every environment by default. When ``depends_on`` is omitted, it is
+    detected from the FlowCallout policies of the bundle.
+    """
+
+    def __init__(self, environments, sharedflows=[], apis=[], concurrency=None, base_directory='.'):
+        self._environments = environments
+        self._concurrency = concurrency or APIGEE_CLI_MAX_WORKERS
+        self._items = {}
+        for kind, items in ((SHAREDFLOW, sharedflows), (API, apis)):
+            for item in items:
+                self._add_item(kind, item, base_directory)
+
+    @classmethod
+    def from_file(cls, manifest_file):
+        manifest = load_manifest_file(manifest_file)
+        if not isinstance(manifest, dict):
+            raise ManifestError(f'{manifest_file}: expected a mapping at the top level')
+        sharedflows = manifest.get('sharedflows') or []
+        apis = manifest.get('apis') or []
+        environments = manifest.get('environments')
+        if not environments:
+            environments = []
+            for item in sharedflows + apis:
+                for environment in item.get('environments', []):
+                    if environment not in environments:
+                        environments.append(environment)
+        return cls(
+            environments,
+            sharedflows=sharedflows,
+            apis=apis,
+            concurrency=manifest.get('concurrency'),
+            base_directory=str(Path(manifest_file).parent),
+        )
+
+    @property
+    def environments(self):
+        return self._environments
+
+    @property
+    def concurrency(self):
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, value):
+        self._concurrency = value
+
+    @property
+    def items(self):
+        return self._items
+
+    def _add_item(self, kind, item, base_directory):
+        name = item.get('name')
+        if not name or not item.get('directory'):
+            raise ManifestError(f'Every {kind} needs a name and a directory: {item}')
+        if (kind, name) in self._items:
+            raise ManifestError(f'Duplicate {kind}: {name}')
+        directory = Path(base_directory, item['directory'])
+        if not directory.is_dir():
+            raise ManifestError(f'{kind} {name}: directory not found: {directory}')
+        environments = item.get('environments') or self._environments
+        unknown = set(environments) - set(self._environments)
+        if unknown:
+            raise ManifestError(
+                f'{kind} {name}: unknown environments: {", ".join(sorted(unknown))}'
+            )
+        depends_on = item.get('depends_on')
+        if depends_on is None:
+            depends_on = find_shared_flow_dependencies(directory)
+        depends_on = set(depends_on)
+        if kind == SHAREDFLOW:
+            depends_on.discard(name)
+        self._items[(kind, name)] = dict(
+            item,
+            directory=str(directory),
+            # keep the promotion order regardless of the order in the item
+            environments=[e for e in self._environments if e in environments],
+            depends_on=depends_on,
+        )
+
+    def previous_task(self, task):
+        kind, name, environment = task
+        environments = self._items[(kind, name)]['environments']
+        index = environments.index(environment)
+        return (kind, name, environments[index - 1]) if index else None
+
+    def gen_graph(self):
+        """Map every (kind, name, environment) task to the tasks it waits for:
+        the same item in the previous environment and the shared flows it
+        calls in the same environment."""
+        graph = {}
+        for (kind, name), item in self._items.items():
+            for environment in item['environments']:
+                task = (kind, name, environment)
+                dependencies = set()
+                previous = self.previous_task(task)
+                if previous:
+                    dependencies.add(previous)
+                for dependency in item['depends_on']:
+                    sharedflow = self._items.get((SHAREDFLOW, dependency))
+                    if sharedflow and environment in sharedflow['environments']:
+                        dependencies.add((SHAREDFLOW, dependency, environment))
+                graph[task] = dependencies
+        return graph
+
+
+class ManifestDeployer:
+    """Deploys everything in a :class:`Manifest`.
+
+    Each item is imported once, in its first environment, and the resulting
+    revision is promoted through the following environments.
+    """
+
+    def __init__(self, auth, org_name, manifest, force=False):
+        self._auth = auth
+        self._org_name = org_name
+        self._manifest = manifest
+        self._force = force
+        self._builders = {}
+        self._builders_lock = threading.Lock()
+
+    @property
+    def manifest(self):
+        return self._manifest
+
+    def _get_builder(self, key):
+        with self._builders_lock:
+            if key not in self._builders:
+                self._builders[key] = BundleBuilder(self._manifest.items[key]['directory'])
+            return self._builders[key]
+
+    def deploy_api(self, name, environment, revision=None):
+        item = self._manifest.items[(API, name)]
+        builder = self._get_builder((API, name))
+        deployer = Deployer(self._auth, self._org_name, name, environment)
+        if not self._force:
+            unchanged_revision = deployer.get_unchanged_revision(builder.tree_hash)
+            if unchanged_revision:
+                console.echo(
+                    f'Bundle unchanged, {name} revision {unchanged_revision} is already deployed to {environment}'
+                )
+                return unchanged_revision
+        if not revision:
+            with open(builder.build(), 'rb') as bundle:
+                revision = deployer.import_bundle(bundle)
+        return deployer.release(
+            revision,
+            bundle_hash=builder.tree_hash,
+            seamless_deploy=item.get('seamless_deploy', False),
+        )
+
+    def get_unchanged_sharedflow_revision(self, name, environment, bundle_hash):
+        """Return the shared flow revision deployed from an identical bundle,
+        if it is still deployed to the environment."""
+        cached = read_deployments_cache().get(
+            gen_deployments_cache_key(self._org_name, environment, name, kind='sharedflows')
+        )
+        if not cached or cached.get('hash') != bundle_hash:
+            return None
+        try:
+            deployments = (
+                Sharedflows(self._auth, self._org_name).get_shared_flow_deployments(name).json()
+            )
+        except HTTPError as e:
+            if e.response.status_code != 404:
+                raise e
+            return None
+        for env in deployments.get('environment', []):
+            if env['name'] != environment:
+                continue
+            for r in env.get('revision', []):
+                if int(r['name']) == cached['revision'] and r.get('state') == 'deployed':
+                    return cached['revision']
+        return None
+
+    def deploy_sharedflow(self, name, environment, revision=None):
+        item = self._manifest.items[(SHAREDFLOW, name)]
+        builder = self._get_builder((SHAREDFLOW, name))
+        if not self._force:
+            unchanged_revision = self.get_unchanged_sharedflow_revision(
+                name, environment, builder.tree_hash
+            )
+            if unchanged_revision:
+                console.echo(
+                    f'Bundle unchanged, {name} revision {unchanged_revision} is already deployed to {environment}'
+                )
+                return unchanged_revision
+        sharedflows = Sharedflows(self._auth, self._org_name)
+        if not revision:
+            bundle_file = builder.build()
+            revision = int(sharedflows.import_a_shared_flow(bundle_file, name).json()['revision'])
+        sharedflows.deploy_a_shared_flow(
+            environment,
+            name,
+            revision,
+            override=item.get('override', False),
+            delay=item.get('delay', 0),
+        )
+        # the proxies calling the shared flow are released once this returns
+        DeploymentWaiter(self._auth, self._org_name, sharedflows=True).wait(
+            [(name, environment, revision)]
+        )
+        update_deployments_cache(
+            gen_deployments_cache_key(self._org_name, environment, name, kind='sharedflows'),
+            {'hash': builder.tree_hash, 'revision': revision},
+        )
+        return revision
+
+    def run_task(self, task, results):
+        kind, name, environment = task
+        revision = results.get(self._manifest.previous_task(task))
+        if kind == SHAREDFLOW:
+            return self.deploy_sharedflow(name, environment, revision=revision)
+        return self.deploy_api(name, environment, revision=revision)
+
+    def plan(self):
+        return sort_topologically(self._manifest.gen_graph())
+
+    def deploy(self):
+        return schedule(
+            self._manifest.gen_graph(), self.run_task, max_workers=self._manifest.concurrency
+        )
+
+
+def gen_plan_table(waves, tablefmt='simple'):
+    table = ([index, *task] for index, wave in enumerate(waves) for task in wave)
+    return serialize_table(table, ['Wave', 'Type', 'Name', 'Environment'], tablefmt=tablefmt)
+
+
+def gen_report_table(manifest, results, errors, skipped, tablefmt='simple'):
+    table = []
+    for task in sorted(
+        manifest.gen_graph(),
+        key=lambda t: (t[0] != SHAREDFLOW, t[1], manifest.environments.index(t[2])),
+    ):
+        if task in results:
+            status, revision = 'deployed', results[task]
+        elif task in errors:
+            status, revision = 'failed', ''
+        elif task in skipped:
+            status, revision = 'skipped', ''
+        else:
+            status, revision = 'not run', ''
+        table.append([*task, revision, status])
+    return serialize_table(
+        table, ['Type', 'Name', 'Environment', 'Revision', 'Status'], tablefmt=tablefmt
+    )
@@ -1,10 +1,10 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
 from apigee.maskconfigs.serializer import MaskconfigsSerializer
+from apigee.session import session
 from apigee.utils import read_file
 
 CREATE_DATA_MASKS_FOR_AN_API_PROXY_PATH = (
@@ -63,7 +63,7 @@ class Maskconfigs:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -75,7 +75,7 @@ class Maskconfigs:
             maskconfig_name=maskconfig_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -87,7 +87,7 @@ class Maskconfigs:
             maskconfig_name=maskconfig_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -96,7 +96,7 @@ class Maskconfigs:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, api_name=self._api_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -105,7 +105,7 @@ class Maskconfigs:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class MaskconfigsSerializer:
-    def serialize_details(self, maskconfigs, format, prefix=None):
+    def serialize_details(self, maskconfigs, format, prefix=None, fields=None):
         resp = maskconfigs
         if format == 'text':
             return maskconfigs.text
@@ -12,7 +12,9 @@ class MaskconfigsSerializer:
                 maskconfig for maskconfig in maskconfigs if maskconfig.startswith(prefix)
             ]
         if format == 'json':
-            return json.dumps(maskconfigs)
+            return serialize_json(maskconfigs, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(maskconfigs, fields)
         elif format == 'table':
             pass
         return resp
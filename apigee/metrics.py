@@ -0,0 +1,186 @@
+import math
+import re
+import string
+import sys
+import threading
+import time
+import urllib.parse
+
+import click
+from apigee.serializer import dumps, serialize_table
+from apigee.session import session
+
+# verbs that start the names of the path constants used with each method, to
+# tell apart constants that share a URL, e.g. GET_X_PATH and DELETE_X_PATH
+METHOD_NAME_PREFIXES = {
+    'GET': ('GET', 'LIST'),
+    'POST': ('CREATE', 'ADD', 'IMPORT', 'DEPLOY', 'UPDATE', 'SET', 'CLEAR', 'PUSH'),
+    'PUT': ('UPDATE', 'SET'),
+    'DELETE': ('DELETE', 'REMOVE', 'UNDEPLOY', 'CLEAR'),
+}
+PERCENTILES = (50, 95, 99)
+
+
+class EndpointTemplate:
+    """A ``*_PATH`` constant, such as ``GET_API_PROXY_PATH``, matched against
+    request URLs."""
+
+    def __init__(self, name, template):
+        self.name = name
+        path, _, query = template.partition('?')
+        pattern = ''
+        for literal, field, _, _ in string.Formatter().parse(path):
+            pattern += re.escape(literal)
+            if field == 'api_url':
+                pattern += '.*?'
+            elif field is not None:
+                pattern += '[^/]+'
+        self._regex = re.compile(f'^{pattern}/?$')
+        self._query_keys = {key for key, _ in urllib.parse.parse_qsl(query)}
+        self._literal_size = len(re.sub(r'{[^}]*}', '', path))
+
+    def score(self, method, url, query_keys):
+        """Return how well a request matches the template, or None if its
+        path does not match."""
+        if not self._regex.match(url):
+            return None
+        return (
+            len(self._query_keys & query_keys),
+            self.name.startswith(METHOD_NAME_PREFIXES.get(method, ())),
+            -len(self._query_keys - query_keys),
+            self._literal_size,
+        )
+
+
+def _gen_templates():
+    templates = []
+    for module_name, module in sorted(sys.modules.items()):
+        if not module_name.startswith('apigee.') or module is None:
+            continue
+        for name, value in sorted(vars(module).items()):
+            if name.endswith('_PATH') and isinstance(value, str) and '{api_url}' in value:
+                templates.append(EndpointTemplate(name, value))
+    return templates
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return 0
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+class MetricsRecorder:
+    """Records every Management API request sent through the shared session:
+    its endpoint template, status, latency, size, retries and throttling."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+        self._templates = None
+        self._enabled = False
+
+    @property
+    def records(self):
+        return self._records
+
+    def enable(self, session=session):
+        if not self._enabled:
+            session.hooks['response'].append(self.on_response)
+            self._enabled = True
+
+    def get_endpoint(self, method, url):
+        if self._templates is None:
+            self._templates = _gen_templates()
+        parts = urllib.parse.urlsplit(url)
+        query_keys = {key for key, _ in urllib.parse.parse_qsl(parts.query)}
+        url = urllib.parse.urlunsplit(parts._replace(query='', fragment=''))
+        best, best_score = None, None
+        for template in self._templates:
+            score = template.score(method, url, query_keys)
+            if score is not None and (best_score is None or score > best_score):
+                best, best_score = template, score
+        return best.name if best else parts.path
+
+    def on_response(self, resp, *args, **kwargs):
+        start = time.perf_counter()
+        if kwargs.get('stream'):
+            size = int(resp.headers.get('Content-Length') or 0)
+        else:
+            # read the body here, as requests would right after the hook, so
+            # that the latency includes the download
+            size = len(resp.content)
+        retries = getattr(getattr(resp.raw, 'retries', None), 'history', ())
+        record = {
+            'method': resp.request.method,
+            'endpoint': self.get_endpoint(resp.request.method, resp.url),
+            'status': resp.status_code,
+            'latency': resp.elapsed.total_seconds() + time.perf_counter() - start,
+            'bytes': size,
+            'retries': len(retries),
+            # throttled attempts, including the retried ones
+            'throttled': (resp.status_code == 429) + sum(retry.status == 429 for retry in retries),
+            'rate_limit_wait': getattr(resp, 'rate_limit_wait', 0),
+        }
+        with self._lock:
+            self._records.append(record)
+        return resp
+
+    def summarize(self):
+        with self._lock:
+            records = list(self._records)
+        groups = {}
+        for record in records:
+            groups.setdefault((record['method'], record['endpoint']), []).append(record)
+        summary = []
+        for (method, endpoint), group in sorted(groups.items()):
+            latencies = sorted(record['latency'] * 1000 for record in group)
+            row = {
+                'method': method,
+                'endpoint': endpoint,
+                'requests': len(group),
+                'errors': sum(record['status'] >= 400 for record in group),
+                'retries': sum(record['retries'] for record in group),
+                'throttled': sum(record['throttled'] for record in group),
+                'rate_limit_wait_ms': round(
+                    sum(record['rate_limit_wait'] for record in group) * 1000, 1
+                ),
+                'bytes': sum(record['bytes'] for record in group),
+                'total_ms': round(sum(latencies), 1),
+            }
+            for p in PERCENTILES:
+                row[f'p{p}_ms'] = round(percentile(latencies, p), 1)
+            summary.append(row)
+        return summary
+
+    def report(self, format):
+        summary = self.summarize()
+        if format == 'json':
+            return dumps(summary)
+        elif format == 'table':
+            headers = list(summary[0]) if summary else ['method', 'endpoint', 'requests']
+            table = [list(row.values()) for row in summary]
+            return '\n'.join(serialize_table(table, headers, tablefmt='simple'))
+        raise ValueError(format)
+
+
+recorder = MetricsRecorder()
+
+
+def metrics_callback(ctx, param, value):
+    if not value:
+        return value
+    recorder.enable()
+    ctx.call_on_close(lambda: click.echo(recorder.report(value), err=True))
+    return value
+
+
+def common_metrics_options(func):
+    return click.option(
+        '--metrics',
+        type=click.Choice(['json', 'table'], case_sensitive=False),
+        default=None,
+        expose_value=False,
+        callback=metrics_callback,
+        help='after the command, print the latency percentiles, sizes, errors and retries of the Management API requests, per endpoint, to stderr',
+    )(func)
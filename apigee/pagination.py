@@ -0,0 +1,93 @@
+import string
+from concurrent.futures import ThreadPoolExecutor
+
+from apigee import APIGEE_CLI_MAX_WORKERS
+
+# leading characters of the key ranges listed concurrently by
+# ``paginate_partitioned``; keys sorting before '0' fall into the first range
+PARTITION_BOUNDARIES = tuple(string.digits + string.ascii_lowercase)
+
+# every page after the first repeats the last item of the previous one, so a
+# page must hold at least one more item to make progress
+MIN_PAGINATION_COUNT = 2
+
+
+def _identity(item):
+    return item
+
+
+def paginate(fetch_page, count=1000, startkey='', key=None, stop_key=None):
+    """Return an iterator over every item of a ``count``/``startKey``
+    paginated listing.
+
+    ``fetch_page(startkey, count)`` returns one page as a list. The Management
+    API includes the start key in the page it starts, so the item that ended
+    the previous page is dropped from the next one. ``key`` gives the start
+    key of an item (the item itself for plain name listings). The listing
+    ends before the first item whose key is ``stop_key`` or greater.
+
+    :raises ValueError: if ``count`` is less than ``MIN_PAGINATION_COUNT``
+    """
+    if count < MIN_PAGINATION_COUNT:
+        raise ValueError(f'count must be at least {MIN_PAGINATION_COUNT} to paginate')
+    if key is None:
+        key = _identity
+    return _paginate(fetch_page, count, startkey, key, stop_key)
+
+
+def _paginate(fetch_page, count, startkey, key, stop_key):
+    previous_key = None
+    while True:
+        page = fetch_page(startkey, count)
+        items = page
+        if previous_key is not None and items and key(items[0]) == previous_key:
+            items = items[1:]
+        if not items:
+            return
+        for item in items:
+            if stop_key is not None and key(item) >= stop_key:
+                return
+            yield item
+        if len(page) < count:
+            return
+        previous_key = startkey = key(page[-1])
+
+
+def paginate_partitioned(
+    fetch_page,
+    count=1000,
+    startkey='',
+    key=None,
+    boundaries=PARTITION_BOUNDARIES,
+    max_workers=APIGEE_CLI_MAX_WORKERS,
+):
+    """Yield the same items as :func:`paginate`, listing the key ranges
+    between ``boundaries`` concurrently.
+
+    Each range is paginated from its own boundary and stops at the next one,
+    so the ranges never overlap. Results are yielded in key order, each range
+    as soon as it and all the ranges before it are complete.
+    """
+    if count < MIN_PAGINATION_COUNT:
+        raise ValueError(f'count must be at least {MIN_PAGINATION_COUNT} to paginate')
+    starts = [startkey] + sorted(b for b in set(boundaries) if b > startkey)
+    stops = starts[1:] + [None]
+
+    def _list_partition(bounds):
+        start, stop = bounds
+        return list(paginate(fetch_page, count=count, startkey=start, key=key, stop_key=stop))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for items in executor.map(_list_partition, zip(starts, stops)):
+            yield from items
+
+
+def filter_prefix(items, prefix=None, key=None):
+    if not prefix:
+        yield from items
+        return
+    if key is None:
+        key = _identity
+    for item in items:
+        if key(item).startswith(prefix):
+            yield item
@@ -4,6 +4,7 @@ from click_aliases import ClickAliasedGroup
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.permissions.permissions import Permissions
+from apigee.serializer import NDJSON
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -138,7 +139,7 @@ def _get_permissions(
     '--format',
     help='defines how to format output',
     default='table',
-    type=click.Choice(['json', 'table'], case_sensitive=False),
+    type=click.Choice(['json', NDJSON, 'table'], case_sensitive=False),
 )
 @click.option('--showindex/--no-showindex', default=False)
 @click.option(
@@ -149,4 +150,4 @@ def _get_permissions(
     show_default=True,
 )
 def get(*args, **kwargs):
-    console.echo(_get_permissions(*args, **kwargs))
+    console.echo_output(_get_permissions(*args, **kwargs))
@@ -1,9 +1,8 @@
 import json
 
-import requests
-
 from apigee import APIGEE_ADMIN_API_URL, auth
 from apigee.permissions.serializer import PermissionsSerializer
+from apigee.session import session
 
 CREATE_PERMISSIONS_PATH = (
     '{api_url}/v1/organizations/{org}/userroles/{role_name}/resourcepermissions'
@@ -53,7 +52,7 @@ class Permissions:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -72,7 +71,7 @@ class Permissions:
                 body['resourcePermission'][idx]['path'] = path.replace(
                     placeholder_key, placeholder_value
                 )
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -81,7 +80,7 @@ class Permissions:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, role_name=self._role_name
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         if formatted:
             return PermissionsSerializer().serialize_details(
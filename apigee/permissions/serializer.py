@@ -1,6 +1,6 @@
 import json
 
-from tabulate import tabulate
+from apigee.serializer import NDJSON, serialize_ndjson, serialize_table
 
 
 class PermissionsSerializer:
@@ -9,15 +9,17 @@ class PermissionsSerializer:
             return permission_details.text
         elif format == 'json':
             return permission_details.json()
+        elif format == NDJSON:
+            return serialize_ndjson(permission_details.json()['resourcePermission'])
         elif format == 'table':
-            table = [
+            table = (
                 [res['organization'], res['path'], res['permissions']]
                 for res in permission_details.json()['resourcePermission']
-            ]
+            )
             headers = []
             if showindex == 'always' or showindex is True:
                 headers = ['id', 'organization', 'path', 'permissions']
             elif showindex == 'never' or showindex is False:
                 headers = ['organization', 'path', 'permissions']
-            return tabulate(table, headers, showindex=showindex, tablefmt=tablefmt)
+            return serialize_table(table, headers, showindex=showindex, tablefmt=tablefmt)
         return permission_details
@@ -1,10 +1,19 @@
 import configparser
+import json
+import os
+import threading
+import time
 
 import click
 
-from apigee import (APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE,
-                    APIGEE_CLI_CREDENTIALS_FILE)
+from apigee import (APIGEE_ADMIN_API_URL,
+                    APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE,
+                    APIGEE_CLI_CREDENTIALS_FILE, APIGEE_CLI_DIRECTORY,
+                    APIGEE_CLI_TEAMS_CACHE_FILE, APIGEE_CLI_TEAMS_CACHE_TTL)
 from apigee.developers.developers import Developers
+from apigee.utils import make_dirs
+
+_teams_cache_lock = threading.Lock()
 
 
 def common_prefix_options(func):
@@ -34,18 +43,84 @@ def common_prefix_options(func):
     )(func)
 
 
-def auth_with_prefix(
-    auth_obj, org, name, attribute_name=APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE
+def _read_teams_cache():
+    try:
+        with open(APIGEE_CLI_TEAMS_CACHE_FILE, 'r') as f:
+            return json.loads(f.read())
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _update_teams_cache(key, value):
+    with _teams_cache_lock:
+        cache = _read_teams_cache()
+        cache[key] = value
+        make_dirs(APIGEE_CLI_DIRECTORY)
+        tmp_file = f'{APIGEE_CLI_TEAMS_CACHE_FILE}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps(cache, indent=2))
+        os.replace(tmp_file, APIGEE_CLI_TEAMS_CACHE_FILE)
+
+
+def get_allowed_teams(
+    auth_obj,
+    org,
+    attribute_name=APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE,
+    ttl=APIGEE_CLI_TEAMS_CACHE_TTL,
 ):
+    """Return the team prefixes the user may access, from the developer
+    attribute of the user. With a positive ``ttl``, they are cached on disk
+    for that many seconds per Management API URL, organization and user."""
+    # the same org and user can exist behind several Management API URLs
+    key = f'{APIGEE_ADMIN_API_URL}/{org}/{auth_obj.username}/{attribute_name}'
+    if ttl > 0:
+        cached = _read_teams_cache().get(key)
+        if cached and time.time() - cached['timestamp'] < ttl:
+            return cached['teams']
     team = (
         Developers(auth_obj, org, auth_obj.username)
         .get_developer_attribute(attribute_name)
         .json()['value']
     )
     allowed = team.split(',')
-    for prefix in allowed:
-        if name.startswith(prefix):
-            return name
-    raise Exception(
+    if ttl > 0:
+        _update_teams_cache(key, {'teams': allowed, 'timestamp': time.time()})
+    return allowed
+
+
+def compile_prefix_matcher(allowed):
+    """Return a function telling whether a name starts with any of the
+    ``allowed`` prefixes."""
+    prefixes = tuple(allowed)
+    return lambda name: name.startswith(prefixes)
+
+
+def _unauthorized(allowed, name):
+    return Exception(
         f'401 Client Error: Unauthorized for team: {str(allowed)}\nAttempted to access resource: {name}'
     )
+
+
+def auth_with_prefix(
+    auth_obj, org, name, attribute_name=APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE
+):
+    allowed = get_allowed_teams(auth_obj, org, attribute_name=attribute_name)
+    if compile_prefix_matcher(allowed)(name):
+        return name
+    raise _unauthorized(allowed, name)
+
+
+def auth_with_prefixes(
+    auth_obj, org, names, attribute_name=APIGEE_CLI_AUTHORIZATION_DEVELOPER_ATTRIBUTE
+):
+    """Check many names with a single lookup of the teams of the user.
+    Returns the authorized names and an error for each of the others."""
+    allowed = get_allowed_teams(auth_obj, org, attribute_name=attribute_name)
+    is_allowed = compile_prefix_matcher(allowed)
+    authorized, errors = [], []
+    for name in names:
+        if is_allowed(name):
+            authorized.append(name)
+        else:
+            errors.append(_unauthorized(allowed, name))
+    return authorized, errors
@@ -0,0 +1,129 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import click
+
+from apigee import APIGEE_CLI_PROFILES_DIRECTORY, str_path
+from apigee.utils import make_dirs
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATION_SITES = 30
+TOP_ALLOCATION_TRACEBACKS = 10
+TRACEBACK_LIMIT = 25
+
+
+class CpuProfiler:
+    """cProfile for the main thread and every thread started while profiling,
+    such as the workers of concurrent listings and pushes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = []
+
+    def _profile_thread(self, frame, event, arg):
+        # called once in each new thread, enabling a profiler replaces it
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        self._main = cProfile.Profile()
+        # since Python 3.12, a profiler sees every thread and only one can run
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        self._main.enable()
+
+    def stop(self):
+        self._main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._profiles:
+                stats.add(profile)
+        return stats
+
+    def write(self, path, header):
+        stats = self.stop()
+        stats.dump_stats(f'{path}.prof')
+        report = io.StringIO()
+        report.write(header)
+        stats.stream = report
+        report.write('\nTop functions by cumulative time\n')
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        report.write('\nTop functions by own time\n')
+        stats.sort_stats('tottime').print_stats(TOP_FUNCTIONS)
+        with open(f'{path}.txt', 'w') as f:
+            f.write(report.getvalue())
+        return [f'{path}.txt', f'{path}.prof']
+
+
+class MemoryProfiler:
+    """tracemalloc, which traces the allocations of every thread."""
+
+    def start(self):
+        tracemalloc.start(TRACEBACK_LIMIT)
+
+    def write(self, path, header):
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            ]
+        )
+        lines = [header, f'Current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB', '']
+        lines.append('Top allocation sites')
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:TOP_ALLOCATION_SITES]]
+        lines += ['', 'Top allocation tracebacks']
+        for stat in snapshot.statistics('traceback')[:TOP_ALLOCATION_TRACEBACKS]:
+            lines.append(f'{stat.count} blocks, {stat.size / 1024:.1f} KiB')
+            lines += [f'  {line}' for line in stat.traceback.format()]
+        with open(f'{path}.txt', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return [f'{path}.txt']
+
+
+PROFILERS = {'cpu': CpuProfiler, 'mem': MemoryProfiler}
+
+
+def profiler_callback(ctx, param, value):
+    if not value:
+        return value
+    profiler = PROFILERS[value]()
+    start = time.time()
+    profiler.start()
+
+    def _write():
+        command = ' '.join(filter(None, [ctx.info_name, ctx.invoked_subcommand]))
+        make_dirs(APIGEE_CLI_PROFILES_DIRECTORY)
+        name = '-'.join([time.strftime('%Y%m%d-%H%M%S', time.localtime(start)), *command.split()])
+        header = (
+            f'Command: {command}\n'
+            f'Profile: {value}\n'
+            f'Duration: {time.time() - start:.3f}s\n'
+            f'Python: {sys.version.split()[0]}\n'
+        )
+        files = profiler.write(str_path(APIGEE_CLI_PROFILES_DIRECTORY, f'{name}-{value}'), header)
+        click.echo(f'Profile written to {", ".join(files)}', err=True)
+
+    ctx.call_on_close(_write)
+    return value
+
+
+def common_profiler_options(func):
+    return click.option(
+        '--profiler',
+        type=click.Choice(list(PROFILERS), case_sensitive=False),
+        default=None,
+        expose_value=False,
+        callback=profiler_callback,
+        help='profile the command with cProfile (cpu) or tracemalloc (mem) and write a report of the top functions or allocation sites to ~/.apigee/profiles',
+    )(func)
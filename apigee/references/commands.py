@@ -4,6 +4,7 @@ from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.prefix import common_prefix_options
 from apigee.references.references import References
+from apigee.serializer import common_format_options
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 
@@ -23,11 +24,13 @@ def _list_all_references(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return References(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_all_references(environment, prefix=prefix)
+    ).list_all_references(environment, prefix=prefix, format=format, fields=fields)
 
 
 @references.command(help='List all references in an organization and environment.')
@@ -36,8 +39,9 @@ def _list_all_references(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_all_references(*args, **kwargs))
+    console.echo_output(_list_all_references(*args, **kwargs))
 
 
 def _get_reference(
@@ -1,10 +1,10 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
 from apigee.references.serializer import ReferencesSerializer
+from apigee.session import session
 
 LIST_ALL_REFERENCES_PATH = (
     '{api_url}/v1/organizations/{org_name}/environments/{environment}/references'
@@ -56,14 +56,14 @@ class References:
     def ref_name(self, value):
         self._ref_name = value
 
-    def list_all_references(self, environment, prefix=None, format='json'):
+    def list_all_references(self, environment, prefix=None, format='json', fields=None):
         uri = LIST_ALL_REFERENCES_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org_name=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return ReferencesSerializer().serialize_details(resp, format, prefix=prefix)
+        return ReferencesSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def get_reference(self, environment):
         uri = GET_REFERENCE_PATH.format(
@@ -73,7 +73,7 @@ class References:
             ref_name=self._ref_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class ReferencesSerializer:
-    def serialize_details(self, references, format, prefix=None):
+    def serialize_details(self, references, format, prefix=None, fields=None):
         resp = references
         if format == 'text':
             return references.text
@@ -10,7 +10,9 @@ class ReferencesSerializer:
         if prefix:
             references = [reference for reference in references if reference.startswith(prefix)]
         if format == 'json':
-            return json.dumps(references)
+            return serialize_json(references, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(references, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
@@ -0,0 +1,288 @@
+import json
+import re
+import string
+from functools import lru_cache
+from itertools import chain, islice, zip_longest
+
+import click
+from tabulate import multiline_formats, tabulate
+
+is_orjson_installed = False
+
+try:
+    import orjson
+
+    is_orjson_installed = True
+except ImportError:
+    pass
+
+NDJSON = 'ndjson'
+
+# one step of a field path: ``.key``, ``[index]`` or ``[]`` for every item
+FIELD_PATH_STEP = re.compile(r'\.?([^.\[\]]+)|\[(\d*)\]')
+ALL_ITEMS = object()
+
+# rows used to size the columns of a streamed table
+TABLE_SAMPLE_SIZE = 100
+# table formats whose cells tabulate escapes or aligns itself, which are
+# rendered whole
+UNSTREAMED_TABLE_FORMATS = (
+    'html',
+    'unsafehtml',
+    'latex',
+    'latex_booktabs',
+    'latex_longtable',
+    'pretty',
+    'asciidoc',
+    'colon_grid',
+)
+
+
+def dumps(obj):
+    """Serialize ``obj`` to a JSON string like ``json.dumps(obj)``, with
+    orjson when it is installed. orjson output decodes to the same value,
+    but is compact and leaves non-ASCII characters unescaped."""
+    if is_orjson_installed:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            # e.g. integers wider than 64 bits or keys that are not strings,
+            # which json handles
+            pass
+    return json.dumps(obj)
+
+
+@lru_cache(maxsize=None)
+def parse_field_path(path):
+    """Parse a jq-like field path such as ``name``, ``.attributes[].value`` or
+    ``credentials[0].consumerKey`` into its steps."""
+    steps, position = [], 0
+    while position < len(path):
+        match = FIELD_PATH_STEP.match(path, position)
+        if not match or match.end() == position:
+            raise ValueError(f'Invalid field path: {path}')
+        key, index = match.groups()
+        if key is not None:
+            steps.append(key)
+        else:
+            steps.append(int(index) if index else ALL_ITEMS)
+        position = match.end()
+    if not steps:
+        raise ValueError(f'Invalid field path: {path}')
+    return tuple(steps)
+
+
+def _select(values, step):
+    for value in values:
+        if step is ALL_ITEMS:
+            if isinstance(value, list):
+                yield from value
+            elif isinstance(value, dict):
+                yield from value.values()
+        elif isinstance(step, int):
+            if isinstance(value, list) and -len(value) <= step < len(value):
+                yield value[step]
+        elif isinstance(value, dict) and step in value:
+            yield value[step]
+
+
+def get_field(record, path):
+    """Return the value at ``path`` in ``record``, or None if it is missing.
+    Like jq, ``[]`` iterates over an array; the values it selects are
+    returned as a flat list."""
+    steps = parse_field_path(path)
+    values = [record]
+    for step in steps:
+        values = _select(values, step)
+    if ALL_ITEMS in steps:
+        return list(values)
+    return next(iter(values), None)
+
+
+def project(record, fields=None):
+    """Keep only ``fields`` of an object, keyed by their path.
+
+    :raises click.BadParameter: if ``fields`` are given for a record that is
+        not an object, such as a name in a listing that is not expanded
+    """
+    if not fields:
+        return record
+    if not isinstance(record, dict):
+        raise click.BadParameter(
+            'only applies to listings of objects, e.g. with --expand', param_hint='--fields'
+        )
+    return {field: get_field(record, field) for field in fields}
+
+
+def project_records(records, fields=None):
+    if not fields:
+        return records
+    if isinstance(records, list):
+        return [project(record, fields) for record in records]
+    return project(records, fields)
+
+
+def serialize_json(records, fields=None):
+    return dumps(project_records(records, fields))
+
+
+def serialize_ndjson(records, fields=None):
+    """Yield each record as a line of JSON, so that records can be printed as
+    soon as they are listed instead of once the whole listing is done."""
+    for record in records:
+        yield dumps(project(record, fields))
+
+
+def _cell_type(cell):
+    # the type tabulate aligns a cell as: numbers are right or decimal
+    # aligned, anything else is left aligned
+    if cell is None:
+        return None
+    if isinstance(cell, bool):
+        return str
+    for type_ in (int, float):
+        if isinstance(cell, type_):
+            return type_
+        if isinstance(cell, str):
+            try:
+                type_(cell)
+                return type_
+            except ValueError:
+                pass
+    return str
+
+
+def _column_type(cells):
+    types = {_cell_type(cell) for cell in cells} - {None}
+    if types == {int}:
+        return int
+    if types and str not in types:
+        return float
+    return str
+
+
+def _format_cell(cell):
+    return '' if cell is None else str(cell)
+
+
+def _gen_table_layout(headers, widths, colalign, tablefmt):
+    # render two rows of markers, then split the lines into what goes above,
+    # between and below the rows, and the text around the cells of a row.
+    # Table borders have no capital letters, so markers are capital letters
+    # that are not in the headers either.
+    text = ''.join(str(header) for header in headers)
+    first_marker, second_marker = [c for c in string.ascii_uppercase if c not in text][:2]
+    rows = [[first_marker * width for width in widths], [second_marker * width for width in widths]]
+    lines = tabulate(
+        rows, headers, tablefmt=tablefmt, colalign=colalign, disable_numparse=True
+    ).split('\n')
+    first = next(i for i, line in enumerate(lines) if all(cell in line for cell in rows[0]))
+    second = next(i for i, line in enumerate(lines) if all(cell in line for cell in rows[1]))
+    template, position = [], 0
+    for cell in rows[0]:
+        start = lines[first].index(cell, position)
+        template.append(lines[first][position:start])
+        position = start + len(cell)
+    template.append(lines[first][position:])
+    return lines[:first], template, lines[first + 1 : second], lines[second + 1 :]
+
+
+def serialize_table(
+    rows, headers, showindex=False, tablefmt='plain', widths=None, sample_size=TABLE_SAMPLE_SIZE
+):
+    """Yield the lines of a table as its rows are produced.
+
+    Unlike ``tabulate``, which scans every row before printing anything, the
+    columns are sized from the first ``sample_size`` rows, or given as fixed
+    ``widths``. Cells wider than their column are not cut, they push the rest
+    of their row to the right. ``headers``, ``showindex`` and ``tablefmt``
+    are those of ``tabulate``, and so is the output as long as the sample is
+    representative. Integer columns, such as the index, are right aligned and
+    other columns left aligned.
+
+    Tables that cannot be streamed are rendered whole by ``tabulate``: empty
+    tables, formats that escape or center cells such as html, and samples
+    with multi-line cells or decimal numbers.
+    """
+    rows = iter(rows)
+    index = showindex == 'always' or showindex is True
+    if index:
+        rows = ([i, *row] for i, row in enumerate(rows))
+    if tablefmt in UNSTREAMED_TABLE_FORMATS:
+        yield from tabulate(list(rows), headers, tablefmt=tablefmt).split('\n')
+        return
+    sample = list(islice(rows, sample_size if widths is None else 1))
+    if not sample:
+        yield from tabulate([], headers, tablefmt=tablefmt).split('\n')
+        return
+    ncols = max([len(headers)] + [len(row) for row in sample])
+    if widths is None:
+        columns = [[row[i] for row in sample if i < len(row)] for i in range(ncols)]
+        types = [_column_type(column) for column in columns]
+        multiline = any('\n' in _format_cell(cell) for column in columns for cell in column)
+        if multiline or float in types:
+            yield from tabulate(list(chain(sample, rows)), headers, tablefmt=tablefmt).split('\n')
+            return
+        widths = [max([0] + [len(_format_cell(cell)) for cell in column]) for column in columns]
+    else:
+        types = [int if i == 0 and index else str for i in range(ncols)]
+    # like tabulate, short headers name the last columns
+    headers = [''] * (ncols - len(headers)) + [str(header) for header in headers]
+    widths = list(widths) + [0] * (ncols - len(widths))
+    widths = [max(width, len(header), 1) for width, header in zip(widths, headers)]
+    colalign = ['right' if type_ is int else 'left' for type_ in types]
+    head, template, between, tail = _gen_table_layout(headers, widths, colalign, tablefmt)
+    yield from head
+    for i, row in enumerate(chain(sample, rows)):
+        if i:
+            yield from between
+        cells = [_format_cell(cell) for cell in row]
+        cells += [''] * (ncols - len(cells))
+        # rows past the sample may still hold multi-line cells
+        if tablefmt in multiline_formats:
+            cells = [cell.split('\n') for cell in cells]
+        else:
+            cells = [[cell] for cell in cells]
+        # the lines of a cell wider than its column all push the row right
+        row_widths = [
+            max([width] + [len(line) for line in cell]) for cell, width in zip(cells, widths)
+        ]
+        for line_cells in zip_longest(*cells, fillvalue=''):
+            line_cells = [
+                cell.rjust(width) if align == 'right' else cell.ljust(width)
+                for cell, width, align in zip(line_cells, row_widths, colalign)
+            ]
+            line = ''.join(chain.from_iterable(zip(template, line_cells))) + template[-1]
+            # like tabulate, which does not pad the last column when nothing follows it
+            yield line.rstrip() if not template[-1].strip() else line
+    yield from tail
+
+
+def _parse_fields(ctx, param, value):
+    if not value:
+        return None
+    fields = [field.strip() for fields in value for field in fields.split(',') if field.strip()]
+    # a leading dot is optional, as in jq
+    fields = [field[1:] if field.startswith('.') else field for field in fields]
+    try:
+        for field in fields:
+            parse_field_path(field)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return fields
+
+
+def common_format_options(func):
+    func = click.option(
+        '--format',
+        type=click.Choice(['json', NDJSON], case_sensitive=False),
+        default='json',
+        show_default=True,
+        help='output format; ndjson prints one record per line as records arrive',
+    )(func)
+    return click.option(
+        '--fields',
+        multiple=True,
+        callback=_parse_fields,
+        help='comma-separated jq-like paths of the fields to keep in each record, e.g. name,attributes[].value',
+    )(func)
@@ -0,0 +1,101 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+from apigee import APIGEE_CLI_MAX_RETRIES, APIGEE_CLI_MAX_WORKERS, APIGEE_CLI_RATE_LIMIT
+
+# statuses retried by the shared session, honouring any Retry-After header
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    """Token bucket shared by every thread sending requests through a session.
+
+    A ``rate`` of 0 disables the limit.
+    """
+
+    def __init__(self, rate=0, burst=None):
+        self._lock = threading.Lock()
+        self.set_rate(rate, burst=burst)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self._rate = rate
+            self._burst = burst or max(rate, 1)
+            self._tokens = self._burst
+            self._last = time.monotonic()
+
+    def acquire(self):
+        """Wait for a token and return the seconds waited."""
+        with self._lock:
+            if not self._rate:
+                return 0
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            # callers reserve their token up front, so waits queue up fairly
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    def __init__(self, rate_limiter, *args, **kwargs):
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        wait = self.rate_limiter.acquire()
+        resp = super().send(request, *args, **kwargs)
+        resp.rate_limit_wait = wait
+        return resp
+
+
+rate_limiter = RateLimiter(APIGEE_CLI_RATE_LIMIT)
+
+
+def gen_retry(retries=APIGEE_CLI_MAX_RETRIES, backoff_factor=0.3):
+    # only idempotent methods are retried, so imports and deploys are sent
+    # once, and the last response is returned rather than raised when the
+    # retries run out, for callers to handle as before
+    return Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+
+
+def _gen_adapter(pool_maxsize=APIGEE_CLI_MAX_WORKERS, retries=APIGEE_CLI_MAX_RETRIES):
+    return RateLimitedAdapter(
+        rate_limiter,
+        pool_connections=4,
+        pool_maxsize=max(pool_maxsize, 1),
+        max_retries=gen_retry(retries),
+    )
+
+
+def gen_session(pool_maxsize=APIGEE_CLI_MAX_WORKERS, retries=APIGEE_CLI_MAX_RETRIES):
+    """Create a session that keeps connections to the Management API alive
+    between calls and can be shared by worker threads. Idempotent requests
+    are retried up to ``retries`` times."""
+    _session = requests.Session()
+    # Management API calls are stateless, do not let cookies leak between them
+    _session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = _gen_adapter(pool_maxsize=pool_maxsize, retries=retries)
+    _session.mount('https://', adapter)
+    _session.mount('http://', adapter)
+    return _session
+
+
+session = gen_session()
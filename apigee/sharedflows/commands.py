@@ -4,6 +4,7 @@ from click_option_group import RequiredMutuallyExclusiveOptionGroup, optgroup
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
 from apigee.sharedflows.sharedflows import Sharedflows
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
@@ -15,11 +16,21 @@ def sharedflows():
 
 
 def _get_a_list_of_shared_flows(
-    username, password, mfa_secret, token, zonename, org, profile, prefix=None, **kwargs
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    prefix=None,
+    format='json',
+    fields=None,
+    **kwargs
 ):
     return Sharedflows(
         gen_auth(username, password, mfa_secret, token, zonename), org
-    ).get_a_list_of_shared_flows(prefix=prefix)
+    ).get_a_list_of_shared_flows(prefix=prefix, format=format, fields=fields)
 
 
 @sharedflows.command(
@@ -29,18 +40,28 @@ def _get_a_list_of_shared_flows(
 @common_prefix_options
 @common_silent_options
 @common_verbose_options
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_get_a_list_of_shared_flows(*args, **kwargs))
+    console.echo_output(_get_a_list_of_shared_flows(*args, **kwargs))
 
 
 def _import_a_shared_flow(
-    username, password, mfa_secret, token, zonename, org, profile, file, name, **kwargs
+    username,
+    password,
+    mfa_secret,
+    token,
+    zonename,
+    org,
+    profile,
+    name,
+    file=None,
+    directory=None,
+    **kwargs
 ):
-    return (
-        Sharedflows(gen_auth(username, password, mfa_secret, token, zonename), org)
-        .import_a_shared_flow(file, name)
-        .text
-    )
+    sharedflow = Sharedflows(gen_auth(username, password, mfa_secret, token, zonename), org)
+    if directory:
+        return sharedflow.import_a_shared_flow_directory(directory, name).text
+    return sharedflow.import_a_shared_flow(file, name).text
 
 
 @sharedflows.command(
@@ -51,13 +72,21 @@ def _import_a_shared_flow(
 @common_prefix_options
 @common_silent_options
 @common_verbose_options
-@click.option(
+@optgroup.group(
+    'Bundle options', cls=RequiredMutuallyExclusiveOptionGroup, help='The bundle to import'
+)
+@optgroup.option(
     '-f',
     '--file',
     type=click.Path(exists=True, dir_okay=False, file_okay=True, resolve_path=False),
-    required=True,
     help='file path of the shared flow configuration in ZIP format',
 )
+@optgroup.option(
+    '-d',
+    '--directory',
+    type=click.Path(exists=True, dir_okay=True, file_okay=False, resolve_path=False),
+    help='directory with the sharedflowbundle/ bundle, built into a ZIP before importing',
+)
 @click.option('-n', '--name', help='name', required=True)
 def import_a_shared_flow(*args, **kwargs):
     console.echo(_import_a_shared_flow(*args, **kwargs))
@@ -100,6 +129,7 @@ def _deploy_a_shared_flow(
     override,
     delay,
     file,
+    directory=None,
     **kwargs
 ):
     return (
@@ -111,6 +141,7 @@ def _deploy_a_shared_flow(
             override=override,
             delay=delay,
             shared_flow_file=file,
+            shared_flow_directory=directory,
         )
         .text
     )
@@ -134,6 +165,12 @@ def _deploy_a_shared_flow(
     type=click.Path(exists=True, dir_okay=False, file_okay=True, resolve_path=False),
     help='file path of the shared flow configuration in ZIP format',
 )
+@optgroup.option(
+    '-d',
+    '--directory',
+    type=click.Path(exists=True, dir_okay=True, file_okay=False, resolve_path=False),
+    help='directory with the sharedflowbundle/ bundle, built into a ZIP before importing',
+)
 @optgroup.option('-r', '--revision-number', type=click.INT, help='revision number')
 @click.option(
     '--override/--no-override',
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class SharedflowsSerializer:
-    def serialize_details(self, sharedflows, format, prefix=None):
+    def serialize_details(self, sharedflows, format, prefix=None, fields=None):
         resp = sharedflows
         if format == 'text':
             return sharedflows.text
@@ -12,7 +12,9 @@ class SharedflowsSerializer:
                 sharedflow for sharedflow in sharedflows if sharedflow.startswith(prefix)
             ]
         if format == 'json':
-            return json.dumps(sharedflows)
+            return serialize_json(sharedflows, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(sharedflows, fields)
         elif format == 'table':
             pass
         return resp
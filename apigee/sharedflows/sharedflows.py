@@ -1,9 +1,10 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee.bundler import BundleBuilder
+from apigee.session import session
 from apigee.sharedflows.serializer import SharedflowsSerializer
 from apigee.utils import add_to_dict_if_exists
 
@@ -53,14 +54,14 @@ class Sharedflows:
     def org_name(self, value):
         self._org_name = value
 
-    def get_a_list_of_shared_flows(self, prefix=None):
+    def get_a_list_of_shared_flows(self, prefix=None, format='json', fields=None):
         uri = GET_A_LIST_OF_SHARED_FLOWS_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return SharedflowsSerializer().serialize_details(resp, 'json', prefix=prefix)
+        return SharedflowsSerializer().serialize_details(resp, format, prefix=prefix, fields=fields)
 
     def import_a_shared_flow(self, shared_flow_file, shared_flow_name):
         uri = IMPORT_A_SHARED_FLOW_PATH.format(api_url=APIGEE_ADMIN_API_URL, org=self._org_name)
@@ -69,12 +70,17 @@ class Sharedflows:
         )
         params = {'action': 'import', 'name': shared_flow_name}
         with open(shared_flow_file, 'rb') as f:
-            resp = requests.post(
+            resp = session.post(
                 uri, headers=hdrs, files={'file': ('sharedflow.zip', f)}, params=params
             )
         resp.raise_for_status()
         return resp
 
+    def import_a_shared_flow_directory(self, shared_flow_directory, shared_flow_name):
+        return self.import_a_shared_flow(
+            BundleBuilder(shared_flow_directory).build(), shared_flow_name
+        )
+
     # def export_a_shared_flow(self, shared_flow_name, revision_number):
     #     pass
 
@@ -83,7 +89,7 @@ class Sharedflows:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, shared_flow_name=shared_flow_name
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -95,6 +101,7 @@ class Sharedflows:
         override=False,
         delay=0,
         shared_flow_file=None,
+        shared_flow_directory=None,
     ):
         do_deployments_exist = False
         try:
@@ -103,6 +110,8 @@ class Sharedflows:
         except HTTPError as e:
             if e.response.status_code != 404:
                 raise e
+        if shared_flow_directory:
+            shared_flow_file = BundleBuilder(shared_flow_directory).build()
         if shared_flow_file:
             revision_number = int(
                 self.import_a_shared_flow(shared_flow_file, shared_flow_name).json()['revision']
@@ -118,7 +127,7 @@ class Sharedflows:
         params = add_to_dict_if_exists(options_dict)
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
         console.echo(f'Deploying revision {revision_number}... ', end='', flush=True)
-        resp = requests.post(uri, headers=hdrs, params=params)
+        resp = session.post(uri, headers=hdrs, params=params)
         resp.raise_for_status()
         console.echo('Done')
         if do_deployments_exist:
@@ -154,7 +163,7 @@ class Sharedflows:
             revision_number=revision_number,
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -166,7 +175,7 @@ class Sharedflows:
             revision_number=revision_number,
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -187,7 +196,7 @@ class Sharedflows:
             flow_hook=flow_hook,
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -196,7 +205,7 @@ class Sharedflows:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, shared_flow_name=shared_flow_name
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -205,6 +214,6 @@ class Sharedflows:
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, shared_flow_name=shared_flow_name
         )
         hdrs = auth.set_header(self._auth, {'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
@@ -0,0 +1,143 @@
+import click
+
+from apigee.standin.org import DEFAULT_ENVIRONMENTS, DEFAULT_USERNAME, generate_org
+from apigee.standin.server import StandinServer
+
+CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
+
+
+@click.command(context_settings=CONTEXT_SETTINGS)
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=click.INT, default=8080, show_default=True)
+@click.option('-o', '--org', default='org', show_default=True, help='organization name')
+@click.option(
+    '-e',
+    '--environments',
+    multiple=True,
+    default=DEFAULT_ENVIRONMENTS,
+    show_default=True,
+    help='environment names',
+)
+@click.option('--proxies', type=click.INT, default=10, show_default=True)
+@click.option(
+    '--revisions', type=click.INT, default=2, show_default=True, help='revisions per proxy'
+)
+@click.option('--sharedflows', type=click.INT, default=2, show_default=True)
+@click.option('--developers', type=click.INT, default=100, show_default=True)
+@click.option('--apps-per-developer', type=click.INT, default=2, show_default=True)
+@click.option('--apiproducts', type=click.INT, default=10, show_default=True)
+@click.option(
+    '--keyvaluemaps', type=click.INT, default=4, show_default=True, help='maps per environment'
+)
+@click.option(
+    '--kvm-entries', type=click.INT, default=100, show_default=True, help='entries per map'
+)
+@click.option('--targetservers', type=click.INT, default=4, show_default=True)
+@click.option('--caches', type=click.INT, default=4, show_default=True)
+@click.option('--userroles', type=click.INT, default=2, show_default=True)
+@click.option(
+    '--username',
+    default=DEFAULT_USERNAME,
+    show_default=True,
+    help='user whose developer team attribute allows every generated resource',
+)
+@click.option(
+    '--seed', type=click.INT, default=0, show_default=True, help='seed of the generated data'
+)
+@click.option(
+    '--latency', type=click.FLOAT, default=0, show_default=True, help='seconds each request waits'
+)
+@click.option(
+    '--jitter',
+    type=click.FLOAT,
+    default=0,
+    show_default=True,
+    help='up to this many more seconds each request waits',
+)
+@click.option(
+    '--throttle-rate',
+    type=click.FloatRange(0, 1),
+    default=0,
+    show_default=True,
+    help='fraction of requests failing with 429 Too Many Requests',
+)
+@click.option(
+    '--error-rate',
+    type=click.FloatRange(0, 1),
+    default=0,
+    show_default=True,
+    help='fraction of requests failing with a 5xx server error',
+)
+@click.option('-v', '--verbose', is_flag=True, help='log every request')
+def standin(
+    host,
+    port,
+    org,
+    environments,
+    proxies,
+    revisions,
+    sharedflows,
+    developers,
+    apps_per_developer,
+    apiproducts,
+    keyvaluemaps,
+    kvm_entries,
+    targetservers,
+    caches,
+    userroles,
+    username,
+    seed,
+    latency,
+    jitter,
+    throttle_rate,
+    error_rate,
+    verbose,
+):
+    """Serve a synthetic organization from a local stand-in for the Management API.
+
+    \b
+    Point the CLI at it with:
+        export APIGEE_ADMIN_API_URL=http://127.0.0.1:8080
+        export APIGEE_OAUTH_URL=http://127.0.0.1:8080/oauth/token
+    """
+    click.echo('Generating organization... ', nl=False, err=True)
+    generated = generate_org(
+        name=org,
+        environments=environments,
+        proxies=proxies,
+        revisions=revisions,
+        sharedflows=sharedflows,
+        developers=developers,
+        apps_per_developer=apps_per_developer,
+        apiproducts=apiproducts,
+        keyvaluemaps=keyvaluemaps,
+        kvm_entries=kvm_entries,
+        targetservers=targetservers,
+        caches=caches,
+        userroles=userroles,
+        username=username,
+        seed=seed,
+    )
+    click.echo('Done', err=True)
+    server = StandinServer(
+        (host, port),
+        generated,
+        latency=latency,
+        jitter=jitter,
+        throttle_rate=throttle_rate,
+        error_rate=error_rate,
+        seed=seed,
+        username=username,
+        verbose=verbose,
+    )
+    click.echo(f'Serving organization {org} on {server.url}', err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    standin()  # pragma: no cover
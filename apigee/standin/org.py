@@ -0,0 +1,296 @@
+import io
+import random
+import threading
+import time
+import uuid
+import zipfile
+from functools import lru_cache
+
+DEFAULT_ENVIRONMENTS = ('test', 'prod')
+# collections of named resources scoped to an environment
+ENVIRONMENT_RESOURCES = (
+    'keyvaluemaps',
+    'targetservers',
+    'caches',
+    'references',
+    'virtualhosts',
+    'keystores',
+)
+DEFAULT_USERNAME = 'admin@example.com'
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# milliseconds between the creation of consecutive generated revisions
+REVISION_INTERVAL = 24 * 60 * 60 * 1000
+
+
+def _gen_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+def _gen_key(rng, size=32):
+    return ''.join(rng.choice('0123456789abcdefABCDEF') for _ in range(size))
+
+
+@lru_cache(maxsize=256)
+def build_proxy_bundle(
+    name, revision, keyvaluemaps=(), targetservers=(), caches=(), kind='apiproxy'
+):
+    """Return a zipped bundle whose policies and target endpoint refer to the
+    given key value maps, target servers and caches, like those exported
+    from the Management API."""
+    policies = {}
+    for kvm in keyvaluemaps:
+        policies[f'KVM-{kvm}'] = (
+            f'<KeyValueMapOperations name="KVM-{kvm}" mapIdentifier="{kvm}">\n'
+            '    <Scope>environment</Scope>\n'
+            '    <Get assignTo="private.value"><Key><Parameter>key</Parameter></Key></Get>\n'
+            '</KeyValueMapOperations>\n'
+        )
+    for cache in caches:
+        policies[f'RC-{cache}'] = (
+            f'<ResponseCache name="RC-{cache}">\n'
+            '    <CacheKey><KeyFragment ref="request.uri"/></CacheKey>\n'
+            f'    <CacheResource>{cache}</CacheResource>\n'
+            '    <ExpirySettings><TimeoutInSec>300</TimeoutInSec></ExpirySettings>\n'
+            '</ResponseCache>\n'
+        )
+    steps = ''.join(f'<Step><Name>{policy}</Name></Step>' for policy in policies)
+    servers = ''.join(f'<Server name="{server}"/>' for server in targetservers)
+    files = {
+        f'{name}.xml': (
+            f'<APIProxy revision="{revision}" name="{name}">\n'
+            f'    <Policies>{"".join(f"<Policy>{p}</Policy>" for p in policies)}</Policies>\n'
+            '    <ProxyEndpoints><ProxyEndpoint>default</ProxyEndpoint></ProxyEndpoints>\n'
+            '    <TargetEndpoints><TargetEndpoint>default</TargetEndpoint></TargetEndpoints>\n'
+            '</APIProxy>\n'
+        ),
+        'proxies/default.xml': (
+            '<ProxyEndpoint name="default">\n'
+            f'    <PreFlow name="PreFlow"><Request>{steps}</Request></PreFlow>\n'
+            '    <HTTPProxyConnection>\n'
+            f'        <BasePath>/{name}</BasePath>\n'
+            '        <VirtualHost>secure</VirtualHost>\n'
+            '    </HTTPProxyConnection>\n'
+            '    <RouteRule name="default"><TargetEndpoint>default</TargetEndpoint></RouteRule>\n'
+            '</ProxyEndpoint>\n'
+        ),
+        'targets/default.xml': (
+            '<TargetEndpoint name="default">\n'
+            '    <HTTPTargetConnection>\n'
+            f'        <LoadBalancer>{servers}</LoadBalancer>\n'
+            '        <Path>/</Path>\n'
+            '    </HTTPTargetConnection>\n'
+            '</TargetEndpoint>\n'
+        ),
+        'resources/jsc/script.js': f'// {name} revision {revision}\n' + 'var x = 1;\n' * 64,
+    }
+    files.update({f'policies/{policy}.xml': body for policy, body in policies.items()})
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path, body in sorted(files.items()):
+            zf.writestr(zipfile.ZipInfo(f'{kind}/{path}', date_time=ZIP_DATE_TIME), body)
+    return buffer.getvalue()
+
+
+class Org:
+    """In-memory state of an organization served by the stand-in server.
+
+    Handlers of concurrent requests share it and hold ``lock`` while they
+    read or change it.
+    """
+
+    def __init__(self, name='org', environments=DEFAULT_ENVIRONMENTS):
+        self.name = name
+        self.environments = list(environments)
+        self.lock = threading.RLock()
+        # API proxies and shared flows: name -> revision -> bundle, None for
+        # bundles generated on export from their dependencies
+        self.apis = {}
+        self.sharedflows = {}
+        self.dependencies = {}
+        # (kind, name, revision) -> creation time in milliseconds
+        self.revisions_created_at = {}
+        # (kind, environment, name) -> revision -> base path
+        self.deployments = {}
+        self.developers = {}
+        self.apps = {}
+        self.apiproducts = {}
+        self.userroles = {}
+        self.resources = {
+            environment: {resource: {} for resource in ENVIRONMENT_RESOURCES}
+            for environment in self.environments
+        }
+        self.created_at = int(time.time() * 1000)
+
+    def get_bundle(self, kind, name, revision):
+        bundles = self.apis if kind == 'apiproxy' else self.sharedflows
+        bundle = bundles[name][revision]
+        if bundle is None:
+            return build_proxy_bundle(name, revision, *self.dependencies.get(name, ()), kind=kind)
+        return bundle
+
+    def add_revision(self, kind, name, bundle=None, created_at=None):
+        bundles = self.apis if kind == 'apiproxy' else self.sharedflows
+        revisions = bundles.setdefault(name, {})
+        revision = str(max(map(int, revisions), default=0) + 1)
+        revisions[revision] = bundle
+        self.revisions_created_at[(kind, name, revision)] = (
+            int(time.time() * 1000) if created_at is None else created_at
+        )
+        return revision
+
+    def delete_revision(self, kind, name, revision):
+        bundles = self.apis if kind == 'apiproxy' else self.sharedflows
+        bundles[name].pop(revision)
+        self.revisions_created_at.pop((kind, name, revision), None)
+
+    def deploy(self, kind, environment, name, revision, base_path='/', override=False):
+        deployed = self.deployments.setdefault((kind, environment, name), {})
+        if override:
+            deployed.clear()
+        deployed[revision] = base_path
+
+    def find_developer(self, developer):
+        """Return the developer with an email or ID."""
+        if developer in self.developers:
+            return self.developers[developer]
+        for details in self.developers.values():
+            if details['developerId'] == developer:
+                return details
+        return None
+
+
+def generate_org(
+    name='org',
+    environments=DEFAULT_ENVIRONMENTS,
+    proxies=10,
+    revisions=2,
+    sharedflows=2,
+    developers=100,
+    apps_per_developer=2,
+    apiproducts=10,
+    keyvaluemaps=4,
+    kvm_entries=100,
+    targetservers=4,
+    caches=4,
+    userroles=2,
+    username=DEFAULT_USERNAME,
+    seed=0,
+):
+    """Generate an organization with ``proxies`` API proxies of ``revisions``
+    revisions each, the latest deployed to every environment, ``developers``
+    developers with ``apps_per_developer`` apps each, and in every
+    environment ``keyvaluemaps`` maps of ``kvm_entries`` entries.
+
+    The same arguments always generate the same organization. ``username``
+    gets a developer whose team attribute allows every generated resource.
+    """
+    rng = random.Random(seed)
+    org = Org(name, environments)
+    kvm_names = [f'kvm-{i:03d}' for i in range(keyvaluemaps)]
+    targetserver_names = [f'ts-{i:03d}' for i in range(targetservers)]
+    cache_names = [f'cache-{i:03d}' for i in range(caches)]
+    for environment in org.environments:
+        resources = org.resources[environment]
+        for kvm in kvm_names:
+            resources['keyvaluemaps'][kvm] = {
+                'name': kvm,
+                'encrypted': False,
+                'entry': {f'key-{j:06d}': _gen_key(rng) for j in range(kvm_entries)},
+            }
+        for i, targetserver in enumerate(targetserver_names):
+            resources['targetservers'][targetserver] = {
+                'name': targetserver,
+                'host': f'backend-{i}.{environment}.example.com',
+                'port': 443,
+                'isEnabled': True,
+                'sSLInfo': {'enabled': 'true', 'clientAuthEnabled': 'false'},
+            }
+        for cache in cache_names:
+            resources['caches'][cache] = {
+                'name': cache,
+                'description': '',
+                'expirySettings': {'timeoutInSec': {'value': '300'}, 'valuesNull': False},
+                'skipCacheIfElementSizeInKBExceeds': '512',
+            }
+    for i in range(proxies):
+        api = f'proxy-{i:04d}'
+        org.dependencies[api] = (
+            tuple(rng.sample(kvm_names, min(1, len(kvm_names)))),
+            tuple(rng.sample(targetserver_names, min(1, len(targetserver_names)))),
+            tuple(rng.sample(cache_names, min(1, len(cache_names)))),
+        )
+        for j in range(revisions):
+            # one revision a day, the latest created with the organization
+            created_at = org.created_at - (revisions - 1 - j) * REVISION_INTERVAL
+            revision = org.add_revision('apiproxy', api, created_at=created_at)
+        for environment in org.environments if revisions else ():
+            org.deploy('apiproxy', environment, api, revision, base_path=f'/{api}')
+    for i in range(sharedflows):
+        sharedflow = f'sharedflow-{i:03d}'
+        revision = org.add_revision('sharedflow', sharedflow, created_at=org.created_at)
+        for environment in org.environments:
+            org.deploy('sharedflow', environment, sharedflow, revision)
+    for i in range(apiproducts):
+        product = f'product-{i:04d}'
+        org.apiproducts[product] = {
+            'name': product,
+            'displayName': product,
+            'approvalType': 'auto',
+            'environments': list(org.environments),
+            'proxies': sorted(rng.sample(sorted(org.apis), min(2, len(org.apis)))),
+            'scopes': [],
+            'attributes': [{'name': 'access', 'value': 'public'}],
+        }
+    teams = ','.join(['proxy-', 'sharedflow-', 'kvm-', 'ts-', 'cache-', 'product-', 'role-'])
+    emails = [f'developer-{i:05d}@example.com' for i in range(developers)]
+    for email in emails + [username]:
+        org.developers[email] = {
+            'email': email,
+            'developerId': _gen_uuid(rng),
+            'firstName': email.split('@')[0],
+            'lastName': 'Example',
+            'userName': email.split('@')[0],
+            'organizationName': name,
+            'status': 'active',
+            'attributes': [{'name': 'team', 'value': teams}] if email == username else [],
+            'apps': [],
+        }
+    products = sorted(org.apiproducts)
+    for email in emails:
+        developer = org.developers[email]
+        for j in range(apps_per_developer):
+            app_id = _gen_uuid(rng)
+            app = f'app-{j:02d}-{email.split("@")[0]}'
+            org.apps[app_id] = {
+                'appId': app_id,
+                'name': app,
+                'developerId': developer['developerId'],
+                'status': 'approved',
+                'attributes': [],
+                'callbackUrl': '',
+                'credentials': [
+                    {
+                        'consumerKey': _gen_key(rng),
+                        'consumerSecret': _gen_key(rng, 16),
+                        'apiProducts': [
+                            {'apiproduct': product, 'status': 'approved'}
+                            for product in rng.sample(products, min(1, len(products)))
+                        ],
+                        'status': 'approved',
+                        'expiresAt': -1,
+                        'scopes': [],
+                        'attributes': [],
+                    }
+                ],
+            }
+            developer['apps'].append(app)
+    for i in range(userroles):
+        role = f'role-{i:02d}'
+        org.userroles[role] = {
+            'users': [username],
+            'resourcePermission': [
+                {'organization': name, 'path': '/', 'permissions': ['get']},
+                {'organization': name, 'path': '/apis/proxy-*', 'permissions': ['get', 'put']},
+            ],
+        }
+    return org
@@ -0,0 +1,939 @@
+import base64
+import hashlib
+import hmac
+import io
+import json
+import random
+import re
+import struct
+import threading
+import time
+import urllib.parse
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apigee.standin.org import DEFAULT_USERNAME, ENVIRONMENT_RESOURCES
+
+ORG_PATH = r'/v1/(?:organizations|o)/(?P<org>[^/]+)'
+# route parameters that only match some values
+PARAMETERS = {
+    'kind': '(?P<kind>apis|sharedflows)',
+    'resource': f'(?P<resource>{"|".join(ENVIRONMENT_RESOURCES)})',
+}
+SERVER_ERRORS = (500, 502, 503, 504)
+TOKEN_SECRET = b'apigee-standin'
+TOKEN_TTL = 1800
+
+
+class StandinError(Exception):
+    def __init__(self, status, message, code='standin.Error'):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+    @property
+    def body(self):
+        return {'code': self.code, 'message': str(self), 'contexts': []}
+
+
+def not_found(kind, name):
+    return StandinError(404, f'{kind} {name} does not exist', code=f'standin.{kind}DoesNotExist')
+
+
+def _page(names, startkey='', count=1000):
+    """Page of the sorted names, from ``startkey`` included, like the
+    Management API."""
+    return [name for name in sorted(names) if name >= startkey][: int(count)]
+
+
+def _is_true(value):
+    return str(value).lower() == 'true'
+
+
+def _extract_zip(body):
+    """Return the zip archive of a bundle uploaded as is or in a multipart
+    form."""
+    start = body.find(b'PK\x03\x04')
+    end = body.rfind(b'PK\x05\x06')
+    if start < 0 or end < 0:
+        raise StandinError(400, 'Invalid bundle', code='standin.InvalidBundle')
+    (comment_size,) = struct.unpack('<H', body[end + 20 : end + 22])
+    return body[start : end + 22 + comment_size]
+
+
+def _get_base_path(bundle):
+    with zipfile.ZipFile(io.BytesIO(bundle)) as zf:
+        for name in zf.namelist():
+            if '/proxies/' in name:
+                match = re.search(rb'<BasePath>([^<]*)</BasePath>', zf.read(name))
+                if match:
+                    return match.group(1).decode()
+    return None
+
+
+def gen_token(username, ttl=TOKEN_TTL):
+    """Return a signed JWT like those of the Apigee OAuth server."""
+
+    def _encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=')
+
+    now = int(time.time())
+    payload = {'email': username, 'user_name': username, 'iat': now, 'exp': now + ttl}
+    signing_input = _encode({'alg': 'HS256', 'typ': 'JWT'}) + b'.' + _encode(payload)
+    signature = hmac.new(TOKEN_SECRET, signing_input, hashlib.sha256).digest()
+    return (signing_input + b'.' + base64.urlsafe_b64encode(signature).rstrip(b'=')).decode()
+
+
+class ManagementApi:
+    """The Management API endpoints the CLI uses, served from an :class:`Org`.
+
+    Each method takes the query parameters, the request body and the
+    parameters of its route, and returns a status and a body: JSON data,
+    bytes or None.
+    """
+
+    def __init__(self, org):
+        self.org = org
+
+    def _get_bundles(self, kind, name):
+        bundles = self.org.apis if kind == 'apis' else self.org.sharedflows
+        if name not in bundles:
+            raise not_found('ApiProxy' if kind == 'apis' else 'SharedFlow', name)
+        return bundles[name]
+
+    def _get_revision(self, kind, name, revision):
+        if revision not in self._get_bundles(kind, name):
+            raise not_found('Revision', f'{revision} of {name}')
+        return revision
+
+    @staticmethod
+    def _kind(kind):
+        return 'apiproxy' if kind == 'apis' else 'sharedflow'
+
+    def _metadata(self):
+        return {
+            'createdAt': self.org.created_at,
+            'createdBy': 'standin',
+            'lastModifiedAt': self.org.created_at,
+            'lastModifiedBy': 'standin',
+            'subType': 'Proxy',
+        }
+
+    # API proxies and shared flows
+
+    def list_bundles(self, query, body, kind):
+        bundles = self.org.apis if kind == 'apis' else self.org.sharedflows
+        if not _is_true(query.get('includeRevisions')):
+            return 200, sorted(bundles)
+        details = []
+        for name in sorted(bundles):
+            detail = {'name': name, 'revision': list(bundles[name])}
+            if _is_true(query.get('includeMetaData')):
+                detail['metaData'] = self._metadata()
+            details.append(detail)
+        return 200, details
+
+    def import_bundle(self, query, body, kind):
+        if query.get('action') != 'import' or not query.get('name'):
+            raise StandinError(400, 'Only imports are supported', code='standin.InvalidAction')
+        name = query['name']
+        revision = self.org.add_revision(self._kind(kind), name, _extract_zip(body))
+        created_at = self.org.revisions_created_at[(self._kind(kind), name, revision)]
+        return 201, {'name': name, 'revision': revision, 'createdAt': created_at}
+
+    def get_bundle(self, query, body, kind, name):
+        return 200, {'name': name, 'revision': list(self._get_bundles(kind, name))}
+
+    def delete_bundle(self, query, body, kind, name):
+        self._get_bundles(kind, name)
+        for environment in self.org.environments:
+            if self.org.deployments.get((self._kind(kind), environment, name)):
+                raise StandinError(400, f'{name} is deployed', code='standin.DeploymentExists')
+        (self.org.apis if kind == 'apis' else self.org.sharedflows).pop(name)
+        return 200, {'name': name}
+
+    def list_revisions(self, query, body, kind, name):
+        return 200, list(self._get_bundles(kind, name))
+
+    def get_revision(self, query, body, kind, name, revision):
+        self._get_revision(kind, name, revision)
+        bundle = self.org.get_bundle(self._kind(kind), name, revision)
+        if query.get('format') == 'bundle':
+            return 200, bundle
+        created_at = self.org.revisions_created_at[(self._kind(kind), name, revision)]
+        return 200, {
+            'name': name,
+            'revision': revision,
+            'createdAt': created_at,
+            'createdBy': 'standin',
+            'lastModifiedAt': created_at,
+            'lastModifiedBy': 'standin',
+            'basepaths': [_get_base_path(bundle) or f'/{name}'],
+            'proxyEndpoints': ['default'],
+            'targetEndpoints': ['default'],
+            'type': 'Application',
+        }
+
+    def delete_revision(self, query, body, kind, name, revision):
+        self._get_revision(kind, name, revision)
+        for environment in self.org.environments:
+            if revision in self.org.deployments.get((self._kind(kind), environment, name), {}):
+                raise StandinError(
+                    400,
+                    f'Revision {revision} of {name} is deployed',
+                    code='standin.DeploymentExists',
+                )
+        self.org.delete_revision(self._kind(kind), name, revision)
+        return 200, {'name': name, 'revision': revision}
+
+    def _get_deployments(self, kind, name):
+        environments = []
+        for environment in self.org.environments:
+            deployed = self.org.deployments.get((self._kind(kind), environment, name))
+            if deployed:
+                environments.append(
+                    {
+                        'name': environment,
+                        'revision': [
+                            {
+                                'name': revision,
+                                'state': 'deployed',
+                                'configuration': {'basePath': base_path},
+                            }
+                            for revision, base_path in deployed.items()
+                        ],
+                    }
+                )
+        return environments
+
+    def get_deployments(self, query, body, kind, name):
+        self._get_bundles(kind, name)
+        environments = self._get_deployments(kind, name)
+        return 200, {'name': name, 'organization': self.org.name, 'environment': environments}
+
+    def get_revision_deployments(self, query, body, kind, name, revision):
+        self._get_revision(kind, name, revision)
+        environments = [
+            {'name': environment['name'], 'state': 'deployed'}
+            for environment in self._get_deployments(kind, name)
+            if any(r['name'] == revision for r in environment['revision'])
+        ]
+        return 200, {'name': revision, 'aPIProxy': name, 'environment': environments}
+
+    def deploy(self, query, body, kind, environment, name, revision):
+        self._get_environment(environment)
+        self._get_revision(kind, name, revision)
+        bundle = self.org.get_bundle(self._kind(kind), name, revision)
+        base_path = query.get('basepath') or _get_base_path(bundle) or f'/{name}'
+        self.org.deploy(
+            self._kind(kind),
+            environment,
+            name,
+            revision,
+            base_path=base_path,
+            override=_is_true(query.get('override')),
+        )
+        return 200, {
+            'aPIProxy': name,
+            'environment': environment,
+            'revision': revision,
+            'state': 'deployed',
+            'configuration': {'basePath': base_path},
+        }
+
+    def deploy_action(self, query, body, kind, name):
+        if query.get('action') != 'deploy' or not query.get('env'):
+            raise StandinError(400, 'Only deploys are supported', code='standin.InvalidAction')
+        return self.deploy(query, body, kind, query['env'], name, query.get('revision', ''))
+
+    def undeploy(self, query, body, kind, environment, name, revision):
+        deployed = self.org.deployments.get((self._kind(kind), environment, name), {})
+        if revision not in deployed:
+            raise StandinError(
+                400,
+                f'Revision {revision} of {name} is not deployed to {environment}',
+                code='standin.RevisionNotDeployed',
+            )
+        deployed.pop(revision)
+        return 200, {'aPIProxy': name, 'environment': environment, 'revision': revision}
+
+    def force_undeploy(self, query, body, kind, name, revision):
+        return self.undeploy(query, body, kind, query.get('env'), name, revision)
+
+    # environments
+
+    def _get_environment(self, environment):
+        if environment not in self.org.resources:
+            raise not_found('Environment', environment)
+        return self.org.resources[environment]
+
+    def list_environments(self, query, body):
+        return 200, self.org.environments
+
+    def get_environment_deployments(self, query, body, environment):
+        self._get_environment(environment)
+        kind = 'sharedflow' if _is_true(query.get('sharedFlows')) else 'apiproxy'
+        deployments = []
+        for (deployed_kind, deployed_environment, name), deployed in sorted(
+            self.org.deployments.items()
+        ):
+            if deployed_kind == kind and deployed_environment == environment and deployed:
+                deployments.append(
+                    {
+                        'name': name,
+                        'revision': [
+                            {
+                                'name': revision,
+                                'state': 'deployed',
+                                'configuration': {'basePath': base_path},
+                            }
+                            for revision, base_path in deployed.items()
+                        ],
+                    }
+                )
+        return 200, {'name': environment, 'aPIProxy': deployments}
+
+    # resources of environments: key value maps, target servers, caches...
+
+    @staticmethod
+    def _serialize_resource(resource, details):
+        if resource == 'keyvaluemaps':
+            entries = [{'name': k, 'value': v} for k, v in details['entry'].items()]
+            return dict(details, entry=entries)
+        return details
+
+    @staticmethod
+    def _deserialize_resource(resource, details):
+        if resource == 'keyvaluemaps':
+            entries = {entry['name']: entry['value'] for entry in details.get('entry', [])}
+            return {
+                'name': details['name'],
+                'encrypted': details.get('encrypted', False),
+                'entry': entries,
+            }
+        return details
+
+    def _get_resource(self, environment, resource, name):
+        resources = self._get_environment(environment)[resource]
+        if name not in resources:
+            raise not_found(resource[:-1].capitalize(), name)
+        return resources[name]
+
+    def list_resources(self, query, body, environment, resource):
+        return 200, sorted(self._get_environment(environment)[resource])
+
+    def create_resource(self, query, body, environment, resource):
+        details = json.loads(body)
+        resources = self._get_environment(environment)[resource]
+        if details.get('name') in resources:
+            raise StandinError(
+                409, f'{details.get("name")} already exists', code='standin.AlreadyExists'
+            )
+        resources[details['name']] = self._deserialize_resource(resource, details)
+        return 201, self._serialize_resource(resource, resources[details['name']])
+
+    def get_resource(self, query, body, environment, resource, name):
+        return 200, self._serialize_resource(
+            resource, self._get_resource(environment, resource, name)
+        )
+
+    def update_resource(self, query, body, environment, resource, name):
+        self._get_resource(environment, resource, name)
+        details = dict(json.loads(body), name=name)
+        self._get_environment(environment)[resource][name] = self._deserialize_resource(
+            resource, details
+        )
+        return 200, self._serialize_resource(
+            resource, self._get_resource(environment, resource, name)
+        )
+
+    def delete_resource(self, query, body, environment, resource, name):
+        details = self._get_resource(environment, resource, name)
+        self._get_environment(environment)[resource].pop(name)
+        return 200, self._serialize_resource(resource, details)
+
+    def list_kvm_keys(self, query, body, environment, name):
+        entries = self._get_resource(environment, 'keyvaluemaps', name)['entry']
+        return 200, _page(entries, query.get('startkey', ''), query.get('count', 100))
+
+    def create_kvm_entry(self, query, body, environment, name):
+        entry = json.loads(body)
+        entries = self._get_resource(environment, 'keyvaluemaps', name)['entry']
+        if entry['name'] in entries:
+            raise StandinError(
+                409, f'Entry {entry["name"]} already exists', code='standin.EntryAlreadyExists'
+            )
+        entries[entry['name']] = entry['value']
+        return 201, entry
+
+    def _get_kvm_entries(self, environment, name, entry):
+        entries = self._get_resource(environment, 'keyvaluemaps', name)['entry']
+        if entry not in entries:
+            raise not_found('Entry', entry)
+        return entries
+
+    def get_kvm_entry(self, query, body, environment, name, entry):
+        entries = self._get_kvm_entries(environment, name, entry)
+        return 200, {'name': entry, 'value': entries[entry]}
+
+    def update_kvm_entry(self, query, body, environment, name, entry):
+        entries = self._get_kvm_entries(environment, name, entry)
+        entries[entry] = json.loads(body)['value']
+        return 200, {'name': entry, 'value': entries[entry]}
+
+    def delete_kvm_entry(self, query, body, environment, name, entry):
+        entries = self._get_kvm_entries(environment, name, entry)
+        return 200, {'name': entry, 'value': entries.pop(entry)}
+
+    def clear_cache_entries(self, query, body, environment, name, entry=None):
+        self._get_resource(environment, 'caches', name)
+        return 200, None
+
+    # developers and their apps
+
+    def _get_developer(self, developer):
+        details = self.org.find_developer(developer)
+        if details is None:
+            raise not_found('Developer', developer)
+        return details
+
+    def list_developers(self, query, body):
+        if query.get('app'):
+            return 200, [
+                email
+                for email, details in sorted(self.org.developers.items())
+                if query['app'] in details['apps']
+            ]
+        emails = _page(self.org.developers, query.get('startKey', ''), query.get('count', 1000))
+        if _is_true(query.get('expand')):
+            return 200, {'developer': [self.org.developers[email] for email in emails]}
+        return 200, emails
+
+    def create_developer(self, query, body):
+        details = json.loads(body)
+        if details.get('email') in self.org.developers:
+            raise StandinError(
+                409, f'{details.get("email")} already exists', code='standin.DeveloperAlreadyExists'
+            )
+        details.setdefault('developerId', hashlib.md5(details['email'].encode()).hexdigest())
+        details.setdefault('attributes', [])
+        details.setdefault('status', 'active')
+        details['apps'] = []
+        self.org.developers[details['email']] = details
+        return 201, details
+
+    def get_developer(self, query, body, developer):
+        return 200, self._get_developer(developer)
+
+    def update_developer(self, query, body, developer):
+        details = self._get_developer(developer)
+        details.update(
+            {k: v for k, v in json.loads(body).items() if k not in ('apps', 'developerId')}
+        )
+        return 200, details
+
+    def set_developer_status(self, query, body, developer):
+        details = self._get_developer(developer)
+        if query.get('action') not in ('active', 'inactive'):
+            raise StandinError(400, 'Invalid action', code='standin.InvalidAction')
+        details['status'] = query['action']
+        return 204, None
+
+    def delete_developer(self, query, body, developer):
+        details = self._get_developer(developer)
+        for app_id in [
+            a for a, app in self.org.apps.items() if app['developerId'] == details['developerId']
+        ]:
+            self.org.apps.pop(app_id)
+        return 200, self.org.developers.pop(details['email'])
+
+    def get_developer_attributes(self, query, body, developer):
+        return 200, {'attribute': self._get_developer(developer)['attributes']}
+
+    def update_developer_attributes(self, query, body, developer):
+        details = self._get_developer(developer)
+        details['attributes'] = json.loads(body).get('attribute', [])
+        return 200, {'attribute': details['attributes']}
+
+    def _find_attribute(self, developer, attribute):
+        for details in self._get_developer(developer)['attributes']:
+            if details['name'] == attribute:
+                return details
+        raise not_found('Attribute', attribute)
+
+    def get_developer_attribute(self, query, body, developer, attribute):
+        return 200, self._find_attribute(developer, attribute)
+
+    def update_developer_attribute(self, query, body, developer, attribute):
+        value = json.loads(body)['value']
+        try:
+            self._find_attribute(developer, attribute)['value'] = value
+        except StandinError:
+            self._get_developer(developer)['attributes'].append({'name': attribute, 'value': value})
+        return 200, {'name': attribute, 'value': value}
+
+    def delete_developer_attribute(self, query, body, developer, attribute):
+        details = self._find_attribute(developer, attribute)
+        self._get_developer(developer)['attributes'].remove(details)
+        return 200, details
+
+    @staticmethod
+    def _serialize_app(app, include_credentials=True):
+        return app if include_credentials else {k: v for k, v in app.items() if k != 'credentials'}
+
+    def list_apps(self, query, body):
+        app_ids = _page(self.org.apps, query.get('startKey', ''), query.get('rows', 1000))
+        if _is_true(query.get('expand')):
+            include_credentials = _is_true(query.get('includeCred'))
+            return 200, {
+                'app': [self._serialize_app(self.org.apps[a], include_credentials) for a in app_ids]
+            }
+        return 200, app_ids
+
+    def _list_developer_apps(self, developer):
+        developer_id = self._get_developer(developer)['developerId']
+        return {
+            app['name']: app for app in self.org.apps.values() if app['developerId'] == developer_id
+        }
+
+    def _get_app(self, developer, name):
+        apps = self._list_developer_apps(developer)
+        if name not in apps:
+            raise not_found('App', name)
+        return apps[name]
+
+    def list_developer_apps(self, query, body, developer):
+        apps = self._list_developer_apps(developer)
+        if _is_true(query.get('expand')):
+            return 200, {'app': [apps[name] for name in sorted(apps)]}
+        return 200, _page(apps, query.get('startKey', ''), query.get('count', 1000))
+
+    def create_developer_app(self, query, body, developer):
+        details = json.loads(body)
+        developer_details = self._get_developer(developer)
+        if details.get('name') in self._list_developer_apps(developer):
+            raise StandinError(
+                409, f'{details.get("name")} already exists', code='standin.AppAlreadyExists'
+            )
+        seed = f'{developer_details["developerId"]}/{details["name"]}'
+        app_id = str(hashlib.md5(seed.encode()).hexdigest())
+        products = details.pop('apiProducts', [])
+        details.update(
+            appId=app_id,
+            developerId=developer_details['developerId'],
+            status='approved',
+            credentials=[
+                {
+                    'consumerKey': hashlib.sha1(f'{seed}/key'.encode()).hexdigest(),
+                    'consumerSecret': hashlib.md5(f'{seed}/secret'.encode()).hexdigest()[:16],
+                    'apiProducts': [{'apiproduct': p, 'status': 'approved'} for p in products],
+                    'status': 'approved',
+                    'expiresAt': -1,
+                }
+            ],
+        )
+        details.setdefault('attributes', [])
+        self.org.apps[app_id] = details
+        developer_details['apps'].append(details['name'])
+        return 201, details
+
+    def get_developer_app(self, query, body, developer, name):
+        return 200, self._get_app(developer, name)
+
+    def delete_developer_app(self, query, body, developer, name):
+        app = self._get_app(developer, name)
+        self.org.apps.pop(app['appId'])
+        self._get_developer(developer)['apps'].remove(name)
+        return 200, app
+
+    def create_app_key(self, query, body, developer, name):
+        app = self._get_app(developer, name)
+        details = json.loads(body)
+        credential = {
+            'consumerKey': details['consumerKey'],
+            'consumerSecret': details.get('consumerSecret', ''),
+            'apiProducts': [],
+            'status': 'approved',
+            'expiresAt': -1,
+        }
+        app['credentials'].append(credential)
+        return 201, credential
+
+    def _get_credential(self, developer, name, key):
+        for credential in self._get_app(developer, name)['credentials']:
+            if credential['consumerKey'] == key:
+                return credential
+        raise not_found('Key', key)
+
+    def get_app_key(self, query, body, developer, name, key):
+        return 200, self._get_credential(developer, name, key)
+
+    def update_app_key(self, query, body, developer, name, key):
+        credential = self._get_credential(developer, name, key)
+        for product in json.loads(body).get('apiProducts', []):
+            credential['apiProducts'].append({'apiproduct': product, 'status': 'approved'})
+        return 200, credential
+
+    def delete_app_key(self, query, body, developer, name, key):
+        credential = self._get_credential(developer, name, key)
+        self._get_app(developer, name)['credentials'].remove(credential)
+        return 200, credential
+
+    # API products
+
+    def _get_apiproduct(self, name):
+        if name not in self.org.apiproducts:
+            raise not_found('ApiProduct', name)
+        return self.org.apiproducts[name]
+
+    def list_apiproducts(self, query, body):
+        names = _page(self.org.apiproducts, query.get('startKey', ''), query.get('count', 1000))
+        if _is_true(query.get('expand')):
+            return 200, {'apiProduct': [self.org.apiproducts[name] for name in names]}
+        return 200, names
+
+    def create_apiproduct(self, query, body):
+        details = json.loads(body)
+        if details.get('name') in self.org.apiproducts:
+            raise StandinError(
+                409, f'{details.get("name")} already exists', code='standin.ApiProductAlreadyExists'
+            )
+        self.org.apiproducts[details['name']] = details
+        return 201, details
+
+    def get_apiproduct(self, query, body, name):
+        return 200, self._get_apiproduct(name)
+
+    def update_apiproduct(self, query, body, name):
+        self._get_apiproduct(name)
+        self.org.apiproducts[name] = dict(json.loads(body), name=name)
+        return 200, self.org.apiproducts[name]
+
+    def delete_apiproduct(self, query, body, name):
+        self._get_apiproduct(name)
+        return 200, self.org.apiproducts.pop(name)
+
+    # user roles and their permissions
+
+    def _get_userrole(self, role):
+        if role not in self.org.userroles:
+            raise not_found('UserRole', role)
+        return self.org.userroles[role]
+
+    def list_userroles(self, query, body):
+        return 200, sorted(self.org.userroles)
+
+    def create_userroles(self, query, body):
+        roles = [role['name'] for role in json.loads(body).get('role', [])]
+        for role in roles:
+            self.org.userroles.setdefault(role, {'users': [], 'resourcePermission': []})
+        return 201, {'role': [{'name': role} for role in roles]}
+
+    def get_userrole(self, query, body, role):
+        self._get_userrole(role)
+        return 200, {'name': role}
+
+    def delete_userrole(self, query, body, role):
+        self._get_userrole(role)
+        self.org.userroles.pop(role)
+        return 200, {'name': role}
+
+    def list_role_users(self, query, body, role):
+        return 200, self._get_userrole(role)['users']
+
+    def add_role_user(self, query, body, role):
+        users = self._get_userrole(role)['users']
+        if query.get('id') and query['id'] not in users:
+            users.append(query['id'])
+        return 201, {'name': role}
+
+    def get_role_user(self, query, body, role, user):
+        if user not in self._get_userrole(role)['users']:
+            raise not_found('User', user)
+        return 200, {'name': user}
+
+    def remove_role_user(self, query, body, role, user):
+        users = self._get_userrole(role)['users']
+        if user not in users:
+            raise not_found('User', user)
+        users.remove(user)
+        return 200, {'name': user}
+
+    def get_permissions(self, query, body, role):
+        permissions = self._get_userrole(role)['resourcePermission']
+        if query.get('path'):
+            permissions = [p for p in permissions if p['path'] == query['path']]
+            return 200, (
+                permissions[0] if permissions else {'path': query['path'], 'permissions': []}
+            )
+        return 200, {'resourcePermission': permissions}
+
+    def add_permissions(self, query, body, role):
+        permissions = self._get_userrole(role)['resourcePermission']
+        data = json.loads(body) if body else {}
+        added = data.get('resourcePermission', [data] if 'path' in data else [])
+        for permission in added:
+            permissions[:] = [p for p in permissions if p['path'] != permission['path']]
+            permissions.append(
+                {
+                    'organization': self.org.name,
+                    'path': permission['path'],
+                    'permissions': list(permission.get('permissions', [])),
+                }
+            )
+        return 201, {'resourcePermission': added}
+
+    def delete_permissions(self, query, body, role, permission=None):
+        permissions = self._get_userrole(role)['resourcePermission']
+        for details in permissions:
+            if details['path'] == query.get('path'):
+                if permission:
+                    details['permissions'] = [p for p in details['permissions'] if p != permission]
+                else:
+                    permissions.remove(details)
+                return 200, details
+        raise not_found('Permission', query.get('path'))
+
+    def get_permission(self, query, body, role, permission):
+        for details in self._get_userrole(role)['resourcePermission']:
+            if details['path'] == query.get('path') and permission in details['permissions']:
+                return 200, details
+        raise not_found('Permission', permission)
+
+
+ROUTES = [
+    # method, path after /v1/organizations/{org}, ManagementApi method
+    ('GET', '/{kind}', 'list_bundles'),
+    ('POST', '/{kind}', 'import_bundle'),
+    ('GET', '/{kind}/{name}', 'get_bundle'),
+    ('DELETE', '/{kind}/{name}', 'delete_bundle'),
+    ('GET', '/{kind}/{name}/deployments', 'get_deployments'),
+    ('POST', '/{kind}/{name}/deployments', 'deploy_action'),
+    ('GET', '/{kind}/{name}/revisions', 'list_revisions'),
+    ('GET', '/{kind}/{name}/revisions/{revision}', 'get_revision'),
+    ('DELETE', '/{kind}/{name}/revisions/{revision}', 'delete_revision'),
+    ('GET', '/{kind}/{name}/revisions/{revision}/deployments', 'get_revision_deployments'),
+    ('DELETE', '/{kind}/{name}/revisions/{revision}/deployments', 'force_undeploy'),
+    (
+        'POST',
+        '/environments/{environment}/{kind}/{name}/revisions/{revision}/deployments',
+        'deploy',
+    ),
+    (
+        'DELETE',
+        '/environments/{environment}/{kind}/{name}/revisions/{revision}/deployments',
+        'undeploy',
+    ),
+    ('GET', '/environments', 'list_environments'),
+    ('GET', '/environments/{environment}/deployments', 'get_environment_deployments'),
+    ('GET', '/environments/{environment}/keyvaluemaps/{name}/keys', 'list_kvm_keys'),
+    ('POST', '/environments/{environment}/keyvaluemaps/{name}/entries', 'create_kvm_entry'),
+    ('GET', '/environments/{environment}/keyvaluemaps/{name}/entries/{entry}', 'get_kvm_entry'),
+    ('POST', '/environments/{environment}/keyvaluemaps/{name}/entries/{entry}', 'update_kvm_entry'),
+    (
+        'DELETE',
+        '/environments/{environment}/keyvaluemaps/{name}/entries/{entry}',
+        'delete_kvm_entry',
+    ),
+    ('POST', '/environments/{environment}/caches/{name}/entries', 'clear_cache_entries'),
+    ('POST', '/environments/{environment}/caches/{name}/entries/{entry}', 'clear_cache_entries'),
+    ('GET', '/environments/{environment}/{resource}', 'list_resources'),
+    ('POST', '/environments/{environment}/{resource}', 'create_resource'),
+    ('GET', '/environments/{environment}/{resource}/{name}', 'get_resource'),
+    ('POST', '/environments/{environment}/{resource}/{name}', 'update_resource'),
+    ('PUT', '/environments/{environment}/{resource}/{name}', 'update_resource'),
+    ('DELETE', '/environments/{environment}/{resource}/{name}', 'delete_resource'),
+    ('GET', '/developers', 'list_developers'),
+    ('POST', '/developers', 'create_developer'),
+    ('GET', '/developers/{developer}', 'get_developer'),
+    ('PUT', '/developers/{developer}', 'update_developer'),
+    ('POST', '/developers/{developer}', 'set_developer_status'),
+    ('DELETE', '/developers/{developer}', 'delete_developer'),
+    ('GET', '/developers/{developer}/attributes', 'get_developer_attributes'),
+    ('POST', '/developers/{developer}/attributes', 'update_developer_attributes'),
+    ('GET', '/developers/{developer}/attributes/{attribute}', 'get_developer_attribute'),
+    ('POST', '/developers/{developer}/attributes/{attribute}', 'update_developer_attribute'),
+    ('DELETE', '/developers/{developer}/attributes/{attribute}', 'delete_developer_attribute'),
+    ('GET', '/apps', 'list_apps'),
+    ('GET', '/developers/{developer}/apps', 'list_developer_apps'),
+    ('POST', '/developers/{developer}/apps', 'create_developer_app'),
+    ('GET', '/developers/{developer}/apps/{name}', 'get_developer_app'),
+    ('DELETE', '/developers/{developer}/apps/{name}', 'delete_developer_app'),
+    ('POST', '/developers/{developer}/apps/{name}/keys/create', 'create_app_key'),
+    ('GET', '/developers/{developer}/apps/{name}/keys/{key}', 'get_app_key'),
+    ('POST', '/developers/{developer}/apps/{name}/keys/{key}', 'update_app_key'),
+    ('DELETE', '/developers/{developer}/apps/{name}/keys/{key}', 'delete_app_key'),
+    ('GET', '/apiproducts', 'list_apiproducts'),
+    ('POST', '/apiproducts', 'create_apiproduct'),
+    ('GET', '/apiproducts/{name}', 'get_apiproduct'),
+    ('PUT', '/apiproducts/{name}', 'update_apiproduct'),
+    ('DELETE', '/apiproducts/{name}', 'delete_apiproduct'),
+    ('GET', '/userroles', 'list_userroles'),
+    ('POST', '/userroles', 'create_userroles'),
+    ('GET', '/userroles/{role}', 'get_userrole'),
+    ('DELETE', '/userroles/{role}', 'delete_userrole'),
+    ('GET', '/userroles/{role}/users', 'list_role_users'),
+    ('POST', '/userroles/{role}/users', 'add_role_user'),
+    ('GET', '/userroles/{role}/users/{user}', 'get_role_user'),
+    ('DELETE', '/userroles/{role}/users/{user}', 'remove_role_user'),
+    ('GET', '/userroles/{role}/permissions', 'get_permissions'),
+    ('POST', '/userroles/{role}/permissions', 'add_permissions'),
+    ('DELETE', '/userroles/{role}/permissions', 'delete_permissions'),
+    ('GET', '/userroles/{role}/permissions/{permission}', 'get_permission'),
+    ('DELETE', '/userroles/{role}/permissions/{permission}', 'delete_permissions'),
+    ('GET', '/userroles/{role}/resourcepermissions', 'get_permissions'),
+    ('POST', '/userroles/{role}/resourcepermissions', 'add_permissions'),
+]
+
+
+def _compile_route(path):
+    pattern = re.sub(
+        r'{(\w+)}', lambda m: PARAMETERS.get(m.group(1), f'(?P<{m.group(1)}>[^/]+)'), path
+    )
+    return re.compile(f'^{ORG_PATH}{pattern}/?$')
+
+
+COMPILED_ROUTES = [(method, _compile_route(path), name) for method, path, name in ROUTES]
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    # keep connections alive like the Management API does
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, and with Nagle's algorithm
+    # the body waits for the client's delayed ACK on every reused connection
+    disable_nagle_algorithm = True
+    server_version = 'ApigeeStandin'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body=None, headers=None):
+        if isinstance(body, bytes):
+            content, content_type = body, 'application/octet-stream'
+        elif body is None:
+            content, content_type = b'', 'application/json'
+        else:
+            content, content_type = json.dumps(body).encode(), 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _dispatch(self, method, path, query, body):
+        if path.endswith('/oauth/token'):
+            form = dict(urllib.parse.parse_qsl(body.decode()))
+            username = form.get('username') or self.server.org_username
+            return 200, {'access_token': gen_token(username), 'token_type': 'bearer'}
+        if path.endswith('/passcode'):
+            return 200, {'passcode': 'standin'}
+        for route_method, regex, name in COMPILED_ROUTES:
+            match = regex.match(path) if route_method == method else None
+            if match:
+                params = {k: urllib.parse.unquote(v) for k, v in match.groupdict().items()}
+                if params.pop('org') != self.server.org.name:
+                    raise not_found('Organization', match.group('org'))
+                with self.server.org.lock:
+                    return getattr(self.server.api, name)(query, body, **params)
+        raise StandinError(404, f'No route for {method} {path}', code='standin.NoRoute')
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+        status = self.server.inject_fault()
+        if status == 429:
+            return self._reply(
+                429,
+                {'code': 'standin.TooManyRequests', 'message': 'Too many requests'},
+                headers={'Retry-After': '1'},
+            )
+        elif status:
+            return self._reply(status, {'code': 'standin.ServerError', 'message': 'Injected error'})
+        try:
+            self._reply(*self._dispatch(method, url.path, query, body))
+        except StandinError as e:
+            self._reply(e.status, e.body)
+        except (KeyError, ValueError) as e:
+            self._reply(400, StandinError(400, f'Invalid request: {e}').body)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Local stand-in for the Management API serving an :class:`Org`.
+
+    Every request waits ``latency`` seconds, plus up to ``jitter`` more,
+    then fails with 429 Too Many Requests at ``throttle_rate`` and with a
+    5xx server error at ``error_rate``.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        org,
+        latency=0,
+        jitter=0,
+        throttle_rate=0,
+        error_rate=0,
+        seed=None,
+        username=DEFAULT_USERNAME,
+        verbose=False,
+    ):
+        super().__init__(address, StandinRequestHandler)
+        self.org = org
+        self.api = ManagementApi(org)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.org_username = username
+        self.verbose = verbose
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def inject_fault(self):
+        """Wait the latency of a request and return the status of an injected
+        error, or None."""
+        with self._rng_lock:
+            delay = (
+                self.latency + self._rng.uniform(0, self.jitter) if self.jitter else self.latency
+            )
+            draw = self._rng.random()
+            status = self._rng.choice(SERVER_ERRORS)
+        if delay:
+            time.sleep(delay)
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return status
+        return None
+
+
+def start_server(org, host='127.0.0.1', port=0, **kwargs):
+    """Serve the organization from a background thread and return the
+    server; ``server.url`` is its Management API URL."""
+    server = StandinServer((host, port), org, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
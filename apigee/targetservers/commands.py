@@ -3,6 +3,7 @@ import click
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
 from apigee.silent import common_silent_options
 from apigee.targetservers.targetservers import Targetservers
 from apigee.verbose import common_verbose_options
@@ -70,11 +71,13 @@ def _list_targetservers_in_an_environment(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Targetservers(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_targetservers_in_an_environment(environment, prefix=prefix)
+    ).list_targetservers_in_an_environment(environment, prefix=prefix, format=format, fields=fields)
 
 
 @targetservers.command(help='List all TargetServers in an environment.')
@@ -83,8 +86,9 @@ def _list_targetservers_in_an_environment(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_targetservers_in_an_environment(*args, **kwargs))
+    console.echo_output(_list_targetservers_in_an_environment(*args, **kwargs))
 
 
 def _get_targetserver(
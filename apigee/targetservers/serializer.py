@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class TargetserversSerializer:
-    def serialize_details(self, targetservers, format, prefix=None):
+    def serialize_details(self, targetservers, format, prefix=None, fields=None):
         resp = targetservers
         if format == 'text':
             return targetservers.text
@@ -12,7 +12,9 @@ class TargetserversSerializer:
                 targetserver for targetserver in targetservers if targetserver.startswith(prefix)
             ]
         if format == 'json':
-            return json.dumps(targetservers)
+            return serialize_json(targetservers, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(targetservers, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
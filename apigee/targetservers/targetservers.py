@@ -1,9 +1,9 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee.session import session
 from apigee.targetservers.serializer import TargetserversSerializer
 from apigee.utils import read_file
 
@@ -65,7 +65,7 @@ class Targetservers:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -77,18 +77,22 @@ class Targetservers:
             name=self._targetserver_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_targetservers_in_an_environment(self, environment, prefix=None, format='json'):
+    def list_targetservers_in_an_environment(
+        self, environment, prefix=None, format='json', fields=None
+    ):
         uri = LIST_TARGETSERVERS_IN_AN_ENVIRONMENT_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return TargetserversSerializer().serialize_details(resp, format, prefix=prefix)
+        return TargetserversSerializer().serialize_details(
+            resp, format, prefix=prefix, fields=fields
+        )
 
     def get_targetserver(self, environment):
         uri = GET_TARGETSERVER_PATH.format(
@@ -98,7 +102,7 @@ class Targetservers:
             name=self._targetserver_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -113,7 +117,7 @@ class Targetservers:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.put(uri, headers=hdrs, json=body)
+        resp = session.put(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
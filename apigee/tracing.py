@@ -0,0 +1,158 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import click
+
+from apigee.metrics import recorder
+from apigee.session import session
+
+
+class Tracer:
+    """Records spans of a command, its phases and its HTTP requests, and
+    writes them in the Chrome Trace Event format, which chrome://tracing and
+    https://ui.perfetto.dev load.
+
+    Spans nest within a thread. Spans that start outside of any other span
+    of their thread, e.g. in worker threads, are children of the command.
+    Nothing is recorded until the tracer is enabled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._events = []
+        self._threads = {}
+        self._enabled = False
+        self._root_id = None
+        self._root_start = None
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @property
+    def events(self):
+        return self._events
+
+    def enable(self, session=session):
+        if self._enabled:
+            return
+        self._root_id = next(self._ids)
+        self._root_start = self._now()
+        session.hooks['response'].append(self.on_response)
+        self._enabled = True
+
+    @staticmethod
+    def _now():
+        return time.perf_counter() * 1e6
+
+    def _get_stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _add_event(self, name, category, start, end, span_id, parent_id, args):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': start,
+            'dur': end - start,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': dict(args, id=span_id, parent=parent_id),
+        }
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name, category='phase', **args):
+        if not self._enabled:
+            yield
+            return
+        stack = self._get_stack()
+        span_id = next(self._ids)
+        parent_id = stack[-1] if stack else self._root_id
+        stack.append(span_id)
+        start = self._now()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self._add_event(name, category, start, self._now(), span_id, parent_id, args)
+
+    def traced(self, name):
+        """Decorate a function to run it in a span."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def on_response(self, resp, *args, **kwargs):
+        end = self._now()
+        stack = self._get_stack()
+        method = resp.request.method
+        self._add_event(
+            f'{method} {recorder.get_endpoint(method, resp.url)}',
+            'http',
+            end - resp.elapsed.total_seconds() * 1e6,
+            end,
+            next(self._ids),
+            stack[-1] if stack else self._root_id,
+            {'url': resp.url, 'status': resp.status_code},
+        )
+        return resp
+
+    def write(self, file, name='apigee'):
+        self._add_event(name, 'command', self._root_start, self._now(), self._root_id, None, {})
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}}
+            for tid, thread in threads.items()
+        ]
+        with open(file, 'w') as f:
+            f.write(json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}))
+
+
+tracer = Tracer()
+
+
+def trace_callback(ctx, param, value):
+    if not value:
+        return value
+    tracer.enable()
+
+    def _write():
+        command = ' '.join(filter(None, [ctx.info_name, ctx.invoked_subcommand]))
+        tracer.write(value, name=command)
+
+    ctx.call_on_close(_write)
+    return value
+
+
+def common_trace_options(func):
+    return click.option(
+        '--trace',
+        type=click.Path(dir_okay=False, writable=True),
+        default=None,
+        expose_value=False,
+        callback=trace_callback,
+        help='write the spans of the command, its phases and its HTTP requests to a Chrome Trace Event JSON file, viewable in chrome://tracing or ui.perfetto.dev',
+    )(func)
@@ -1,8 +1,7 @@
 import json
 
-import requests
-
 from apigee import APIGEE_ADMIN_API_URL, auth
+from apigee.session import session
 
 ADD_A_USER_TO_A_ROLE_PATH = (
     '{api_url}/v1/organizations/{org}/userroles/{role_name}/users?id={user_email}'
@@ -82,7 +81,7 @@ class Userroles:
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
         )
-        resp = requests.post(uri, headers=hdrs)
+        resp = session.post(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -94,7 +93,7 @@ class Userroles:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -107,7 +106,7 @@ class Userroles:
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
         body = json.loads(request_body)
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -122,7 +121,7 @@ class Userroles:
         for role in self._role_name:
             roles.append({'name': role})
         body = {'role': roles}
-        resp = requests.post(uri, headers=hdrs, json=body)
+        resp = session.post(uri, headers=hdrs, json=body)
         resp.raise_for_status()
         return resp
 
@@ -138,7 +137,7 @@ class Userroles:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -153,7 +152,7 @@ class Userroles:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -168,7 +167,7 @@ class Userroles:
                 'Content-Type': 'application/x-www-form-urlencoded',
             },
         )
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -179,7 +178,7 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -193,7 +192,7 @@ class Userroles:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -204,7 +203,7 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -215,7 +214,7 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -224,7 +223,7 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -238,7 +237,7 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.delete(uri, headers=hdrs)
+        resp = session.delete(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -254,7 +253,7 @@ class Userroles:
             self._auth,
             headers={'Accept': 'application/json', 'Content-Type': 'application/octet-stream'},
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
@@ -268,6 +267,6 @@ class Userroles:
         hdrs = auth.set_header(
             self._auth, headers={'Accept': 'application/json', 'Content-Type': 'application/json'}
         )
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
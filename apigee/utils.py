@@ -3,8 +3,11 @@ import os
 import re
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from apigee import APIGEE_CLI_MAX_WORKERS
+
 
 def add_to_dict_if_exists(options_dict, initial_dict={}):
     for k, v in options_dict.items():
@@ -95,6 +98,14 @@ def run_func_on_iterable(iterable, func, state_op='append', args=(), kwargs={}):
     return state
 
 
+def run_func_on_iterable_concurrently(iterable, func, max_workers=None, args=(), kwargs={}):
+    if not max_workers:
+        max_workers = APIGEE_CLI_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, *((item,) + args), **kwargs) for item in iterable]
+    return [future.result() for future in futures]
+
+
 def show_message(msg):
     print(msg)
 
@@ -3,6 +3,7 @@ import click
 from apigee import console
 from apigee.auth import common_auth_options, gen_auth
 from apigee.prefix import common_prefix_options
+from apigee.serializer import common_format_options
 from apigee.silent import common_silent_options
 from apigee.verbose import common_verbose_options
 from apigee.virtualhosts.virtualhosts import Virtualhosts
@@ -69,11 +70,15 @@ def _list_virtual_hosts_for_an_environment(
     profile,
     environment,
     prefix=None,
+    format='json',
+    fields=None,
     **kwargs
 ):
     return Virtualhosts(
         gen_auth(username, password, mfa_secret, token, zonename), org, None
-    ).list_virtual_hosts_for_an_environment(environment, prefix=prefix)
+    ).list_virtual_hosts_for_an_environment(
+        environment, prefix=prefix, format=format, fields=fields
+    )
 
 
 @virtualhosts.command(help='Get a list of named virtual hosts for an environment.')
@@ -82,8 +87,9 @@ def _list_virtual_hosts_for_an_environment(
 @common_silent_options
 @common_verbose_options
 @click.option('-e', '--environment', help='environment', required=True)
+@common_format_options
 def list(*args, **kwargs):
-    console.echo(_list_virtual_hosts_for_an_environment(*args, **kwargs))
+    console.echo_output(_list_virtual_hosts_for_an_environment(*args, **kwargs))
 
 
 def _update_virtual_host_for_an_environment(*args, **kwargs):
@@ -1,8 +1,8 @@
-import json
+from apigee.serializer import NDJSON, serialize_json, serialize_ndjson
 
 
 class VirtualhostsSerializer:
-    def serialize_details(self, virtualhosts, format, prefix=None):
+    def serialize_details(self, virtualhosts, format, prefix=None, fields=None):
         resp = virtualhosts
         if format == 'text':
             return virtualhosts.text
@@ -12,7 +12,9 @@ class VirtualhostsSerializer:
                 virtualhost for virtualhost in virtualhosts if virtualhost.startswith(prefix)
             ]
         if format == 'json':
-            return json.dumps(virtualhosts)
+            return serialize_json(virtualhosts, fields)
+        elif format == NDJSON:
+            return serialize_ndjson(virtualhosts, fields)
         elif format == 'table':
             pass
         elif format == 'dict':
@@ -1,9 +1,9 @@
 import json
 
-import requests
 from requests.exceptions import HTTPError
 
 from apigee import APIGEE_ADMIN_API_URL, auth, console
+from apigee.session import session
 from apigee.virtualhosts.serializer import VirtualhostsSerializer
 
 CREATE_A_VIRTUAL_HOST_FOR_AN_ENVIRONMENT_PATH = (
@@ -70,18 +70,22 @@ class Virtualhosts:
             virtualhost_name=self._virtualhost_name,
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
         return resp
 
-    def list_virtual_hosts_for_an_environment(self, environment, prefix=None, format='json'):
+    def list_virtual_hosts_for_an_environment(
+        self, environment, prefix=None, format='json', fields=None
+    ):
         uri = LIST_VIRTUAL_HOSTS_FOR_AN_ENVIRONMENT_PATH.format(
             api_url=APIGEE_ADMIN_API_URL, org_name=self._org_name, environment=environment
         )
         hdrs = auth.set_header(self._auth, headers={'Accept': 'application/json'})
-        resp = requests.get(uri, headers=hdrs)
+        resp = session.get(uri, headers=hdrs)
         resp.raise_for_status()
-        return VirtualhostsSerializer().serialize_details(resp, format, prefix=prefix)
+        return VirtualhostsSerializer().serialize_details(
+            resp, format, prefix=prefix, fields=fields
+        )
 
     def update_virtual_host_for_an_environment(self):
         pass
@@ -0,0 +1,150 @@
+"""Benchmarks of the hot paths of the CLI, run offline against the local
+Management API stand-in::
+
+    python -m benchmarks run -s small -s medium -o baseline.json
+    python -m benchmarks run -s small -s medium --baseline baseline.json
+    python -m benchmarks compare baseline.json benchmarks/results/<run>.json
+
+Each run is saved as JSON, by default under benchmarks/results, and can be
+kept as the baseline later runs are compared to.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import click
+from tabulate import tabulate
+
+from benchmarks.harness import (DEFAULT_TOLERANCE, compare_results, gen_results,
+                                load_results, prepare_environment, save_results)
+
+CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def _echo_comparison(baseline, results, tolerance):
+    rows, regressed = compare_results(baseline, results, tolerance=tolerance)
+    headers = list(rows[0]) if rows else []
+    click.echo(tabulate([list(row.values()) for row in rows], headers=headers))
+    if regressed:
+        sys.exit(f'Median duration regressed by more than {tolerance:.0%}')
+
+
+@click.group(context_settings=CONTEXT_SETTINGS)
+def benchmarks():
+    """Benchmarks of the CLI against a local Management API stand-in."""
+    pass
+
+
+@benchmarks.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    '-s',
+    '--size',
+    'sizes',
+    multiple=True,
+    default=['small'],
+    show_default=True,
+    help='sizes of the generated organization: small, medium or large',
+)
+@click.option(
+    '-b', '--benchmark', 'names', multiple=True, help='benchmarks to run, all by default'
+)
+@click.option('-r', '--repeat', type=click.INT, default=3, show_default=True, help='timed runs')
+@click.option(
+    '--latency',
+    type=click.FLOAT,
+    default=0,
+    show_default=True,
+    help='seconds the stand-in waits before each response',
+)
+@click.option(
+    '-o',
+    '--output',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help='results file  [default: benchmarks/results/<time>.json]',
+)
+@click.option(
+    '--baseline',
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help='results to compare with, failing on regressions',
+)
+@click.option(
+    '--tolerance',
+    type=click.FLOAT,
+    default=DEFAULT_TOLERANCE,
+    show_default=True,
+    help='slowdown of the median duration allowed',
+)
+def run(sizes, names, repeat, latency, output, baseline, tolerance):
+    """Run the benchmarks and save their results."""
+    with tempfile.TemporaryDirectory(prefix='apigee-benchmarks-') as directory:
+        port = prepare_environment(directory)
+        # the CLI can only be imported once its environment is prepared
+        from apigee.standin.server import start_server
+        from benchmarks.cases import BENCHMARKS, SIZES, Context
+
+        for size in sizes:
+            if size not in SIZES:
+                raise click.BadParameter(f'{size} is not one of {", ".join(SIZES)}')
+        for name in names:
+            if name not in [benchmark[0] for benchmark in BENCHMARKS]:
+                raise click.BadParameter(f'no benchmark named {name}')
+        selected = [b for b in BENCHMARKS if not names or b[0] in names]
+        server = start_server(None, port=port, latency=latency)
+        results = []
+        try:
+            for i, size in enumerate(sizes):
+                click.echo(f'Generating {size} organization... ', nl=False, err=True)
+                with Context(server, size, directory) as ctx:
+                    click.echo('Done', err=True)
+                    for name, func, sized in selected:
+                        # benchmarks independent of the size run once
+                        if not sized and i:
+                            continue
+                        click.echo(f'{name} ({size if sized else "-"})... ', nl=False, err=True)
+                        result = func(ctx, repeat)
+                        click.echo(f'{result["median"] * 1000:.1f} ms', err=True)
+                        results.append(dict(name=name, size=size if sized else '-', **result))
+        finally:
+            server.shutdown()
+            server.server_close()
+    results = gen_results(results, {'sizes': list(sizes), 'repeat': repeat, 'latency': latency})
+    output = output or os.path.join(RESULTS_DIRECTORY, f'{time.strftime("%Y%m%d-%H%M%S")}.json')
+    save_results(results, output)
+    click.echo(f'Results written to {output}', err=True)
+    table = [
+        [r['name'], r['size'], r['median'] * 1000, r['stdev'] * 1000, r['items'], r['throughput']]
+        for r in results['results']
+    ]
+    click.echo(
+        tabulate(
+            table,
+            headers=['name', 'size', 'median_ms', 'stdev_ms', 'items', 'items/s'],
+            floatfmt='.1f',
+        )
+    )
+    if baseline:
+        click.echo()
+        _echo_comparison(load_results(baseline), results, tolerance)
+
+
+@benchmarks.command(context_settings=CONTEXT_SETTINGS)
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('results', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--tolerance',
+    type=click.FLOAT,
+    default=DEFAULT_TOLERANCE,
+    show_default=True,
+    help='slowdown of the median duration allowed',
+)
+def compare(baseline, results, tolerance):
+    """Compare results with a baseline, failing on regressions."""
+    _echo_comparison(load_results(baseline), load_results(results), tolerance)
+
+
+if __name__ == '__main__':
+    benchmarks(prog_name='python -m benchmarks')  # pragma: no cover
@@ -0,0 +1,241 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+
+from apigee.apis.apis import Apis
+from apigee.apis.cleanup import RevisionCleaner
+from apigee.auth import gen_auth
+from apigee.backups.backups import Backups
+from apigee.bundler import BundleBuilder
+from apigee.deployments.deployments import DeploymentsMatrix
+from apigee.keyvaluemaps.keyvaluemaps import Keyvaluemaps
+from apigee.session import session
+from apigee.standin.org import DEFAULT_USERNAME, REVISION_INTERVAL, generate_org
+from apigee.standin.server import ManagementApi
+
+from benchmarks.harness import measure, remove_directory
+
+SIZES = {
+    'small': dict(proxies=10, revisions=2, developers=100, apiproducts=20, keyvaluemaps=4),
+    'medium': dict(proxies=100, revisions=3, developers=1000, apiproducts=100, keyvaluemaps=8),
+    'large': dict(proxies=400, revisions=5, developers=4000, apiproducts=400, keyvaluemaps=16),
+}
+# files of the API proxy bundles built, per org size
+BUNDLE_FILES = {'small': 20, 'medium': 200, 'large': 1000}
+KVM_NAME = 'kvm-benchmark'
+KVM_ENTRIES = 10000
+# share of the entries of the map that a push updates, deletes and creates
+KVM_CHANGES = (0.1, 0.05, 0.05)
+
+
+class Context:
+    """A generated organization served by the stand-in, and a directory for
+    the files the benchmarks write."""
+
+    def __init__(self, server, size, directory, seed=0):
+        self.server = server
+        self.size = size
+        self.directory = directory
+        self.org = generate_org(**SIZES[size], seed=seed)
+        self.environment = self.org.environments[0]
+        self.auth = gen_auth(DEFAULT_USERNAME, 'password')
+        self._lock = threading.Lock()
+        self._requests = 0
+        session.hooks['response'].append(self._count)
+
+    def _count(self, resp, *args, **kwargs):
+        with self._lock:
+            self._requests += 1
+
+    def __enter__(self):
+        self.server.org = self.org
+        self.server.api = ManagementApi(self.org)
+        return self
+
+    def __exit__(self, *args):
+        session.hooks['response'].remove(self._count)
+
+    def count_requests(self, run):
+        """Wrap ``run`` to return the number of requests it sent."""
+
+        def wrapper(state):
+            start = self._requests
+            run(state)
+            return self._requests - start
+
+        return wrapper
+
+    def mkdtemp(self):
+        return tempfile.mkdtemp(dir=self.directory)
+
+
+def bench_snapshot(ctx, repeat):
+    """Backups.take_snapshot of every resource type, in requests per second."""
+
+    def run(directory):
+        Backups(
+            ctx.auth, ctx.org.name, directory, fs_write=True, environments=ctx.org.environments
+        ).take_snapshot()
+
+    return measure(
+        ctx.count_requests(run), repeat=repeat, setup=ctx.mkdtemp, teardown=remove_directory
+    )
+
+
+def bench_pull(ctx, repeat):
+    """Apis.pull of an API proxy and its KVM, target server and cache
+    dependencies, in proxies per second."""
+    proxies = sorted(ctx.org.apis)
+    pulls = iter(range(sys.maxsize))
+
+    def run(directory):
+        api = proxies[next(pulls) % len(proxies)]
+        revision = max(ctx.org.apis[api], key=int)
+        Apis(ctx.auth, ctx.org.name, revision, ctx.environment, work_tree=directory).pull(
+            api, dependencies=[], force=True
+        )
+        return 1
+
+    return measure(run, repeat=repeat, setup=ctx.mkdtemp, teardown=remove_directory)
+
+
+def bench_cleanup_plan(ctx, repeat):
+    """RevisionCleaner.gen_plan keeping the revisions of the last day and a
+    half, which looks up creation times, in requests per second."""
+    keep_newer_than = (ctx.org.created_at - 1.5 * REVISION_INTERVAL) / 1000
+
+    def run(state):
+        RevisionCleaner(ctx.auth, ctx.org.name, keep_newer_than=keep_newer_than).gen_plan()
+
+    def setup():
+        # the deployments matrix is cached for the rest of a run
+        DeploymentsMatrix._cache.clear()
+
+    return measure(ctx.count_requests(run), repeat=repeat, setup=setup)
+
+
+def _gen_kvm_files(ctx, directory, seed=0):
+    """Reset the remote map to ``KVM_ENTRIES`` entries and write a local
+    version of it with some entries updated, deleted and created."""
+    rng = random.Random(seed)
+    entries = {f'key-{i:06d}': f'value-{rng.getrandbits(64):x}' for i in range(KVM_ENTRIES)}
+    with ctx.org.lock:
+        ctx.org.resources[ctx.environment]['keyvaluemaps'][KVM_NAME] = {
+            'name': KVM_NAME,
+            'encrypted': False,
+            'entry': dict(entries),
+        }
+    names = sorted(entries)
+    rng.shuffle(names)
+    updates, deletes, creates = (int(share * KVM_ENTRIES) for share in KVM_CHANGES)
+    for name in names[:updates]:
+        entries[name] = f'updated-{entries[name]}'
+    for name in names[updates : updates + deletes]:
+        entries.pop(name)
+    for i in range(creates):
+        entries[f'new-{i:06d}'] = f'value-{i}'
+    local_map = {
+        'name': KVM_NAME,
+        'encrypted': False,
+        'entry': [{'name': name, 'value': value} for name, value in entries.items()],
+    }
+    file = os.path.join(directory, f'{KVM_NAME}.json')
+    with open(file, 'w') as f:
+        f.write(json.dumps(local_map))
+    return file
+
+
+def bench_kvm_push(ctx, repeat):
+    """Keyvaluemaps.push_keyvaluemap of a map of 10k entries with 20% of
+    them changed, in entries written per second."""
+
+    def setup():
+        directory = ctx.mkdtemp()
+        return directory, _gen_kvm_files(ctx, directory)
+
+    def run(state):
+        plan = Keyvaluemaps(ctx.auth, ctx.org.name, KVM_NAME).push_keyvaluemap(
+            ctx.environment, state[1]
+        )
+        return len(plan['create']) + len(plan['update']) + len(plan['delete'])
+
+    return measure(
+        run, repeat=repeat, setup=setup, teardown=lambda state: remove_directory(state[0])
+    )
+
+
+def _gen_bundle_directory(directory, files):
+    for i in range(files):
+        path = os.path.join(directory, 'apiproxy', 'resources', 'jsc', f'script-{i:04d}.js')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f'// script {i}\n' + f'var value{i} = "{i:08d}";\n' * 200)
+    os.makedirs(os.path.join(directory, 'apiproxy', 'proxies'), exist_ok=True)
+    with open(os.path.join(directory, 'apiproxy', 'proxies', 'default.xml'), 'w') as f:
+        f.write('<ProxyEndpoint name="default"><HTTPProxyConnection><BasePath>/benchmark')
+        f.write('</BasePath></HTTPProxyConnection></ProxyEndpoint>\n')
+    return directory
+
+
+def bench_bundle_build(ctx, repeat):
+    """BundleBuilder.build of an API proxy without a cached bundle, in files
+    per second."""
+    files = BUNDLE_FILES[ctx.size]
+    directory = _gen_bundle_directory(ctx.mkdtemp(), files)
+
+    def run(cache_directory):
+        BundleBuilder(directory, cache_directory=cache_directory).build()
+        return files + 1
+
+    try:
+        return measure(run, repeat=repeat, setup=ctx.mkdtemp, teardown=remove_directory)
+    finally:
+        remove_directory(directory)
+
+
+def bench_bundle_build_cached(ctx, repeat):
+    """BundleBuilder.build of an API proxy whose bundle is cached, which
+    hashes the tree only, in files per second."""
+    files = BUNDLE_FILES[ctx.size]
+    directory = _gen_bundle_directory(ctx.mkdtemp(), files)
+    cache_directory = ctx.mkdtemp()
+    BundleBuilder(directory, cache_directory=cache_directory).build()
+
+    def run(state):
+        BundleBuilder(directory, cache_directory=cache_directory).build()
+        return files + 1
+
+    try:
+        return measure(run, repeat=repeat)
+    finally:
+        remove_directory(directory)
+        remove_directory(cache_directory)
+
+
+def bench_cli_startup(ctx, repeat):
+    """``apigee --version`` in a new interpreter, which imports every
+    command."""
+
+    def run(state):
+        subprocess.run(
+            [sys.executable, '-m', 'apigee', '--version'], check=True, capture_output=True
+        )
+        return 1
+
+    return measure(run, repeat=repeat)
+
+
+# name, function, whether it depends on the size of the organization
+BENCHMARKS = [
+    ('snapshot', bench_snapshot, True),
+    ('pull', bench_pull, True),
+    ('cleanup-plan', bench_cleanup_plan, True),
+    ('kvm-push', bench_kvm_push, False),
+    ('bundle-build', bench_bundle_build, True),
+    ('bundle-build-cached', bench_bundle_build_cached, True),
+    ('cli-startup', bench_cli_startup, False),
+]
@@ -0,0 +1,154 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+RESULTS_VERSION = 1
+DEFAULT_TOLERANCE = 0.25
+
+
+def find_free_port(host='127.0.0.1'):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def prepare_environment(directory, host='127.0.0.1'):
+    """Point the CLI at a stand-in on a free port of ``host``, and keep its
+    caches and config in ``directory``. Return the port.
+
+    The CLI reads the Management API URL and its directories when apigee is
+    imported, so this has to run before.
+    """
+    if 'apigee' in sys.modules:
+        raise RuntimeError('apigee was imported before the benchmark environment was prepared')
+    port = find_free_port(host)
+    url = f'http://{host}:{port}'
+    os.environ['APIGEE_ADMIN_API_URL'] = url
+    os.environ['APIGEE_OAUTH_URL'] = f'{url}/oauth/token'
+    os.environ['HOME'] = directory
+    os.environ['USERPROFILE'] = directory
+    return port
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hide the output and progress bars of the CLI."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def measure(run, repeat=3, warmup=1, setup=None, teardown=None):
+    """Time ``run`` ``repeat`` times, after ``warmup`` untimed runs.
+
+    ``setup`` returns the argument of each run and ``teardown`` gets it back;
+    neither is timed. ``run`` returns how many items it processed, to report
+    a throughput.
+    """
+    durations = []
+    items = 0
+    for i in range(warmup + repeat):
+        state = setup() if setup else None
+        try:
+            with quiet():
+                start = time.perf_counter()
+                items = run(state)
+                duration = time.perf_counter() - start
+        finally:
+            if teardown:
+                teardown(state)
+        if i >= warmup:
+            durations.append(duration)
+    median = statistics.median(durations)
+    return {
+        'repeat': repeat,
+        'min': min(durations),
+        'median': median,
+        'mean': statistics.mean(durations),
+        'stdev': statistics.stdev(durations) if len(durations) > 1 else 0,
+        'items': items,
+        'throughput': items / median if median else 0,
+        'durations': durations,
+    }
+
+
+def remove_directory(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def gen_results(results, config):
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': config,
+        'results': results,
+    }
+
+
+def save_results(results, file):
+    directory = os.path.dirname(file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file, 'w') as f:
+        f.write(json.dumps(results, indent=2))
+
+
+def load_results(file):
+    with open(file, 'r') as f:
+        return json.loads(f.read())
+
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """Compare the median durations of the benchmarks run in both, and return
+    one row per benchmark and whether any regressed by more than
+    ``tolerance``."""
+    baseline_medians = {(r['name'], r['size']): r['median'] for r in baseline['results']}
+    rows = []
+    regressed = False
+    for result in current['results']:
+        key = (result['name'], result['size'])
+        if key not in baseline_medians:
+            continue
+        ratio = result['median'] / baseline_medians[key] if baseline_medians[key] else 1
+        if ratio > 1 + tolerance:
+            status = 'regression'
+            regressed = True
+        elif ratio < 1 - tolerance:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append(
+            {
+                'name': result['name'],
+                'size': result['size'],
+                'baseline_ms': round(baseline_medians[key] * 1000, 1),
+                'current_ms': round(result['median'] * 1000, 1),
+                'ratio': round(ratio, 2),
+                'status': status,
+            }
+        )
+    return rows, regressed
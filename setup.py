@@ -49,14 +49,17 @@ SETUP_ARGS = dict(
         'tabulate',
         'pyjwt',
         'python-gnupg>=0.3.5',
-        'gitpython'
+        'gitpython',
+        'pyyaml',
+        'cryptography',
     ],
+    extras_require={'orjson': ['orjson']},
     project_urls={'Documentation': 'https://mdelotavo.github.io/apigee-cli/index.html'},
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
 
 if __name__ == '__main__':
     from setuptools import setup, find_packages
 
-    SETUP_ARGS['packages'] = find_packages()
+    SETUP_ARGS['packages'] = find_packages(exclude=['benchmarks', 'benchmarks.*'])
     setup(**SETUP_ARGS)
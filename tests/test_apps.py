@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from requests.exceptions import HTTPError
+
+from apigee.apps.apps import Apps
+
+DEVELOPERS = [
+    {'developerId': 'd1', 'email': 'a@example.com'},
+    {'developerId': 'd2', 'email': 'b@example.com'},
+    {'developerId': 'd3', 'email': 'c@example.com'},
+]
+ORG_APPS = [
+    {'appId': '3', 'name': 'orders-web', 'developerId': 'd1'},
+    {'appId': '1', 'name': 'orders-app', 'developerId': 'd1'},
+    {'appId': '2', 'name': 'payments', 'developerId': 'd2'},
+    # apps of companies and unknown developers are left out
+    {'appId': '4', 'name': 'company-app', 'companyName': 'acme'},
+    {'appId': '5', 'name': 'orphan', 'developerId': 'd9'},
+]
+
+
+class TestListAppsForAllDevelopers(unittest.TestCase):
+    def setUp(self):
+        self.apps = Apps(None, 'org', None)
+        for name in ('paginate_apps', 'paginate_developer_apps'):
+            patcher = mock.patch.object(Apps, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('apigee.apps.apps.Developers')
+        developers = patcher.start()
+        self.addCleanup(patcher.stop)
+        developers.return_value.paginate_developers.side_effect = lambda **kwargs: iter(DEVELOPERS)
+        self.paginate_apps.side_effect = lambda **kwargs: iter(ORG_APPS)
+
+    def test_grouped_by_developer(self):
+        apps = self.apps.list_apps_for_all_developers(
+            ['a@example.com', 'b@example.com', 'c@example.com']
+        )
+        self.assertEqual(
+            apps,
+            {
+                'a@example.com': ['orders-app', 'orders-web'],
+                'b@example.com': ['payments'],
+                'c@example.com': [],
+            },
+        )
+        self.paginate_developer_apps.assert_not_called()
+
+    def test_prefix_and_expand(self):
+        apps = self.apps.list_apps_for_all_developers(
+            ['a@example.com', 'b@example.com'], prefix='orders-w', expand=True
+        )
+        self.assertEqual(apps, {'a@example.com': [ORG_APPS[0]], 'b@example.com': []})
+
+    def test_fallback_per_developer(self):
+        self.paginate_apps.side_effect = HTTPError('403 Forbidden')
+        self.paginate_developer_apps.side_effect = lambda developer, **kwargs: iter(
+            [f'{developer}-app']
+        )
+        apps = self.apps.list_apps_for_all_developers(['a@example.com', 'b@example.com'])
+        self.assertEqual(
+            apps, {'a@example.com': ['a@example.com-app'], 'b@example.com': ['b@example.com-app']}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from apigee.backups.backups import Backups
+
+DEVELOPERS = [
+    {'developerId': 'd1', 'email': 'a@example.com', 'firstName': 'A'},
+    {'developerId': 'd2', 'email': 'b@example.com', 'firstName': 'B'},
+]
+APIPRODUCTS = [{'name': 'gold', 'proxies': ['orders']}, {'name': 'silver', 'proxies': []}]
+
+
+class TestFromListings(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.mocks = {}
+        for name in ('Developers', 'Apiproducts'):
+            patcher = mock.patch(f'apigee.backups.backups.{name}')
+            self.mocks[name] = patcher.start().return_value
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(Backups, '_progress_callback')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mocks['Developers'].paginate_developers.side_effect = lambda **kwargs: iter(DEVELOPERS)
+        self.mocks['Apiproducts'].paginate_api_products.side_effect = lambda **kwargs: iter(
+            APIPRODUCTS if kwargs.get('expand') else [p['name'] for p in APIPRODUCTS]
+        )
+        self.mocks['Developers'].get_developer.return_value.text = '{"fetched": true}'
+        self.mocks['Apiproducts'].get_api_product.return_value.text = '{"fetched": true}'
+
+    def gen_backups(self, **kwargs):
+        return Backups(None, 'org', self.directory, fs_write=True, **kwargs)
+
+    def read(self, *subpaths):
+        with open(os.path.join(self.directory, 'org', *subpaths)) as f:
+            return json.load(f)
+
+    def test_developers(self):
+        backups = self.gen_backups(from_listings=True)
+        self.assertEqual(backups.download_developers_snapshot(), ['a@example.com', 'b@example.com'])
+        backups.download_developers()
+        self.assertEqual(self.read('developers', 'a@example.com.json'), DEVELOPERS[0])
+        self.mocks['Developers'].get_developer.assert_not_called()
+
+    def test_apiproducts(self):
+        backups = self.gen_backups(from_listings=True)
+        self.assertEqual(backups.download_apiproducts_snapshot(), ['gold', 'silver'])
+        backups.download_apiproducts()
+        self.assertEqual(self.read('apiproducts', 'gold.json'), APIPRODUCTS[0])
+        self.assertEqual(
+            self.read('snapshots', 'apiproducts', 'apiproducts.json'), ['gold', 'silver']
+        )
+        self.mocks['Apiproducts'].get_api_product.assert_not_called()
+
+    def test_single_gets_by_default(self):
+        backups = self.gen_backups()
+        backups.download_apiproducts_snapshot()
+        backups.download_apiproducts()
+        self.assertEqual(self.read('apiproducts', 'gold.json'), {'fetched': True})
+        self.assertEqual(self.mocks['Apiproducts'].get_api_product.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
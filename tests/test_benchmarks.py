@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from benchmarks.__main__ import benchmarks
+from benchmarks.harness import compare_results, gen_results, load_results, save_results
+
+
+def gen_run(*medians):
+    return gen_results(
+        [{'name': name, 'size': size, 'median': median} for name, size, median in medians], {}
+    )
+
+
+class TestCompareResults(unittest.TestCase):
+    BASELINE = gen_run(('snapshot', 'small', 1.0), ('pull', 'small', 0.2), ('kvm-push', '-', 2.0))
+
+    def test_statuses(self):
+        current = gen_run(
+            ('snapshot', 'small', 1.3), ('pull', 'small', 0.1), ('kvm-push', '-', 2.2)
+        )
+        rows, regressed = compare_results(self.BASELINE, current, tolerance=0.25)
+        self.assertTrue(regressed)
+        self.assertEqual(
+            [(row['name'], row['ratio'], row['status']) for row in rows],
+            [
+                ('snapshot', 1.3, 'regression'),
+                ('pull', 0.5, 'improvement'),
+                ('kvm-push', 1.1, 'ok'),
+            ],
+        )
+        self.assertEqual(rows[0]['baseline_ms'], 1000.0)
+        self.assertEqual(rows[0]['current_ms'], 1300.0)
+
+    def test_within_tolerance(self):
+        current = gen_run(('snapshot', 'small', 1.25), ('pull', 'small', 0.16))
+        rows, regressed = compare_results(self.BASELINE, current, tolerance=0.25)
+        self.assertFalse(regressed)
+        self.assertEqual([row['status'] for row in rows], ['ok', 'ok'])
+
+    def test_tolerance(self):
+        current = gen_run(('snapshot', 'small', 1.1))
+        self.assertFalse(compare_results(self.BASELINE, current)[1])
+        self.assertTrue(compare_results(self.BASELINE, current, tolerance=0.05)[1])
+
+    def test_only_common_benchmarks(self):
+        current = gen_run(('snapshot', 'medium', 10.0), ('bundle-build', 'small', 1.0))
+        self.assertEqual(compare_results(self.BASELINE, current), ([], False))
+
+    def test_zero_baseline(self):
+        baseline = gen_run(('bundle-build-cached', 'small', 0))
+        current = gen_run(('bundle-build-cached', 'small', 0.001))
+        rows, regressed = compare_results(baseline, current)
+        self.assertFalse(regressed)
+        self.assertEqual(rows[0]['ratio'], 1)
+
+
+class TestCompareCommand(unittest.TestCase):
+    def compare(self, baseline, current, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_file = os.path.join(directory, 'baseline.json')
+            current_file = os.path.join(directory, 'current.json')
+            save_results(baseline, baseline_file)
+            save_results(current, current_file)
+            self.assertEqual(load_results(current_file), json.loads(json.dumps(current)))
+            return CliRunner().invoke(benchmarks, ['compare', baseline_file, current_file, *args])
+
+    def test_passes(self):
+        result = self.compare(gen_run(('pull', 'small', 0.2)), gen_run(('pull', 'small', 0.21)))
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('ok', result.output)
+
+    def test_fails_on_regression(self):
+        result = self.compare(gen_run(('pull', 'small', 0.2)), gen_run(('pull', 'small', 0.3)))
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('regression', result.output)
+
+    def test_tolerance_option(self):
+        result = self.compare(
+            gen_run(('pull', 'small', 0.2)), gen_run(('pull', 'small', 0.3)), '--tolerance', '0.6'
+        )
+        self.assertEqual(result.exit_code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from apigee.bundler import (
+    ZIP_COMPRESSLEVEL,
+    ZIP_CREATE_SYSTEM,
+    ZIP_DATE_TIME,
+    ZIP_EXTERNAL_ATTR,
+    BundleBuilder,
+    hash_bundle_directory,
+    list_bundle_files,
+)
+
+FILES = {
+    'apiproxy/example.xml': b'<APIProxy name="example"/>',
+    'apiproxy/policies/Assign-Message.xml': b'<AssignMessage>' + b'x' * 5000 + b'</AssignMessage>',
+    'apiproxy/resources/jsc/ümläut.js': os.urandom(4096),
+    'apiproxy/resources/jsc/empty.js': b'',
+    'apiproxy/.svn/entries': b'ignored',
+    'apiproxy/backup.xml~': b'ignored',
+}
+
+
+def write_tree(directory, files=FILES):
+    for name, content in files.items():
+        path = os.path.join(directory, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+
+def write_with_zipfile(directory, compresslevel=ZIP_COMPRESSLEVEL):
+    fileobj = io.BytesIO()
+    with zipfile.ZipFile(fileobj, 'w') as zip_file:
+        for path, arcname in list_bundle_files(directory):
+            zinfo = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.external_attr = ZIP_EXTERNAL_ATTR
+            zinfo.create_system = ZIP_CREATE_SYSTEM
+            with open(path, 'rb') as f:
+                zip_file.writestr(zinfo, f.read(), compresslevel=compresslevel)
+    return fileobj.getvalue()
+
+
+class TestBundleBuilder(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self._tmp.name, 'proxy')
+        self.cache_directory = os.path.join(self._tmp.name, 'bundles')
+        write_tree(self.directory)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, **kwargs):
+        return BundleBuilder(self.directory, **kwargs).write(io.BytesIO()).getvalue()
+
+    def test_members(self):
+        with zipfile.ZipFile(io.BytesIO(self.write())) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(
+                {name: zip_file.read(name) for name in zip_file.namelist()},
+                {name: content for name, content in FILES.items() if content != b'ignored'},
+            )
+
+    def test_same_bytes_as_zipfile(self):
+        for compresslevel in (1, ZIP_COMPRESSLEVEL, 9):
+            with self.subTest(compresslevel=compresslevel):
+                self.assertEqual(
+                    self.write(compresslevel=compresslevel, max_workers=4),
+                    write_with_zipfile(self.directory, compresslevel=compresslevel),
+                )
+
+    def test_reproducible(self):
+        first = self.write()
+        for path, _ in list_bundle_files(self.directory):
+            os.utime(path, (0, 0))
+        self.assertEqual(self.write(max_workers=1), first)
+
+    def test_cache(self):
+        builder = BundleBuilder(self.directory, cache_directory=self.cache_directory)
+        bundle_file = builder.build()
+        self.assertEqual(
+            os.path.basename(bundle_file), f'{builder.tree_hash}-{ZIP_COMPRESSLEVEL}.zip'
+        )
+        os.utime(bundle_file, (0, 0))
+        self.assertEqual(
+            BundleBuilder(self.directory, cache_directory=self.cache_directory).build(), bundle_file
+        )
+        # a cache hit counts as a use when pruning
+        self.assertGreater(os.stat(bundle_file).st_mtime, 0)
+
+    def test_prune_cache(self):
+        builder = BundleBuilder(self.directory, cache_directory=self.cache_directory)
+        os.makedirs(self.cache_directory)
+        for i in range(3):
+            path = os.path.join(self.cache_directory, f'{i}.zip')
+            open(path, 'wb').close()
+            os.utime(path, (i, i))
+        builder.prune_cache(keep=2)
+        self.assertEqual(sorted(os.listdir(self.cache_directory)), ['1.zip', '2.zip'])
+
+    def test_tree_hash(self):
+        tree_hash = hash_bundle_directory(self.directory)
+        with open(os.path.join(self.directory, 'apiproxy', 'example.xml'), 'ab') as f:
+            f.write(b'\n')
+        self.assertNotEqual(hash_bundle_directory(self.directory), tree_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
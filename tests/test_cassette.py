@@ -0,0 +1,161 @@
+import datetime
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import pyotp
+import requests
+from requests.models import Response
+
+from apigee import APIGEE_OAUTH_URL
+from apigee.auth import gen_auth, get_access_token
+from apigee.cassette import Cassette, ReplayAdapter
+from apigee.session import RateLimiter, gen_session
+
+API_URL = 'https://api.enterprise.apigee.com/v1/organizations/org'
+CONSUMER_KEY = 'k3yK3yK3yK3yK3yK3y'
+
+
+def gen_response(method, url, data, content_type='application/json', status=200):
+    resp = Response()
+    resp.status_code = status
+    resp.reason = 'OK'
+    resp.headers['Content-Type'] = content_type
+    resp._content = (json.dumps(data) if 'json' in content_type else data).encode()
+    resp.encoding = 'utf-8'
+    resp.elapsed = datetime.timedelta(seconds=0.1)
+    resp.request = requests.Request(method, url).prepare()
+    return resp
+
+
+class TestScrubbing(unittest.TestCase):
+    def setUp(self):
+        self.cassette = Cassette()
+
+    def record(self, *args, **kwargs):
+        self.cassette.record(gen_response(*args, **kwargs))
+        return self.cassette.interactions[-1]
+
+    def test_secret_keys(self):
+        interaction = self.record(
+            'GET',
+            f'{API_URL}/developers/dev@example.com/apps/app',
+            {'name': 'app', 'credentials': [{'consumerKey': CONSUMER_KEY, 'status': 'approved'}]},
+        )
+        text = interaction['response']['text']
+        self.assertNotIn(CONSUMER_KEY, text)
+        credential = json.loads(text)['credentials'][0]
+        self.assertTrue(credential['consumerKey'].startswith('scrubbed-'))
+        self.assertEqual(credential['status'], 'approved')
+
+    def test_secrets_found_before_are_replaced_everywhere(self):
+        self.record('GET', f'{API_URL}/apps/app', {'consumerKey': CONSUMER_KEY})
+        placeholder = self.cassette.scrub(CONSUMER_KEY)
+        interaction = self.record(
+            'GET', f'{API_URL}/keys/{CONSUMER_KEY}', f'key: {CONSUMER_KEY}', 'text/plain'
+        )
+        self.assertEqual(interaction['request']['url'], f'{API_URL}/keys/{placeholder}')
+        self.assertEqual(interaction['response']['text'], f'key: {placeholder}')
+
+    def test_name_value_lists(self):
+        text = self.record(
+            'GET',
+            f'{API_URL}/keyvaluemaps/kvm',
+            {'name': 'kvm', 'entry': [{'name': 'api-key', 'value': 'hunter2-hunter2'}]},
+        )['response']['text']
+        entry = json.loads(text)['entry'][0]
+        self.assertEqual(entry['name'], 'api-key')
+        self.assertTrue(entry['value'].startswith('scrubbed-'))
+
+    def test_short_values_are_only_replaced_where_found(self):
+        self.record('GET', f'{API_URL}/apps/app', {'attributes': [{'name': 'a', 'value': 'true'}]})
+        text = self.record('GET', f'{API_URL}/flags', 'enabled: true', 'text/plain')['response'][
+            'text'
+        ]
+        self.assertEqual(text, 'enabled: true')
+
+    def test_xml(self):
+        text = self.record(
+            'GET',
+            f'{API_URL}/apps/app',
+            '<App><ConsumerKey>k3yK3yK3yK3yK3yK3y</ConsumerKey><Name>app</Name></App>',
+            'application/xml',
+        )['response']['text']
+        self.assertNotIn(CONSUMER_KEY, text)
+        self.assertIn('<Name>app</Name>', text)
+
+    def test_request_bodies_are_not_recorded(self):
+        resp = gen_response('POST', APIGEE_OAUTH_URL, {'access_token': 'a' * 40})
+        resp.request = requests.Request(
+            'POST', APIGEE_OAUTH_URL, data={'password': 'secret'}
+        ).prepare()
+        self.cassette.record(resp)
+        request = self.cassette.interactions[-1]['request']
+        self.assertEqual(request, {'method': 'POST', 'url': APIGEE_OAUTH_URL, 'body_size': 15})
+
+    def test_mfa_codes_are_left_out(self):
+        interaction = self.record(
+            'POST', f'{APIGEE_OAUTH_URL}?mfa_token=123456', {'access_token': 'a' * 40}
+        )
+        self.assertEqual(interaction['request']['url'], APIGEE_OAUTH_URL)
+
+
+class TestFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_private(self):
+        file = os.path.join(self.directory, 'cassette.json')
+        with open(file, 'w'):
+            pass
+        os.chmod(file, 0o644)
+        Cassette().save(file)
+        self.assertEqual(stat.S_IMODE(os.stat(file).st_mode), 0o600)
+
+    def test_round_trip(self):
+        file = os.path.join(self.directory, 'cassette.json')
+        cassette = Cassette()
+        cassette.record(gen_response('GET', f'{API_URL}/apis', ['a', 'b']))
+        cassette.save(file)
+        self.assertEqual(Cassette.load(file).interactions, cassette.interactions)
+
+
+class TestReplay(unittest.TestCase):
+    def gen_session(self, cassette):
+        session = gen_session()
+        adapter = ReplayAdapter(cassette, latency=None, rate_limiter=RateLimiter())
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def test_replays_in_order_and_repeats_the_last(self):
+        cassette = Cassette()
+        for state in ('pending', 'deployed'):
+            cassette.record(gen_response('GET', f'{API_URL}/apis/a/deployments', {'state': state}))
+        session = self.gen_session(cassette)
+        # the host is not part of the match
+        url = 'http://localhost:8080/v1/organizations/org/apis/a/deployments'
+        states = [session.get(url).json()['state'] for _ in range(3)]
+        self.assertEqual(states, ['pending', 'deployed', 'deployed'])
+
+    def test_unrecorded_request(self):
+        session = self.gen_session(Cassette())
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(f'{API_URL}/apis')
+
+    def test_access_token(self):
+        cassette = Cassette()
+        cassette.record(gen_response('POST', APIGEE_OAUTH_URL, {'access_token': 'a' * 40}))
+        session = self.gen_session(cassette)
+        access_token = get_access_token(
+            gen_auth('user', 'password', mfa_secret=pyotp.random_base32()), session=session
+        )
+        self.assertEqual(access_token, cassette.scrub('a' * 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
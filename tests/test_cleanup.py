@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+from requests.exceptions import HTTPError
+
+from apigee.apis.cleanup import RevisionCleaner, format_revision_ranges
+
+# creation time of each revision, in seconds
+CREATED_AT = {revision: revision * 100 for revision in range(1, 11)}
+
+
+class TestFormatRevisionRanges(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(format_revision_ranges([1, 2, 3, 7, 9, 10]), '1-3, 7, 9-10')
+
+    def test_empty(self):
+        self.assertEqual(format_revision_ranges([]), '')
+
+
+class TestPlan(unittest.TestCase):
+    def gen_cleaner(self, **kwargs):
+        cleaner = RevisionCleaner(None, 'org', max_workers=2, **kwargs)
+        cleaner._get_created_at = mock.Mock(
+            side_effect=lambda api_name, revision: CREATED_AT[revision]
+        )
+        return cleaner
+
+    def test_deployed_are_kept(self):
+        plan = self.gen_cleaner()._gen_api_plan('proxy', ['1', '2', '10', '3'], {2, 10})
+        self.assertEqual(
+            plan,
+            {'name': 'proxy', 'revisions': [1, 2, 3, 10], 'deployed': [2, 10], 'delete': [1, 3]},
+        )
+
+    def test_keep_last(self):
+        plan = self.gen_cleaner(keep_last=3)._gen_api_plan('proxy', range(1, 11), {2})
+        self.assertEqual(plan['delete'], [1, 3, 4, 5, 6, 7])
+
+    def test_keep_newer_than(self):
+        for keep_newer_than, delete in ((0, []), (450, [1, 2, 3, 4]), (1000, list(range(1, 11)))):
+            cleaner = self.gen_cleaner(keep_newer_than=keep_newer_than)
+            plan = cleaner._gen_api_plan('proxy', range(1, 11), set())
+            self.assertEqual(plan['delete'], delete, keep_newer_than)
+            # a binary search over the revisions
+            self.assertLessEqual(cleaner._get_created_at.call_count, 4)
+
+    def test_keep_last_and_newer_than(self):
+        cleaner = self.gen_cleaner(keep_last=2, keep_newer_than=650)
+        plan = cleaner._gen_api_plan('proxy', range(1, 11), {1})
+        self.assertEqual(plan['delete'], [2, 3, 4, 5, 6])
+
+    def test_nothing_to_delete_needs_no_requests(self):
+        cleaner = self.gen_cleaner(keep_last=5, keep_newer_than=0)
+        self.assertEqual(cleaner._gen_api_plan('proxy', [1, 2], set())['delete'], [])
+        cleaner._get_created_at.assert_not_called()
+
+    @mock.patch('apigee.apis.cleanup.DeploymentsMatrix')
+    @mock.patch('apigee.apis.cleanup.Apis')
+    def test_filters(self, apis, matrix):
+        apis.return_value.list_api_proxies_with_revisions.return_value = {
+            'orders-v1': ['1', '2'],
+            'orders-v2': ['1'],
+            'payments': ['1', '2', '3'],
+        }
+        matrix.return_value.get_matrix.return_value = [
+            {'name': 'orders-v1', 'environment': 'test', 'revision': 2},
+            {'name': 'payments', 'environment': 'prod', 'revision': 3},
+        ]
+        cleaner = self.gen_cleaner()
+        self.assertEqual(
+            [api['name'] for api in cleaner.gen_plan(prefix='orders')], ['orders-v1', 'orders-v2']
+        )
+        plan = cleaner.gen_plan(pattern='v1|pay')
+        self.assertEqual(
+            [(api['name'], api['delete']) for api in plan],
+            [('orders-v1', [1]), ('payments', [1, 2])],
+        )
+
+
+class TestRun(unittest.TestCase):
+    @mock.patch('apigee.apis.cleanup.Apis')
+    def test_failed_deletes(self, apis):
+        error = HTTPError('409 Conflict')
+
+        def delete(api_name, revision):
+            if revision == 2:
+                raise error
+
+        apis.return_value.delete_api_proxy_revision.side_effect = delete
+        plan = [{'name': 'proxy', 'delete': [1, 2, 3]}, {'name': 'other', 'delete': []}]
+        errors = RevisionCleaner(None, 'org').run(plan)
+        self.assertEqual(errors, [('proxy', 2, error)])
+        self.assertEqual(apis.return_value.delete_api_proxy_revision.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
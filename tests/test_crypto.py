@@ -0,0 +1,117 @@
+import base64
+import unittest
+from unittest import mock
+
+from apigee import crypto
+from apigee.crypto import (
+    AEAD_MAGIC,
+    ENCRYPTED_HEADER_BEGIN,
+    ENCRYPTED_HEADER_END,
+    NONCE_SIZE,
+    SALT_SIZE,
+    decrypt_message,
+    decrypt_messages,
+    encrypt_message,
+    encrypt_messages,
+)
+
+SECRET = 'correct horse battery staple'
+
+
+def wrap(message):
+    return f'{ENCRYPTED_HEADER_BEGIN}{message}{ENCRYPTED_HEADER_END}'
+
+
+class TestKnownAnswer(unittest.TestCase):
+    SALT = bytes(range(16))
+    NONCE = bytes(range(100, 112))
+    ENCRYPTED = 'QUNBMQABAgMEBQYHCAkKCwwNDg9kZWZnaGlqa2xtbm/u6R11ePMSYQEFbSg/pwSpS3Bpakk='
+
+    def test_encrypt(self):
+        with mock.patch.object(crypto, '_get_run_salt', return_value=self.SALT):
+            with mock.patch.object(crypto.os, 'urandom', return_value=self.NONCE):
+                self.assertEqual(encrypt_message(SECRET, 'value'), self.ENCRYPTED)
+
+    def test_decrypt(self):
+        self.assertEqual(decrypt_message(SECRET, wrap(self.ENCRYPTED)), 'value')
+
+
+class TestLegacyMessages(unittest.TestCase):
+    ARMORED = '-----BEGIN PGP MESSAGE-----\n\njA0EBwMC\n-----END PGP MESSAGE-----\n'
+
+    def setUp(self):
+        patcher = mock.patch.object(crypto, '_get_gpg')
+        self.gpg = patcher.start().return_value
+        self.gpg.decrypt.return_value = 'value'
+        self.addCleanup(patcher.stop)
+
+    def test_base64_encoded(self):
+        message = wrap(base64.b64encode(self.ARMORED.encode()).decode())
+        self.assertEqual(decrypt_message(SECRET, message), 'value')
+        self.gpg.decrypt.assert_called_once_with(self.ARMORED, passphrase=SECRET)
+
+    def test_armored(self):
+        self.assertEqual(decrypt_message(SECRET, wrap(self.ARMORED)), 'value')
+        self.gpg.decrypt.assert_called_once_with(self.ARMORED, passphrase=SECRET)
+
+    def test_not_encoded(self):
+        self.assertEqual(decrypt_message(SECRET, wrap('armored'), encoded=False), 'value')
+        self.gpg.decrypt.assert_called_once_with('armored', passphrase=SECRET)
+
+    def test_aead_messages_skip_gpg(self):
+        decrypt_message(SECRET, wrap(encrypt_message(SECRET, 'value')))
+        self.gpg.decrypt.assert_not_called()
+
+
+class TestMessages(unittest.TestCase):
+    def test_round_trip(self):
+        for message in ['', 'value', 'ünïcödé ✓', 'x' * 10000]:
+            self.assertEqual(
+                decrypt_message(SECRET, wrap(encrypt_message(SECRET, message))), message
+            )
+
+    def test_payload_layout(self):
+        payload = base64.b64decode(encrypt_message(SECRET, 'value'))
+        self.assertTrue(payload.startswith(AEAD_MAGIC))
+        # magic, salt, nonce, ciphertext of 5 bytes and a 16 byte tag
+        self.assertEqual(len(payload), len(AEAD_MAGIC) + SALT_SIZE + NONCE_SIZE + 5 + 16)
+
+    def test_nonces_are_unique(self):
+        self.assertNotEqual(encrypt_message(SECRET, 'value'), encrypt_message(SECRET, 'value'))
+
+    def test_wrong_secret(self):
+        self.assertEqual(decrypt_message('wrong', wrap(encrypt_message(SECRET, 'value'))), '')
+
+    def test_tampered_ciphertext(self):
+        payload = bytearray(base64.b64decode(encrypt_message(SECRET, 'value')))
+        payload[-20] ^= 1
+        message = wrap(base64.b64encode(bytes(payload)).decode())
+        self.assertEqual(decrypt_message(SECRET, message), '')
+
+    def test_tampered_nonce(self):
+        payload = bytearray(base64.b64decode(encrypt_message(SECRET, 'value')))
+        offset = len(AEAD_MAGIC) + SALT_SIZE
+        payload[offset] ^= 1
+        message = wrap(base64.b64encode(bytes(payload)).decode())
+        self.assertEqual(decrypt_message(SECRET, message), '')
+
+    def test_malformed(self):
+        for payload in [
+            'not base64!',
+            'QUNBMQ',
+            'QUNBMQAAAA==',
+            base64.b64encode(b'\xff').decode(),
+        ]:
+            self.assertEqual(decrypt_message(SECRET, wrap(payload)), '', payload)
+
+    def test_not_encrypted(self):
+        self.assertEqual(decrypt_message(SECRET, encrypt_message(SECRET, 'value')), '')
+
+    def test_batches(self):
+        messages = [f'value-{i}' for i in range(20)]
+        encrypted = [wrap(m) for m in encrypt_messages(SECRET, messages)]
+        self.assertEqual(decrypt_messages(SECRET, encrypted, max_workers=4), messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from apigee.apis import deploy
+from apigee.apis.deploy import Deployer
+from apigee.auth import gen_auth
+
+
+def gen_deployment(revision, environment='test', state='deployed'):
+    return {'environment': environment, 'revision': revision, 'basePath': '/', 'state': state}
+
+
+class TestUnchangedBundle(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        cache_file = os.path.join(self.directory, 'deployments.json')
+        patcher = mock.patch.object(deploy, 'APIGEE_CLI_DEPLOYMENTS_CACHE_FILE', cache_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.deployer = Deployer(gen_auth('user', 'password'), 'org', 'proxy', 'test')
+        with open(cache_file, 'w') as f:
+            f.write(
+                json.dumps({self.deployer._deployments_cache_key: {'hash': 'hash', 'revision': 3}})
+            )
+        patcher = mock.patch.object(Deployer, 'get_deployments')
+        self.get_deployments = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged(self):
+        self.get_deployments.return_value = [gen_deployment(2), gen_deployment(3)]
+        self.assertEqual(self.deployer.get_unchanged_revision('hash'), 3)
+
+    def test_changed(self):
+        self.get_deployments.return_value = [gen_deployment(3)]
+        self.assertIsNone(self.deployer.get_unchanged_revision('other'))
+        self.get_deployments.assert_not_called()
+
+    def test_not_cached(self):
+        self.deployer.environment = 'prod'
+        self.assertIsNone(self.deployer.get_unchanged_revision('hash'))
+
+    def test_no_longer_deployed(self):
+        for deployments in (
+            [],
+            None,
+            [gen_deployment(4)],
+            [gen_deployment(3, environment='prod')],
+            [gen_deployment(3, state='undeployed')],
+        ):
+            self.get_deployments.return_value = deployments
+            self.assertIsNone(self.deployer.get_unchanged_revision('hash'), deployments)
+
+    @mock.patch.object(Deployer, 'import_bundle')
+    @mock.patch.object(Deployer, 'get_unchanged_revision', return_value=3)
+    def test_deploy_skips_import(self, get_unchanged_revision, import_bundle):
+        self.assertEqual(self.deployer.deploy(self.directory), 3)
+        get_unchanged_revision.assert_called_once()
+        import_bundle.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from unittest import mock
+
+from apigee.deployments.deployments import DeploymentsMatrix, DeploymentWaiter
+from apigee.exceptions import DeploymentError
+
+
+def gen_details(*states):
+    """Return a response whose deployment details list one revision per
+    state in environment ``dev``."""
+    resp = mock.Mock()
+    resp.json.return_value = {
+        'environment': [
+            {
+                'name': 'dev',
+                'revision': [
+                    {'name': str(revision), 'state': state}
+                    for revision, state in enumerate(states, 1)
+                ],
+            }
+        ]
+    }
+    return resp
+
+
+class TestDeploymentWaiter(unittest.TestCase):
+    def gen_waiter(self, **kwargs):
+        return DeploymentWaiter(None, 'org', initial_delay=0, max_delay=0, **kwargs)
+
+    @mock.patch('apigee.deployments.deployments.Deployments')
+    def test_waits_until_deployed(self, deployments):
+        get_details = deployments.return_value.get_api_proxy_deployment_details
+        get_details.side_effect = [
+            gen_details('undeployed'),
+            gen_details('deployed', 'pending'),
+            gen_details('deployed', 'deployed'),
+        ]
+        waiter = self.gen_waiter()
+        result = waiter.wait([('proxy', 'dev', 2)])
+        self.assertEqual([d['state'] for d in result['proxy']], ['deployed', 'deployed'])
+        self.assertEqual(get_details.call_count, 3)
+        self.assertEqual(
+            [state for _, state in waiter.transitions[('proxy', 'dev', 2)]],
+            [None, 'pending', 'deployed'],
+        )
+
+    @mock.patch('apigee.deployments.deployments.Deployments')
+    def test_error_state(self, deployments):
+        deployments.return_value.get_api_proxy_deployment_details.return_value = gen_details(
+            'error'
+        )
+        with self.assertRaises(DeploymentError):
+            self.gen_waiter().wait([('proxy', 'dev', 1)])
+
+    @mock.patch('apigee.deployments.deployments.Deployments')
+    def test_timeout(self, deployments):
+        deployments.return_value.get_api_proxy_deployment_details.return_value = gen_details(
+            'pending'
+        )
+        with self.assertRaises(DeploymentError):
+            self.gen_waiter(timeout=0).wait([('proxy', 'dev', 1)])
+
+    @mock.patch('apigee.deployments.deployments.Deployments')
+    @mock.patch('apigee.deployments.deployments.Sharedflows')
+    def test_sharedflows(self, sharedflows, deployments):
+        get_deployments = sharedflows.return_value.get_shared_flow_deployments
+        get_deployments.side_effect = [gen_details('pending'), gen_details('deployed')]
+        self.gen_waiter(sharedflows=True).wait([('flow', 'dev', 1)])
+        get_deployments.assert_called_with('flow')
+        deployments.assert_not_called()
+
+
+class TestDeploymentsMatrix(unittest.TestCase):
+    DEPLOYMENTS = {
+        ('dev', False): [('orders', ['2', '3']), ('health', ['1'])],
+        ('prod', False): [('orders', ['2'])],
+        ('dev', True): [('auth', ['4'])],
+        ('prod', True): [],
+    }
+
+    def setUp(self):
+        DeploymentsMatrix._cache.clear()
+        self.addCleanup(DeploymentsMatrix._cache.clear)
+        patcher = mock.patch.object(DeploymentsMatrix, 'get_environment_deployments')
+        self.get_environment_deployments = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.get_environment_deployments.side_effect = self._get_environment_deployments
+
+    def _get_environment_deployments(self, environment, sharedflows=False):
+        resp = mock.Mock()
+        resp.json.return_value = {
+            'aPIProxy': [
+                {'name': name, 'revision': [{'name': r, 'state': 'deployed'} for r in revisions]}
+                for name, revisions in self.DEPLOYMENTS[(environment, sharedflows)]
+            ]
+        }
+        return resp
+
+    def test_matrix(self):
+        matrix = DeploymentsMatrix(None, 'org', environments=['dev', 'prod']).get_matrix()
+        self.assertEqual(
+            [(r['type'], r['name'], r['environment'], r['revision']) for r in matrix],
+            [
+                ('api', 'health', 'dev', 1),
+                ('api', 'orders', 'dev', 2),
+                ('api', 'orders', 'dev', 3),
+                ('api', 'orders', 'prod', 2),
+                ('sharedflow', 'auth', 'dev', 4),
+            ],
+        )
+        self.assertEqual(self.get_environment_deployments.call_count, 4)
+
+    def test_without_sharedflows(self):
+        matrix = DeploymentsMatrix(None, 'org', environments=['dev', 'prod'], sharedflows=False)
+        self.assertEqual({r['type'] for r in matrix.get_matrix()}, {'api'})
+        self.assertEqual(self.get_environment_deployments.call_count, 2)
+
+    def test_cached_until_refreshed(self):
+        DeploymentsMatrix(None, 'org', environments=['dev', 'prod']).get_matrix()
+        matrix = DeploymentsMatrix(None, 'org', environments=['dev', 'prod'])
+        matrix.get_matrix()
+        self.assertEqual(self.get_environment_deployments.call_count, 4)
+        matrix.refresh()
+        self.assertEqual(self.get_environment_deployments.call_count, 8)
+
+    def test_deployed_revisions(self):
+        matrix = DeploymentsMatrix(None, 'org', environments=['dev', 'prod'])
+        self.assertEqual(matrix.get_deployed_revisions('orders'), {'dev': [2, 3], 'prod': [2]})
+        self.assertEqual(matrix.get_deployed_revisions('auth', type='sharedflow'), {'dev': [4]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from requests.exceptions import HTTPError
+
+from apigee.keyvaluemaps.keyvaluemaps import (
+    Keyvaluemaps,
+    diff_keyvaluemaps,
+    list_keyvaluemap_files,
+)
+
+REMOTE = {
+    'name': 'kvm',
+    'encrypted': False,
+    'entry': [
+        {'name': 'same', 'value': '1'},
+        {'name': 'changed', 'value': 'old'},
+        {'name': 'removed', 'value': 'x'},
+    ],
+}
+LOCAL = {
+    'name': 'kvm',
+    'encrypted': False,
+    'entry': [
+        {'name': 'same', 'value': '1'},
+        {'name': 'changed', 'value': 'new'},
+        {'name': 'added', 'value': 'y'},
+    ],
+}
+PLAN = {
+    'create': [{'name': 'added', 'value': 'y'}],
+    'update': [{'name': 'changed', 'value': 'new'}],
+    'delete': [{'name': 'removed', 'value': 'x'}],
+    'unchanged': 1,
+}
+WRITES = (
+    'create_keyvaluemap_in_an_environment',
+    'create_an_entry_in_an_environment_scoped_kvm',
+    'update_an_entry_in_an_environment_scoped_kvm',
+    'delete_keyvaluemap_entry_in_an_environment',
+)
+
+
+def gen_not_found():
+    return HTTPError(response=mock.Mock(status_code=404))
+
+
+def gen_conflict():
+    return HTTPError(response=mock.Mock(status_code=409))
+
+
+class TestDiff(unittest.TestCase):
+    def test_plan(self):
+        self.assertEqual(diff_keyvaluemaps(LOCAL, REMOTE), PLAN)
+
+    def test_identical(self):
+        self.assertEqual(
+            diff_keyvaluemaps(REMOTE, REMOTE),
+            {'create': [], 'update': [], 'delete': [], 'unchanged': 3},
+        )
+
+    def test_missing_map(self):
+        plan = diff_keyvaluemaps(LOCAL, {})
+        self.assertEqual(plan['create'], LOCAL['entry'])
+        self.assertEqual((plan['update'], plan['delete']), ([], []))
+
+
+class TestDryRun(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.file = os.path.join(self.directory, 'kvm.json')
+        with open(self.file, 'w') as f:
+            f.write(json.dumps(LOCAL))
+        self.kvms = Keyvaluemaps(None, 'org', 'kvm')
+        self.writes = {}
+        for name in WRITES + ('get_keyvaluemap_in_an_environment',):
+            patcher = mock.patch.object(Keyvaluemaps, name)
+            self.writes[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.get_keyvaluemap = self.writes.pop('get_keyvaluemap_in_an_environment')
+        patcher = mock.patch('apigee.keyvaluemaps.keyvaluemaps.console')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertNothingWritten(self):
+        for name, write in self.writes.items():
+            self.assertFalse(write.called, name)
+
+    def test_push(self):
+        self.get_keyvaluemap.return_value.json.return_value = REMOTE
+        self.assertEqual(self.kvms.push_keyvaluemap('test', self.file, dry_run=True), PLAN)
+        self.assertNothingWritten()
+
+    def test_push_missing_map(self):
+        self.get_keyvaluemap.side_effect = gen_not_found()
+        plan = self.kvms.push_keyvaluemap('test', self.file, dry_run=True)
+        self.assertEqual(plan['create'], LOCAL['entry'])
+        self.assertNothingWritten()
+
+    def test_diff_environments(self):
+        maps = {'test': LOCAL, 'prod': REMOTE}
+        self.get_keyvaluemap.side_effect = lambda environment: mock.Mock(
+            json=mock.Mock(return_value=maps[environment])
+        )
+        self.assertEqual(self.kvms.diff_keyvaluemap_in_environments('test', 'prod'), PLAN)
+
+    def test_diff_missing_target(self):
+        def get_keyvaluemap(environment):
+            if environment == 'prod':
+                raise gen_not_found()
+            return mock.Mock(json=mock.Mock(return_value=LOCAL))
+
+        self.get_keyvaluemap.side_effect = get_keyvaluemap
+        plan = self.kvms.diff_keyvaluemap_in_environments('test', 'prod')
+        self.assertEqual(plan['create'], LOCAL['entry'])
+
+
+class TestApplyPlan(unittest.TestCase):
+    def setUp(self):
+        self.kvms = Keyvaluemaps(None, 'org', 'kvm')
+        self.calls = {}
+        for name in WRITES + ('get_a_keys_value_in_an_environment_scoped_keyvaluemap',):
+            patcher = mock.patch.object(Keyvaluemaps, name)
+            self.calls[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        for name in ('console', 'tqdm'):
+            patcher = mock.patch(f'apigee.keyvaluemaps.keyvaluemaps.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_writes_without_reads(self):
+        self.kvms.apply_keyvaluemap_plan('test', PLAN, max_workers=4)
+        self.calls['create_an_entry_in_an_environment_scoped_kvm'].assert_called_once_with(
+            'test', 'added', 'y'
+        )
+        self.calls['update_an_entry_in_an_environment_scoped_kvm'].assert_called_once_with(
+            'test', 'changed', 'new'
+        )
+        self.calls['delete_keyvaluemap_entry_in_an_environment'].assert_called_once_with(
+            'test', 'removed'
+        )
+        self.calls['get_a_keys_value_in_an_environment_scoped_keyvaluemap'].assert_not_called()
+
+    def test_entries_changed_since_the_plan(self):
+        self.calls['create_an_entry_in_an_environment_scoped_kvm'].side_effect = [
+            gen_conflict(),
+            None,
+        ]
+        self.calls['update_an_entry_in_an_environment_scoped_kvm'].side_effect = [
+            None,
+            gen_not_found(),
+        ]
+        self.calls['delete_keyvaluemap_entry_in_an_environment'].side_effect = gen_not_found()
+        plan = dict(PLAN, update=[{'name': 'gone', 'value': 'z'}])
+        self.kvms.apply_keyvaluemap_plan('test', plan, max_workers=1)
+        # the created entry already existed and the updated one was deleted
+        self.assertEqual(
+            self.calls['update_an_entry_in_an_environment_scoped_kvm'].call_args_list,
+            [mock.call('test', 'added', 'y'), mock.call('test', 'gone', 'z')],
+        )
+        self.assertEqual(
+            self.calls['create_an_entry_in_an_environment_scoped_kvm'].call_args_list,
+            [mock.call('test', 'added', 'y'), mock.call('test', 'gone', 'z')],
+        )
+
+    def test_errors_are_raised(self):
+        self.calls['delete_keyvaluemap_entry_in_an_environment'].side_effect = HTTPError(
+            response=mock.Mock(status_code=500)
+        )
+        with self.assertRaises(HTTPError):
+            self.kvms.apply_keyvaluemap_plan('test', PLAN)
+
+
+class TestPushDirectory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.kvms = Keyvaluemaps(None, 'org', None)
+        self.calls = {}
+        for name in WRITES + ('get_keyvaluemap_in_an_environment',):
+            patcher = mock.patch.object(Keyvaluemaps, name)
+            self.calls[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        for name in ('console', 'tqdm'):
+            patcher = mock.patch(f'apigee.keyvaluemaps.keyvaluemaps.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, content, *subpaths):
+        file = os.path.join(self.directory, *subpaths)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'w') as f:
+            f.write(content)
+        return file
+
+    def test_files_per_environment(self):
+        self.write('{}', 'test', 'b.json')
+        self.write('{}', 'test', 'a.json')
+        self.write('{}', 'test', '.hidden')
+        self.write('{}', 'shared.json')
+        self.assertEqual(
+            list_keyvaluemap_files(self.directory, ['test', 'prod']),
+            [
+                ('test', os.path.join(self.directory, 'test', 'a.json')),
+                ('test', os.path.join(self.directory, 'test', 'b.json')),
+                ('prod', os.path.join(self.directory, 'shared.json')),
+            ],
+        )
+
+    def test_file_to_every_environment(self):
+        file = self.write('{}', 'kvm.json')
+        self.assertEqual(
+            list_keyvaluemap_files(file, ['test', 'prod']), [('test', file), ('prod', file)]
+        )
+
+    def test_summary_rows(self):
+        self.write(json.dumps(LOCAL), 'test', 'kvm.json')
+        self.write(json.dumps(dict(LOCAL, name='new')), 'test', 'new.json')
+        self.write('{not json', 'test', 'broken.json')
+        self.write('[]', 'test', 'list.json')
+
+        self.calls['get_keyvaluemap_in_an_environment'].side_effect = [
+            mock.Mock(json=mock.Mock(return_value=REMOTE)),
+            gen_not_found(),
+        ]
+        rows = self.kvms.push_keyvaluemaps(['test'], self.directory, max_workers=1)
+        self.assertEqual(
+            [(row['name'], row['status'], row['error'] != '') for row in rows],
+            [
+                ('broken.json', 'failed', True),
+                ('kvm', 'updated', False),
+                ('list.json', 'failed', True),
+                ('new', 'created', False),
+            ],
+        )
+        self.assertEqual(
+            (rows[1]['create'], rows[1]['update'], rows[1]['delete'], rows[1]['unchanged']),
+            (1, 1, 1, 1),
+        )
+        self.calls['create_keyvaluemap_in_an_environment'].assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
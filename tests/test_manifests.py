@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from apigee.exceptions import ManifestError
+from apigee.manifests.manifests import (
+    API,
+    SHAREDFLOW,
+    Manifest,
+    ManifestDeployer,
+    schedule,
+    sort_topologically,
+)
+
+FLOW_CALLOUT = """<FlowCallout name="call-{0}">
+    <SharedFlowBundle>{0}</SharedFlowBundle>
+</FlowCallout>
+"""
+
+
+class TestSchedule(unittest.TestCase):
+    GRAPH = {'a': set(), 'b': {'a'}, 'c': {'b'}, 'd': set(), 'e': {'a', 'd'}}
+
+    def test_dependencies_first(self):
+        order = []
+        lock = threading.Lock()
+
+        def func(node, results):
+            with lock:
+                order.append(node)
+            return node.upper()
+
+        results, errors, skipped = schedule(self.GRAPH, func, max_workers=4)
+        self.assertEqual(results, {node: node.upper() for node in self.GRAPH})
+        self.assertEqual((errors, skipped), ({}, set()))
+        for node, dependencies in self.GRAPH.items():
+            for dependency in dependencies:
+                self.assertLess(order.index(dependency), order.index(node))
+
+    def test_results_of_dependencies(self):
+        results, _, _ = schedule(
+            {'a': set(), 'b': {'a'}}, lambda node, results: results.get('a', 0) + 1
+        )
+        self.assertEqual(results, {'a': 1, 'b': 2})
+
+    def test_failure_skips_dependents(self):
+        def func(node, results):
+            if node == 'a':
+                raise RuntimeError('failed')
+            return node
+
+        results, errors, skipped = schedule(self.GRAPH, func)
+        self.assertEqual(results, {'d': 'd'})
+        self.assertEqual(list(errors), ['a'])
+        self.assertIsInstance(errors['a'], RuntimeError)
+        self.assertEqual(skipped, {'b', 'c', 'e'})
+
+    def test_exit_skips_dependents(self):
+        def func(node, results):
+            if node == 'b':
+                raise SystemExit(1)
+            return node
+
+        results, errors, skipped = schedule(self.GRAPH, func)
+        self.assertEqual(set(results), {'a', 'd', 'e'})
+        self.assertIsInstance(errors['b'], SystemExit)
+        self.assertEqual(skipped, {'c'})
+
+    def test_cycle(self):
+        with self.assertRaises(ManifestError):
+            schedule({'a': {'b'}, 'b': {'a'}}, lambda node, results: node)
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _gen_bundle(self, name, kind='apiproxy', callouts=()):
+        policies = os.path.join(self.directory, name, kind, 'policies')
+        os.makedirs(policies)
+        for callout in callouts:
+            with open(os.path.join(policies, f'call-{callout}.xml'), 'w') as f:
+                f.write(FLOW_CALLOUT.format(callout))
+        return name
+
+    def test_graph(self):
+        manifest = Manifest(
+            ['dev', 'prod'],
+            sharedflows=[
+                {'name': 'auth', 'directory': self._gen_bundle('auth', 'sharedflowbundle')}
+            ],
+            apis=[
+                {'name': 'orders', 'directory': self._gen_bundle('orders', callouts=['auth'])},
+                {
+                    'name': 'health',
+                    'directory': self._gen_bundle('health'),
+                    'environments': ['dev'],
+                },
+            ],
+            base_directory=self.directory,
+        )
+        self.assertEqual(
+            manifest.gen_graph(),
+            {
+                (SHAREDFLOW, 'auth', 'dev'): set(),
+                (SHAREDFLOW, 'auth', 'prod'): {(SHAREDFLOW, 'auth', 'dev')},
+                (API, 'orders', 'dev'): {(SHAREDFLOW, 'auth', 'dev')},
+                (API, 'orders', 'prod'): {(API, 'orders', 'dev'), (SHAREDFLOW, 'auth', 'prod')},
+                (API, 'health', 'dev'): set(),
+            },
+        )
+        self.assertEqual(
+            sort_topologically(manifest.gen_graph()),
+            [
+                [(API, 'health', 'dev'), (SHAREDFLOW, 'auth', 'dev')],
+                [(API, 'orders', 'dev'), (SHAREDFLOW, 'auth', 'prod')],
+                [(API, 'orders', 'prod')],
+            ],
+        )
+
+    def test_unknown_environment(self):
+        with self.assertRaises(ManifestError):
+            Manifest(
+                ['dev'],
+                apis=[
+                    {
+                        'name': 'orders',
+                        'directory': self._gen_bundle('orders'),
+                        'environments': ['qa'],
+                    }
+                ],
+                base_directory=self.directory,
+            )
+
+
+class TestManifestDeployer(unittest.TestCase):
+    @mock.patch('apigee.manifests.manifests.update_deployments_cache')
+    @mock.patch('apigee.manifests.manifests.DeploymentWaiter')
+    @mock.patch('apigee.manifests.manifests.Sharedflows')
+    def test_sharedflow_deployed_before_returning(self, sharedflows, waiter, update_cache):
+        calls = mock.Mock()
+        calls.attach_mock(sharedflows.return_value.deploy_a_shared_flow, 'deploy')
+        calls.attach_mock(waiter.return_value.wait, 'wait')
+        manifest = mock.Mock(items={(SHAREDFLOW, 'auth'): {'directory': 'auth'}})
+        deployer = ManifestDeployer(None, 'org', manifest, force=True)
+        deployer._builders[(SHAREDFLOW, 'auth')] = mock.Mock(tree_hash='hash')
+        self.assertEqual(deployer.deploy_sharedflow('auth', 'dev', revision=3), 3)
+        self.assertEqual(
+            calls.mock_calls,
+            [
+                mock.call.deploy('dev', 'auth', 3, override=False, delay=0),
+                mock.call.wait([('auth', 'dev', 3)]),
+            ],
+        )
+        waiter.assert_called_once_with(None, 'org', sharedflows=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import datetime
+import json
+import unittest
+
+import requests
+from requests.models import Response
+
+import apigee.apis.apis  # noqa: F401, registers the API proxy path templates
+from apigee.metrics import MetricsRecorder, percentile
+
+API_URL = 'https://api.enterprise.apigee.com/v1/organizations/org'
+
+
+def gen_response(method, url, status=200, elapsed=0.1, content=b'{}'):
+    resp = Response()
+    resp.status_code = status
+    resp._content = content
+    resp.elapsed = datetime.timedelta(seconds=elapsed)
+    resp.request = requests.Request(method, url).prepare()
+    resp.url = resp.request.url
+    return resp
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0)
+
+
+class TestEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.recorder = MetricsRecorder()
+
+    def test_templates(self):
+        for method, url, endpoint in (
+            ('GET', f'{API_URL}/apis', 'LIST_API_PROXIES_PATH'),
+            ('GET', f'{API_URL}/apis/orders', 'GET_API_PROXY_PATH'),
+            ('GET', f'{API_URL}/apis/orders/revisions', 'LIST_API_PROXY_REVISIONS_PATH'),
+            (
+                'POST',
+                f'{API_URL}/apis?action=import&name=orders',
+                'IMPORT_API_PROXY_PATH',
+            ),
+            (
+                'DELETE',
+                f'{API_URL}/environments/test/apis/orders/revisions/2/deployments',
+                'UNDEPLOY_API_PROXY_REVISION_PATH',
+            ),
+        ):
+            self.assertEqual(self.recorder.get_endpoint(method, url), endpoint, url)
+
+    def test_unknown_path(self):
+        self.assertEqual(
+            self.recorder.get_endpoint('GET', 'https://example.com/unknown?x=1'), '/unknown'
+        )
+
+
+class TestSummary(unittest.TestCase):
+    def test_grouped_by_endpoint(self):
+        recorder = MetricsRecorder()
+        for elapsed, status in ((0.1, 200), (0.3, 200), (0.2, 404)):
+            recorder.on_response(gen_response('GET', f'{API_URL}/apis/a', status, elapsed))
+        recorder.on_response(gen_response('GET', f'{API_URL}/apis', content=b'["a"]'))
+        summary = {row['endpoint']: row for row in recorder.summarize()}
+        row = summary['GET_API_PROXY_PATH']
+        self.assertEqual((row['requests'], row['errors'], row['bytes']), (3, 1, 6))
+        self.assertAlmostEqual(row['p50_ms'], 200, delta=5)
+        self.assertAlmostEqual(row['p99_ms'], 300, delta=5)
+        self.assertEqual(summary['LIST_API_PROXIES_PATH']['bytes'], 5)
+        self.assertEqual(json.loads(recorder.report('json')), recorder.summarize())
+        self.assertIn('GET_API_PROXY_PATH', recorder.report('table'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from apigee.pagination import (
+    MIN_PAGINATION_COUNT,
+    filter_prefix,
+    paginate,
+    paginate_partitioned,
+)
+
+NAMES = [f'name-{i:03d}' for i in range(25)]
+
+
+def gen_fetch_page(items, key=lambda item: item):
+    """Return a ``fetch_page`` that pages through ``items`` the way the
+    Management API does, including the start key in the page it starts, and
+    the list of the ``(startkey, count)`` of every page fetched."""
+    calls = []
+
+    def fetch_page(startkey, count):
+        calls.append((startkey, count))
+        return [item for item in items if key(item) >= startkey][:count]
+
+    return fetch_page, calls
+
+
+class TestPaginate(unittest.TestCase):
+    def test_every_item_once(self):
+        for count in (2, 3, 5, 24, 25, 26, 1000):
+            fetch_page, _ = gen_fetch_page(NAMES)
+            self.assertEqual(list(paginate(fetch_page, count=count)), NAMES, count)
+
+    def test_pages_start_at_last_key(self):
+        fetch_page, calls = gen_fetch_page(NAMES)
+        list(paginate(fetch_page, count=10))
+        self.assertEqual(calls, [('', 10), ('name-009', 10), ('name-018', 10)])
+
+    def test_full_last_page_fetches_one_more(self):
+        fetch_page, calls = gen_fetch_page(NAMES[:19])
+        self.assertEqual(list(paginate(fetch_page, count=10)), NAMES[:19])
+        self.assertEqual(calls, [('', 10), ('name-009', 10), ('name-018', 10)])
+
+    def test_empty(self):
+        fetch_page, calls = gen_fetch_page([])
+        self.assertEqual(list(paginate(fetch_page, count=10)), [])
+        self.assertEqual(len(calls), 1)
+
+    def test_key(self):
+        items = [{'email': name} for name in NAMES]
+        fetch_page, _ = gen_fetch_page(items, key=lambda item: item['email'])
+        self.assertEqual(list(paginate(fetch_page, count=4, key=lambda item: item['email'])), items)
+
+    def test_startkey_and_stop_key(self):
+        fetch_page, _ = gen_fetch_page(NAMES)
+        self.assertEqual(
+            list(paginate(fetch_page, count=3, startkey='name-005', stop_key='name-012')),
+            NAMES[5:12],
+        )
+
+    def test_count_too_small(self):
+        fetch_page, calls = gen_fetch_page(NAMES)
+        with self.assertRaises(ValueError):
+            paginate(fetch_page, count=MIN_PAGINATION_COUNT - 1)
+        self.assertEqual(calls, [])
+
+
+class TestPaginatePartitioned(unittest.TestCase):
+    ITEMS = sorted(
+        ['-dash', '0zero', 'alpha', 'apple', 'beta', 'b', 'zulu', 'zz']
+        + [f'm{i:02d}' for i in range(30)]
+    )
+
+    def test_same_items_as_paginate(self):
+        for count in (2, 3, 10, 1000):
+            fetch_page, _ = gen_fetch_page(self.ITEMS)
+            self.assertEqual(
+                list(paginate_partitioned(fetch_page, count=count, max_workers=4)),
+                self.ITEMS,
+                count,
+            )
+
+    def test_boundaries(self):
+        fetch_page, calls = gen_fetch_page(self.ITEMS)
+        items = list(paginate_partitioned(fetch_page, count=100, boundaries=('b', 'm')))
+        self.assertEqual(items, self.ITEMS)
+        self.assertEqual(sorted(calls), [('', 100), ('b', 100), ('m', 100)])
+
+    def test_startkey(self):
+        fetch_page, calls = gen_fetch_page(self.ITEMS)
+        items = list(
+            paginate_partitioned(fetch_page, count=100, startkey='c', boundaries=('b', 'm'))
+        )
+        self.assertEqual(items, [item for item in self.ITEMS if item >= 'c'])
+        self.assertEqual(sorted(calls), [('c', 100), ('m', 100)])
+
+    def test_count_too_small(self):
+        fetch_page, _ = gen_fetch_page(self.ITEMS)
+        with self.assertRaises(ValueError):
+            list(paginate_partitioned(fetch_page, count=MIN_PAGINATION_COUNT - 1))
+
+
+class TestFilterPrefix(unittest.TestCase):
+    def test_prefix(self):
+        self.assertEqual(list(filter_prefix(NAMES, 'name-01')), NAMES[10:20])
+
+    def test_no_prefix(self):
+        self.assertEqual(list(filter_prefix(NAMES)), NAMES)
+
+    def test_key(self):
+        items = [{'name': 'a-1'}, {'name': 'b-1'}, {'name': 'a-2'}]
+        self.assertEqual(
+            list(filter_prefix(items, 'a-', key=lambda item: item['name'])),
+            [items[0], items[2]],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# apigee.prefix and apigee.auth import each other, auth has to come first
+from apigee.auth import gen_auth  # isort:skip
+from apigee import prefix
+from apigee.prefix import auth_with_prefix, auth_with_prefixes, get_allowed_teams
+
+
+class TestAllowedTeams(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache_file = os.path.join(self.directory, 'teams.json')
+        for name, value in (
+            ('APIGEE_CLI_DIRECTORY', self.directory),
+            ('APIGEE_CLI_TEAMS_CACHE_FILE', self.cache_file),
+        ):
+            patcher = mock.patch.object(prefix, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(prefix, 'Developers')
+        self.get_attribute = patcher.start().return_value.get_developer_attribute
+        self.addCleanup(patcher.stop)
+        self.get_attribute.return_value.json.return_value = {'value': 'team-a,team-b'}
+        self.auth = gen_auth('user@example.com', 'password')
+
+    def test_uncached_by_default(self):
+        for _ in range(2):
+            self.assertEqual(get_allowed_teams(self.auth, 'org', ttl=0), ['team-a', 'team-b'])
+        self.assertEqual(self.get_attribute.call_count, 2)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_cached(self):
+        for _ in range(2):
+            self.assertEqual(get_allowed_teams(self.auth, 'org', ttl=60), ['team-a', 'team-b'])
+        self.assertEqual(self.get_attribute.call_count, 1)
+        # per organization
+        get_allowed_teams(self.auth, 'other', ttl=60)
+        self.assertEqual(self.get_attribute.call_count, 2)
+
+    def test_expired(self):
+        with mock.patch.object(prefix.time, 'time', return_value=1000):
+            get_allowed_teams(self.auth, 'org', ttl=60)
+        with mock.patch.object(prefix.time, 'time', return_value=1061):
+            get_allowed_teams(self.auth, 'org', ttl=60)
+        self.assertEqual(self.get_attribute.call_count, 2)
+
+    @mock.patch.object(prefix, 'get_allowed_teams', return_value=['team-a', 'team-b'])
+    def test_names(self, get_allowed_teams):
+        self.assertEqual(auth_with_prefix(self.auth, 'org', 'team-b-proxy'), 'team-b-proxy')
+        with self.assertRaises(Exception):
+            auth_with_prefix(self.auth, 'org', 'team-c-proxy')
+        authorized, errors = auth_with_prefixes(
+            self.auth, 'org', ['team-a-1', 'team-c-1', 'team-b-1']
+        )
+        self.assertEqual(authorized, ['team-a-1', 'team-b-1'])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('team-c-1', str(errors[0]))
+        # one lookup for the whole batch
+        self.assertEqual(get_allowed_teams.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
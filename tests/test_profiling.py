@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from apigee.profiling import CpuProfiler, MemoryProfiler
+
+
+def profiled_in_worker():
+    return sum(range(1000))
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(1000)]
+
+
+class TestProfilers(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'profile')
+
+    def test_cpu_includes_worker_threads(self):
+        profiler = CpuProfiler()
+        profiler.start()
+        worker = threading.Thread(target=profiled_in_worker)
+        worker.start()
+        worker.join()
+        files = profiler.write(self.path, 'Command: test\n')
+        self.assertEqual(files, [f'{self.path}.txt', f'{self.path}.prof'])
+        with open(files[0]) as f:
+            report = f.read()
+        self.assertTrue(report.startswith('Command: test\n'))
+        self.assertIn('profiled_in_worker', report)
+        self.assertTrue(os.path.getsize(files[1]))
+
+    def test_memory(self):
+        profiler = MemoryProfiler()
+        profiler.start()
+        blocks = allocate()
+        files = profiler.write(self.path, 'Command: test')
+        del blocks
+        with open(files[0]) as f:
+            report = f.read()
+        self.assertIn('peak', report)
+        self.assertIn('test_profiling.py', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
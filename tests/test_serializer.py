@@ -0,0 +1,118 @@
+import json
+import unittest
+from unittest import mock
+
+import click
+from tabulate import tabulate, tabulate_formats
+
+from apigee import serializer
+from apigee.serializer import dumps, project, serialize_json, serialize_ndjson, serialize_table
+
+RECORDS = [
+    {'name': 'a', 'attributes': [{'name': 'x', 'value': '1'}, {'name': 'y', 'value': 'ü'}]},
+    {'name': 'b', 'count': 2**70, 'nested': {'list': [1.5, None, True]}},
+]
+
+
+class TestDumps(unittest.TestCase):
+    def test_like_json_without_orjson(self):
+        with mock.patch.object(serializer, 'is_orjson_installed', False):
+            for obj in RECORDS + [RECORDS, {1: 'ü'}, 'text', 1, None]:
+                self.assertEqual(dumps(obj), json.dumps(obj))
+
+    @unittest.skipUnless(serializer.is_orjson_installed, 'orjson is not installed')
+    def test_orjson_equivalent_to_json(self):
+        for obj in RECORDS + [RECORDS, {1: 'ü'}, 'text', 1, None]:
+            self.assertEqual(json.loads(dumps(obj)), json.loads(json.dumps(obj)))
+
+    def test_round_trip(self):
+        self.assertEqual(json.loads(dumps(RECORDS)), RECORDS)
+
+
+class TestFields(unittest.TestCase):
+    def test_project(self):
+        self.assertEqual(
+            project(RECORDS[0], ['name', 'attributes[].value', 'missing']),
+            {'name': 'a', 'attributes[].value': ['1', 'ü'], 'missing': None},
+        )
+
+    def test_serialize_json(self):
+        self.assertEqual(
+            json.loads(serialize_json(RECORDS, ['name'])), [{'name': 'a'}, {'name': 'b'}]
+        )
+
+    def test_serialize_ndjson(self):
+        lines = list(serialize_ndjson(iter(RECORDS), ['nested.list[0]']))
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'nested.list[0]': None}, {'nested.list[0]': 1.5}],
+        )
+
+    def test_fields_of_names_are_rejected(self):
+        with self.assertRaises(click.BadParameter):
+            serialize_json(['a', 'b'], ['name'])
+        with self.assertRaises(click.BadParameter):
+            list(serialize_ndjson(['a', 'b'], ['name']))
+
+    def test_names_without_fields(self):
+        self.assertEqual(json.loads(serialize_json(['a', 'b'])), ['a', 'b'])
+
+
+class TestSerializeTable(unittest.TestCase):
+    TABLES = {
+        'empty': ([], ['name', 'state']),
+        'strings': ([['a', 'deployed'], ['bcd', 'undeployed']], ['name', 'state']),
+        'numbers': ([['a', 1, '2'], ['b', 22, '-3'], ['c', None, '4']], ['name', 'rev', 'ref']),
+        'decimals': ([['a', 1.5], ['b', 22.25]], ['name', 'ratio']),
+        'lists': ([['a', ['1', '2']], ['b', []]], ['name', 'revision']),
+        'multi-line': ([['a', 'x\ny'], ['bcd', 'z']], ['name', 'notes']),
+    }
+
+    def assertLikeTabulate(self, rows, headers, **kwargs):
+        for tablefmt in tabulate_formats:
+            with self.subTest(tablefmt=tablefmt, **kwargs):
+                self.assertEqual(
+                    '\n'.join(serialize_table(iter(rows), headers, tablefmt=tablefmt, **kwargs)),
+                    tabulate(rows, headers, tablefmt=tablefmt, **kwargs),
+                )
+
+    def test_like_tabulate(self):
+        for name, (rows, headers) in self.TABLES.items():
+            with self.subTest(table=name):
+                self.assertLikeTabulate(rows, headers)
+
+    def test_index_like_tabulate(self):
+        for name, (rows, headers) in self.TABLES.items():
+            with self.subTest(table=name):
+                self.assertLikeTabulate(rows, headers, showindex=True)
+                self.assertLikeTabulate(rows, ['id'] + headers, showindex='always')
+
+    def test_empty_simple_table_has_separator(self):
+        self.assertEqual(
+            list(serialize_table([], ['name', 'state'], tablefmt='simple')),
+            ['name    state', '------  -------'],
+        )
+
+    def test_index_is_right_aligned(self):
+        rows = [['a']] * 11
+        lines = list(serialize_table(rows, ['name'], showindex=True, tablefmt='simple'))
+        self.assertEqual(lines[2], ' 0  a')
+        self.assertEqual(lines[-1], '10  a')
+
+    def test_rows_after_sample(self):
+        rows = [['a', 'b'], ['cde', 'f\ng']]
+        self.assertEqual(
+            list(serialize_table(rows, ['x', 'y'], tablefmt='plain', sample_size=1)),
+            ['x    y', 'a    b', 'cde    f', '       g'],
+        )
+
+    def test_fixed_widths(self):
+        rows = ([str(i), 'x' * i] for i in range(3))
+        self.assertEqual(
+            list(serialize_table(rows, ['n', 'x'], tablefmt='plain', widths=[3, 2])),
+            ['n    x', '0', '1    x', '2    xx'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import requests
+
+from apigee.standin.org import REVISION_INTERVAL, build_proxy_bundle, generate_org
+from apigee.standin.server import start_server
+
+
+class TestStandin(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.org = generate_org(proxies=2, revisions=3, developers=2, keyvaluemaps=1, kvm_entries=2)
+        cls.server = start_server(cls.org)
+        cls.session = requests.Session()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def request(self, method, path, **kwargs):
+        return self.session.request(
+            method, f'{self.server.url}/v1/organizations/{self.org.name}{path}', **kwargs
+        )
+
+    def test_revisions_have_creation_times(self):
+        created_at = [
+            self.request('GET', f'/apis/proxy-0000/revisions/{revision}').json()['createdAt']
+            for revision in ('1', '2', '3')
+        ]
+        self.assertEqual(
+            created_at,
+            [
+                self.org.created_at - 2 * REVISION_INTERVAL,
+                self.org.created_at - REVISION_INTERVAL,
+                self.org.created_at,
+            ],
+        )
+
+    def test_imported_revision(self):
+        resp = self.request(
+            'POST',
+            '/apis?action=import&name=imported',
+            data=build_proxy_bundle('imported', '1'),
+            headers={'Content-Type': 'application/octet-stream'},
+        )
+        self.assertEqual(resp.status_code, 201)
+        details = self.request('GET', '/apis/imported/revisions/1').json()
+        self.assertEqual(details['createdAt'], resp.json()['createdAt'])
+        self.assertEqual(details['lastModifiedAt'], details['createdAt'])
+        self.assertEqual(self.request('DELETE', '/apis/imported/revisions/1').status_code, 200)
+        self.assertNotIn(('apiproxy', 'imported', '1'), self.org.revisions_created_at)
+
+    def test_deployed_revision_cannot_be_deleted(self):
+        resp = self.request('DELETE', '/apis/proxy-0001/revisions/3')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()['code'], 'standin.DeploymentExists')
+
+    def test_unknown_route(self):
+        self.assertEqual(self.request('GET', '/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import requests
+from requests.models import Response
+
+from apigee.tracing import Tracer
+
+
+def gen_response(url):
+    resp = Response()
+    resp.status_code = 200
+    resp.elapsed = datetime.timedelta(seconds=0.01)
+    resp.request = requests.Request('GET', url).prepare()
+    resp.url = resp.request.url
+    return resp
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+        self.session = requests.Session()
+
+    def test_disabled(self):
+        with self.tracer.span('phase'):
+            pass
+        self.assertEqual(self.tracer.events, [])
+
+    def test_spans(self):
+        self.tracer.enable(session=self.session)
+
+        @self.tracer.traced('inner')
+        def inner():
+            self.tracer.on_response(gen_response('https://example.com/v1/organizations/org'))
+
+        with self.tracer.span('outer', size=2):
+            inner()
+        events = {event['name']: event for event in self.tracer.events}
+        outer, inner_event = events['outer'], events['inner']
+        request = next(e for e in self.tracer.events if e['cat'] == 'http')
+        self.assertEqual(inner_event['args']['parent'], outer['args']['id'])
+        self.assertEqual(request['args']['parent'], inner_event['args']['id'])
+        self.assertEqual(request['args']['status'], 200)
+        self.assertEqual(outer['args']['size'], 2)
+        self.assertLessEqual(outer['ts'], inner_event['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner_event['ts'] + inner_event['dur'])
+        self.assertIn(self.tracer.on_response, self.session.hooks['response'])
+
+    def test_worker_spans_are_children_of_the_command(self):
+        self.tracer.enable(session=self.session)
+
+        def work():
+            with self.tracer.span('work'):
+                pass
+
+        with self.tracer.span('phase'):
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+        events = {event['name']: event for event in self.tracer.events}
+        self.assertEqual(events['work']['args']['parent'], events['phase']['args']['parent'])
+        self.assertNotEqual(events['work']['tid'], events['phase']['tid'])
+
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        file = os.path.join(directory, 'trace.json')
+        self.tracer.enable(session=self.session)
+        with self.tracer.span('phase'):
+            pass
+        self.tracer.write(file, name='apis deploy')
+        with open(file) as f:
+            trace = json.load(f)
+        events = trace['traceEvents']
+        command = next(e for e in events if e.get('cat') == 'command')
+        self.assertEqual(command['name'], 'apis deploy')
+        self.assertIsNone(command['args']['parent'])
+        self.assertTrue(any(e['ph'] == 'M' and e['name'] == 'thread_name' for e in events))
+
+
+if __name__ == '__main__':
+    unittest.main()